@@ -1,25 +1,27 @@
 import Rhino.Geometry as rg
 import rhinoscriptsyntax as rs
 from yoUR import ur_standard as ur
+from yoUR import toolpath
 from yoUR import comm
 
-script = ''
+script = []
 robot_ip = '169.254.186.40'
 accel = 1.0
 vel = 0.1
 blend = 0.0
+# Allowed deviation from the curve in mm
+tolerance = 0.1
 
-curve = rs.GetObject('Select a tracing curve')
-points = rs.CurvePoints(curve)
+curve = rs.coercecurve(rs.GetObject('Select a tracing curve'))
 
-script += ur.set_tcp_by_angles(0, 0, 0, 3.14, 0, 0)
+script.append(ur.set_tcp_by_angles(0, 0, 0, 3.14, 0, 0))
 
-for point in points:
-    plane = rg.Plane(point, rg.Vector3d.XAxis, rg.Vector3d.YAxis)
-    script += ur.move_l(plane, accel, vel, blend)
+# Points on the curve (not its control points), fitted with arcs (movec) and lines (movel)
+orientation = rg.Plane(rg.Point3d.Origin, rg.Vector3d.XAxis, rg.Vector3d.YAxis)
+script.extend(toolpath.curve_script(curve, accel, vel, orientation, blend, tolerance))
 
 
-script = comm.concatenate_script(script)
-print script
-comm.send_script(script,robot_ip)
+# Wrap and send the commands without building the whole program string
+size = comm.send_script_stream(script, robot_ip)
+print("sent %d characters" % size)
 
@@ -0,0 +1,275 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+Benchmark suite of the library hot paths. Runs headless, the geometry module stands in for Rhino.Geometry.
+Results are written as JSON so that runs can be compared over time.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--quick] [--output FILE] [--compare FILE] [--filter NAME]
+"""
+
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import struct
+import subprocess
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from yoUR import geometry as rg
+from yoUR import utils, kinematics, ur_standard, comm
+from yoUR import batch_kinematics, robot_model, rotations, simplify, cycle_time, simulator
+
+# ----- Fixtures -----
+
+MODEL = robot_model.UR5
+RNG = np.random.RandomState(0)
+
+def _random_joints(n):
+    return RNG.uniform(-math.pi, math.pi, (n, 6))
+
+def _planes(frames):
+    """ Geometry planes from (N, 4, 4) frames """
+    
+    return [rg.Plane(rg.Point3d(*f[:3, 3]), rg.Vector3d(*f[:3, 0]), rg.Vector3d(*f[:3, 1])) for f in frames]
+
+def _transforms(frames):
+    result = []
+    for f in frames:
+        t = rg.Transform(1.0)
+        for i in range(3):
+            for j in range(3):
+                t[i, j] = f[i, j]
+        result.append(t)
+    return result
+
+def _realtime_frame():
+    """ A 1108 byte real time interface (port 30003) packet with a length prefix and random doubles """
+    
+    size = 1108
+    body = struct.pack("!%dd" % ((size - 4) // 8), *RNG.uniform(-1, 1, (size - 4) // 8))
+    return struct.pack("!i", size) + body
+
+# ----- Benchmarks -----
+# Each benchmark returns (setup result, function to time, number of items per call)
+
+def bench_fk_legacy(quick):
+    joints = list(_random_joints(1)[0])
+    base = rg.Plane.WorldXY
+    return lambda: kinematics.forward_kinematics(joints, base, MODEL), 1
+
+def bench_fk_batch(quick):
+    n = 10000 if quick else 100000
+    joints = _random_joints(n)
+    return lambda: batch_kinematics.forward_kinematics_batch(joints, MODEL), n
+
+def bench_ik_legacy(quick):
+    frames = batch_kinematics.forward_kinematics_batch([[0.3, -1.2, 1.4, -1.7, -1.57, 0.2]], MODEL)[:, 6]
+    plane = _planes(frames)[0]
+    base = rg.Plane.WorldXY
+    return lambda: kinematics.inverse_kinematics(plane, base, MODEL), 1
+
+def bench_ik_batch(quick):
+    n = 10000 if quick else 100000
+    frames = batch_kinematics.forward_kinematics_batch(_random_joints(n), MODEL)[:, 6]
+    return lambda: batch_kinematics.inverse_kinematics_batch(frames, MODEL), n
+
+def bench_axis_angle_scalar(quick):
+    n = 1000 if quick else 10000
+    transforms = _transforms(rotations.axis_angle_to_matrix(RNG.uniform(-2, 2, (n, 3))))
+    return lambda: [utils.matrix_to_axis_angle(t) for t in transforms], n
+
+def bench_axis_angle_batch(quick):
+    n = 100000
+    matrices = rotations.axis_angle_to_matrix(RNG.uniform(-2, 2, (n, 3)))
+    return lambda: rotations.matrix_to_axis_angle(matrices), n
+
+def _bench_move_l(n):
+    frames = batch_kinematics.forward_kinematics_batch(_random_joints(n), MODEL)[:, 6]
+    planes = _planes(frames)
+    return lambda: [ur_standard.move_l(p, 1.0, 0.2, 0.001) for p in planes], n
+
+def bench_move_l_10k(quick):
+    return _bench_move_l(1000 if quick else 10000)
+
+def bench_move_l_100k(quick):
+    return _bench_move_l(10000 if quick else 100000)
+
+def bench_concatenate_script(quick):
+    n = 10000 if quick else 100000
+    commands = ["movel(p[0.5000,0.5000,0.3000,0.0000,3.1416,0.0000], a = 1.00, v = 0.20, r = 0.0010)\n"] * n
+    return lambda: comm.concatenate_script(commands), n
+
+def bench_get_messages(quick):
+    n = 1000 if quick else 10000
+    frames = [_realtime_frame() for _ in range(n)]
+    
+    def parse():
+        for data in frames:
+            chunks = {}
+            comm.get_messages(data, chunks)
+    return parse, n
+
+def bench_simplify(quick):
+    n = 100000 if quick else 1000000
+    s = np.linspace(0, 20 * math.pi, n)
+    frames = np.tile(np.eye(4), (n, 1, 1))
+    frames[:, :3, 3] = np.stack([200 * np.cos(s), 200 * np.sin(s), 5 * s], axis = 1)
+    frames[:, :3, :3] = rotations.axis_angle_to_matrix(np.stack([0 * s, 0 * s, s / 10], axis = 1))
+    return lambda: simplify.simplify_indices(frames, 0.1, 0.5), n
+
+def bench_cycle_time(quick):
+    n = 10000 if quick else 100000
+    frames = batch_kinematics.forward_kinematics_batch(_random_joints(n), MODEL)[:, 6]
+    commands = [ur_standard.move_l(p, 1.0, 0.2, 0.001) for p in _planes(frames)]
+    return lambda: cycle_time.estimate(commands, MODEL), n
+
+def bench_sender_simulated(quick):
+    """ Small programs through one kept-open connection to a local simulator on free ports """
+    
+    sim = simulator.Simulator("127.0.0.1", 0, 0, interpolate = False)
+    sim.start()
+    sender = comm.ScriptSender("127.0.0.1", sim.script_port)
+    program = comm.concatenate_script(["movel(p[0.5000,0.5000,0.3000,0.0000,3.1416,0.0000], a = 1.00, v = 0.20, r = 0.0010)\n"] * 100)
+    n = 10 if quick else 100
+    
+    def send():
+        for _ in range(n):
+            sender.send(program)
+    
+    def cleanup():
+        sender.close()
+        sim.stop()
+    return send, n, cleanup
+
+BENCHMARKS = [
+    ("fk_legacy", bench_fk_legacy),
+    ("fk_batch", bench_fk_batch),
+    ("ik_legacy", bench_ik_legacy),
+    ("ik_batch", bench_ik_batch),
+    ("axis_angle_scalar", bench_axis_angle_scalar),
+    ("axis_angle_batch", bench_axis_angle_batch),
+    ("move_l_10k", bench_move_l_10k),
+    ("move_l_100k", bench_move_l_100k),
+    ("concatenate_script", bench_concatenate_script),
+    ("get_messages", bench_get_messages),
+    ("simplify", bench_simplify),
+    ("cycle_time", bench_cycle_time),
+    ("sender_simulated", bench_sender_simulated),
+]
+
+# ----- Runner -----
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd = ROOT).decode().strip()
+    except Exception:
+        return None
+
+def run(quick = False, name_filter = None, repeat = 5, started = None):
+    """
+    Function that runs all benchmarks
+    
+    Args:
+        quick: Boolean. Use smaller inputs
+        name_filter: String. Only run benchmarks whose name contains this text
+        repeat: int. Number of timed repetitions, the best and the median are kept
+        started: timezone aware datetime stored as the timestamp. Defaults to now
+    
+    Returns:
+        results: dictionary with metadata and one entry per benchmark
+    """
+    
+    if started is None:
+        started = datetime.datetime.now(datetime.timezone.utc)
+    results = {
+        "timestamp": started.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "quick": quick,
+        "benchmarks": {},
+    }
+    for name, factory in BENCHMARKS:
+        if name_filter and name_filter not in name:
+            continue
+        # Factories return (function, items), or (function, items, cleanup) when they hold resources
+        setup = factory(quick)
+        function, items = setup[:2]
+        try:
+            # Scale the loop count so that one measurement takes at least 0.2 s
+            timer = timeit.Timer(function)
+            number = 1
+            while timer.timeit(number) < 0.2 and number < 100000:
+                number *= 10
+            times = sorted(t / number for t in timer.repeat(repeat, number))
+        finally:
+            if len(setup) > 2:
+                setup[2]()
+        results["benchmarks"][name] = {
+            "items": items,
+            "best_s": times[0],
+            "median_s": times[len(times) // 2],
+            "per_item_us": times[0] / items * 1e6,
+        }
+        print("%-20s %12.6f s  %10.3f us/item" % (name, times[0], times[0] / items * 1e6))
+    return results
+
+def compare(results, baseline):
+    """ Function that prints the speed ratio of every benchmark against a baseline run """
+    
+    print("\n%-20s %12s %12s %8s" % ("benchmark", "baseline s", "current s", "ratio"))
+    for name, entry in sorted(results["benchmarks"].items()):
+        old = baseline.get("benchmarks", {}).get(name)
+        if old is None:
+            continue
+        print("%-20s %12.6f %12.6f %8.2f" % (name, old["best_s"], entry["best_s"], entry["best_s"] / old["best_s"]))
+
+def main():
+    parser = argparse.ArgumentParser(description = "yoUR benchmark suite")
+    parser.add_argument("--quick", action = "store_true", help = "smaller inputs")
+    parser.add_argument("--filter", default = None, help = "only run benchmarks containing this text")
+    parser.add_argument("--repeat", type = int, default = 5)
+    parser.add_argument("--output", default = None, help = "JSON result file. Defaults to benchmarks/results/<time>.json")
+    parser.add_argument("--compare", default = None, help = "JSON result file of an earlier run")
+    args = parser.parse_args()
+    
+    started = datetime.datetime.now(datetime.timezone.utc)
+    results = run(args.quick, args.filter, args.repeat, started)
+    
+    output = args.output
+    if output is None:
+        folder = os.path.join(ROOT, "benchmarks", "results")
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        output = os.path.join(folder, started.strftime("%Y%m%d_%H%M%S") + ".json")
+    with open(output, "w") as f:
+        json.dump(results, f, indent = 2, sort_keys = True)
+    print("\nresults written to %s" % output)
+    
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
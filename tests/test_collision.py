@@ -0,0 +1,67 @@
+"""
+Regression tests for capsule distances and trajectory collision checking
+"""
+
+import numpy as np
+import pytest
+
+from yoUR import collision
+from yoUR import robot_model
+
+# Upright, folded elbow, and a free working pose
+UPRIGHT = [0.0, -np.pi / 2, 0.0, -np.pi / 2, 0.0, 0.0]
+FOLDED = [0.0, -1.0, 3.1, -np.pi / 2, 0.0, 0.0]
+FREE = [0.3, -1.2, 1.4, -1.8, -1.4, 0.2]
+
+
+@pytest.mark.parametrize("p1, q1, p2, q2, expected", [
+    # Crossing at right angles, 5 apart
+    ([-1, 0, 0], [1, 0, 0], [0, -1, 5], [0, 1, 5], 5.0),
+    # Parallel and overlapping
+    ([0, 0, 0], [10, 0, 0], [5, 3, 0], [15, 3, 0], 3.0),
+    # Collinear with a gap between the ends
+    ([0, 0, 0], [1, 0, 0], [3, 0, 0], [4, 0, 0], 2.0),
+    # A point against a segment
+    ([0, 2, 0], [0, 2, 0], [-1, 0, 0], [1, 0, 0], 2.0),
+    ([0, 0, 0], [0, 0, 0], [3, 4, 0], [3, 4, 0], 5.0),
+])
+def test_segment_distance_known_cases(p1, q1, p2, q2, expected):
+    args = [np.asarray(v, dtype = float) for v in (p1, q1, p2, q2)]
+    assert collision.segment_distance(*args) == pytest.approx(expected)
+
+
+def test_segment_distance_matches_sampling():
+    rng = np.random.RandomState(6)
+    p1, q1, p2, q2 = rng.uniform(-1, 1, (4, 50, 3))
+    t = np.linspace(0, 1, 201)
+    a = p1[:, None] + (q1 - p1)[:, None] * t[:, None]
+    b = p2[:, None] + (q2 - p2)[:, None] * t[:, None]
+    sampled = np.linalg.norm(a[:, :, None] - b[:, None], axis = -1).min(axis = (1, 2))
+    exact = collision.segment_distance(p1, q1, p2, q2)
+    assert (exact <= sampled + 1e-12).all()
+    assert np.allclose(exact, sampled, atol = 1e-2)
+
+
+def test_obstacles_hit_only_the_configurations_near_them():
+    # Obstacles around the flange of the upright pose, 0.0 -191.45 1001.06 mm
+    flange = np.eye(4)
+    flange[:3, 3] = [0.0, -191.45, 1001.06]
+    obstacles = [collision.Capsule([-100, -191.45, 1001.06], [100, -191.45, 1001.06], 20.0),
+        collision.Box(flange, [50, 50, 50])]
+    for obstacle in obstacles:
+        checker = collision.CollisionChecker(robot_model.UR5, obstacles = [obstacle])
+        self_hit, world_hit = checker.check([UPRIGHT, FREE])
+        assert list(world_hit) == [True, False]
+        assert not self_hit.any()
+
+
+def test_floor_and_self_collision():
+    floor = collision.HalfSpace([0, 0, 0], [0, 0, 1])
+    checker = collision.CollisionChecker(robot_model.UR5, obstacles = [floor])
+    # Upper arm pointing down through the floor
+    down = [0.0, np.pi / 2, 0.0, -np.pi / 2, 0.0, 0.0]
+    self_hit, world_hit = checker.check([UPRIGHT, down, FOLDED, FREE], chunk_size = 3)
+    assert list(world_hit) == [False, True, True, False]
+    assert list(self_hit) == [False, False, True, False]
+    # Neighbour links are never checked against each other
+    assert not (np.abs(np.diff(checker.self_pairs, axis = 1)) < 2).any()
@@ -0,0 +1,237 @@
+"""
+Regression tests for program wrapping, size limits, splitting, the script sender and dispatch
+"""
+
+import io
+import socket
+import threading
+import time
+import timeit
+
+import pytest
+
+from yoUR import comm
+from yoUR import simulator
+
+
+def _move(i, blend = 0.0):
+    return "movel(p[0.4000,%.4f,0.3000,0.0000,3.1416,0.0000], a = 1.00, v = 0.10, r = %.4f)\n" % (i * 1e-4, blend)
+
+
+def _body(program):
+    """ Commands of a wrapped program, without the wrapper """
+    
+    lines = [l.strip() for l in program.split("\n")]
+    return [l for l in lines[lines.index("def my_script():") + 1:lines.index("end")] if l]
+
+
+def _wait(condition, timeout = 5.0):
+    deadline = timeit.default_timer() + timeout
+    while not condition():
+        if timeit.default_timer() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class _Socket(object):
+    def __init__(self):
+        self.data = b""
+    
+    def sendall(self, data):
+        self.data += data
+
+
+def test_write_script_checks_size_before_sending():
+    target = _Socket()
+    commands = (_move(i) for i in range(20000))
+    with pytest.raises(Exception):
+        comm.write_script(commands, target, chunk_size = 1024, max_size = comm.MAX_PROGRAM_SIZE)
+    assert target.data == b""
+
+
+def test_write_script_limit_counts_bytes():
+    target = _Socket()
+    with pytest.raises(Exception):
+        # 437 characters, 477 bytes
+        comm.write_script([u'popup("é")'] * 40, target, max_size = 450)
+    assert target.data == b""
+
+
+def test_write_script_matches_concatenate_script():
+    commands = [_move(i) for i in range(100)]
+    text = io.StringIO()
+    size = comm.write_script(iter(commands), text, chunk_size = 64)
+    assert text.getvalue() == comm.concatenate_script(commands)
+    assert size == len(text.getvalue())
+    target = _Socket()
+    assert comm.write_script(commands, target, max_size = comm.MAX_PROGRAM_SIZE) == len(target.data)
+    assert target.data == comm.concatenate_script(commands).encode("utf-8")
+
+
+def test_split_script_keeps_order_and_size():
+    commands = ["set_tcp(p[0,0,0.1,0,0,0])\n"] + [_move(i) for i in range(2000)]
+    programs = comm.split_script(commands, max_size = 20000)
+    assert len(programs) > 1
+    moves = []
+    for program in programs:
+        assert len(program) <= 20000
+        body = _body(program)
+        # TCP is repeated in every part
+        assert body[0] == "set_tcp(p[0,0,0.1,0,0,0])"
+        moves += [l for l in body if l.startswith("movel")]
+    assert moves == [c.strip() for c in commands[1:]]
+
+
+def test_split_script_splits_after_stops_only():
+    # Blended runs of ten moves, each ending with a stop
+    commands = [_move(i, 0.0 if i % 10 == 9 else 0.001) for i in range(1000)]
+    programs = comm.split_script(commands, max_size = 8000)
+    assert len(programs) > 1
+    for program in programs[:-1]:
+        assert _body(program)[-1].endswith("r = 0.0000)")
+
+
+def test_split_script_reads_table_blends():
+    stop = comm._command_info("your_movel_poses(your_poses_5, 5, 1.2, 0.1, 0)\n")
+    blended = comm._command_info("your_movel_poses(your_poses_5, 5, 1.2, 0.1, 0.002)\n")
+    table = comm._command_info("your_movel_table(your_poses_2, 2, [1,1], [0.1,0.1], [0,0.001])\n")
+    assert stop[2] and not blended[2] and not table[2]
+
+
+def test_split_script_keeps_tables_with_their_calls():
+    np = pytest.importorskip("numpy")
+    from yoUR import motion_table
+    poses = np.random.RandomState(0).uniform(-0.5, 0.5, (3000, 6))
+    commands = list(motion_table.iter_move_l_table(poses, 1.0, 0.1, 0.001, chunk_size = 300))
+    programs = comm.split_script(commands, max_size = 40000)
+    assert len(programs) > 1
+    for program in programs:
+        body = _body(program)
+        for i, line in enumerate(body):
+            if line.startswith("your_poses_"):
+                name = line.split(" ")[0]
+                assert body[i + 1].startswith("your_movel_poses(%s," % name)
+            elif line.startswith("your_movel_poses("):
+                assert body[i - 1].startswith(line[len("your_movel_poses("):].split(",")[0] + " =")
+
+
+def test_sender_reuses_its_connection():
+    with simulator.Simulator("127.0.0.1", 0, 0, interpolate = False) as sim:
+        with comm.ScriptSender("127.0.0.1", sim.script_port) as sender:
+            programs = [comm.concatenate_script([_move(i)]) for i in range(3)]
+            for program in programs:
+                sender.send(program)
+            assert _wait(lambda: len(sim.programs) == 3)
+            assert [p.strip() for p in sim.programs] == [p.strip() for p in programs]
+            stats = sender.stats()
+            assert stats["connects"] == 1 and stats["send"]["count"] == 3
+
+
+def test_sender_reconnects_after_the_robot_closed():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(2)
+    received = []
+    
+    def robot():
+        # Close the first connection, read the second
+        server.accept()[0].close()
+        connection = server.accept()[0]
+        data = b""
+        while not data.endswith(b"\n"):
+            data += connection.recv(1024)
+        received.append(data)
+        connection.close()
+    
+    thread = threading.Thread(target = robot)
+    thread.start()
+    try:
+        with comm.ScriptSender("127.0.0.1", server.getsockname()[1]) as sender:
+            sender.connect()
+            # Let the close arrive
+            time.sleep(0.1)
+            sender.send("second\n")
+            thread.join(5.0)
+            assert sender.connects == 2
+        assert received == [b"second\n"]
+    finally:
+        server.close()
+
+
+def test_sender_limit_counts_bytes():
+    sender = comm.ScriptSender("127.0.0.1", 1)
+    # Fits in characters, not in bytes
+    program = u"\u00e9" * (comm.MAX_PROGRAM_SIZE // 2 + 1)
+    with pytest.raises(Exception):
+        sender.send(program)
+    assert sender.connects == 0
+    assert comm.get_sender("10.0.0.1") is comm.get_sender("10.0.0.1")
+    assert comm.get_sender("10.0.0.1") is not comm.get_sender("10.0.0.1", 30001)
+
+
+def test_dispatch_returns_snapshot(monkeypatch):
+    release = threading.Event()
+    
+    class _Slow(object):
+        def connect(self):
+            pass
+        
+        def send(self, program):
+            release.wait(2.0)
+            return 0.0
+    
+    monkeypatch.setattr(comm, "get_sender", lambda robot_ip: _Slow())
+    results = comm.dispatch({"10.0.0.1": "x"}, timeout = 0.05)
+    assert results["10.0.0.1"].timed_out and not results["10.0.0.1"].ok
+    release.set()
+    time.sleep(0.1)
+    assert results["10.0.0.1"].timed_out
+
+
+class _SlowConnect(comm.ScriptSender):
+    def connect(self):
+        time.sleep(3.0)
+        comm.ScriptSender.connect(self)
+
+
+@pytest.fixture
+def robots(monkeypatch):
+    """ Two simulators, as robots 10.0.0.1 and 10.0.0.2 """
+    
+    sims = [simulator.Simulator("127.0.0.1", 0, 0, interpolate = False) for _ in range(2)]
+    for sim in sims:
+        sim.start()
+    senders = {"10.0.0.1": comm.ScriptSender("127.0.0.1", sims[0].script_port),
+        "10.0.0.2": comm.ScriptSender("127.0.0.1", sims[1].script_port)}
+    monkeypatch.setattr(comm, "get_sender", lambda robot_ip: senders[robot_ip])
+    yield sims, senders
+    for sender in senders.values():
+        sender.close()
+    for sim in sims:
+        sim.stop()
+
+
+def test_synchronized_dispatch_releases_together(robots):
+    sims, senders = robots
+    program = comm.concatenate_script([_move(0)])
+    results = comm.dispatch({"10.0.0.1": program, "10.0.0.2": program}, synchronized = True, timeout = 5.0)
+    assert all(r.ok and not r.timed_out and r.error is None for r in results.values())
+    assert comm.start_skew(results) < 0.5
+    assert _wait(lambda: all(sim.programs for sim in sims))
+
+
+def test_synchronized_dispatch_sends_nothing_if_a_robot_is_slow(robots):
+    sims, senders = robots
+    senders["10.0.0.2"] = _SlowConnect("127.0.0.1", sims[1].script_port)
+    program = comm.concatenate_script([_move(0)])
+    start = timeit.default_timer()
+    results = comm.dispatch({"10.0.0.1": program, "10.0.0.2": program}, synchronized = True, timeout = 0.3)
+    assert timeit.default_timer() - start < 2.0
+    fast, slow = results["10.0.0.1"], results["10.0.0.2"]
+    assert not fast.ok and not fast.timed_out and fast.sent_at is None
+    assert not slow.ok and slow.timed_out
+    assert comm.start_skew(results) == 0.0
+    # The connected robot got nothing
+    time.sleep(0.5)
+    assert sims[0].programs == []
@@ -0,0 +1,75 @@
+"""
+Regression tests for the cycle-time estimator on ur_standard and ur_custom output
+"""
+
+import numpy as np
+import pytest
+
+from yoUR import cycle_time
+from yoUR import geometry as rg
+from yoUR import ur_custom
+from yoUR import ur_standard
+
+
+def _plane(x, y, z):
+    # Tool pointing down
+    return rg.Plane(rg.Point3d(x, y, z), rg.Vector3d(1, 0, 0), rg.Vector3d(0, -1, 0))
+
+
+def test_parses_ur_custom_output():
+    planes = [_plane(400, 100 * i, 300) for i in range(4)]
+    commands = [ur_custom.pick_l(planes[:2], 1.0, 0.1, 1), ur_custom.place_l(planes[2:], 1.0, 0.1, 1),
+        ur_custom.orient_local(_plane(0, 0, 0), 1.0, 0.1), ur_custom.move_axis(100, 50)]
+    program = cycle_time.parse_script(commands)
+    moves = program["kind"] == cycle_time.MOVE_L
+    # Absolute moves read from literals, local moves kept as offsets
+    assert program["known"][moves].sum() == 4
+    assert program["relative"][moves].sum() == 2
+    assert np.allclose(program["target"][program["known"] & moves, 1], [0.0, 0.1, 0.2, 0.3])
+    times, total = cycle_time.estimate(program)
+    assert np.isfinite(total) and total > 4.0
+
+
+def test_relative_move_follows_previous_pose():
+    commands = [ur_standard.move_l(_plane(400, 0, 300), 1.0, 0.1),
+        ur_custom.move_local(rg.Vector3d(0, 0, -100), 1.0, 0.1),
+        ur_standard.move_l(_plane(400, 0, 300), 1.0, 0.1)]
+    times, total = cycle_time.estimate(commands)
+    # 0.1 m up and back down at 0.1 m/s, 1 m/s^2
+    expected = cycle_time.trapezoid_time(0.1, 0.1, 1.0)
+    assert times[-1] == pytest.approx(expected)
+    assert times[-2] == pytest.approx(expected)
+
+
+def test_unknown_targets_do_not_shift_moves():
+    commands = [ur_standard.move_l(_plane(400, 0, 300), 1.0, 0.1),
+        "movel(some_pose, a = 1.00, v = 0.10)\n",
+        ur_standard.move_l(_plane(400, 100, 300), 1.0, 0.1),
+        ur_standard.move_l(_plane(400, 200, 300), 0.5, 0.2, 0.01)]
+    program = cycle_time.parse_script(commands)
+    assert list(program["known"]) == [True, False, True, True]
+    assert np.allclose(program["target"][3, :3], [0.4, 0.2, 0.3])
+    assert list(program["vel"]) == [0.1, 0.1, 0.1, 0.2]
+    assert program["blend"][3] == 0.01
+    times, _ = cycle_time.estimate(program)
+    # Nothing is known after the unknown move
+    assert times[1] == 0.0 and times[2] == 0.0 and times[3] > 0.0
+
+
+def test_positional_and_keyword_arguments():
+    program = cycle_time.parse_script(["movec(p[0.1,0,0,0,0,0], p[0.2,0.1,0,0,0,0], 1.0, 0.2, 0, 0.01)\n",
+        "movej([0.001,0,0,0,0,0], v = 0.5)\n", "sleep(0.25)\n"])
+    assert list(program["kind"]) == [cycle_time.MOVE_C, cycle_time.MOVE_J, cycle_time.SLEEP]
+    assert program["blend"][0] == 0.01 and program["vel"][0] == 0.2
+    assert program["target"][1, 0] == 0.001 and program["vel"][1] == 0.5 and program["accel"][1] == 1.4
+    assert program["time"][2] == 0.25
+
+
+def test_trapezoid_time_profiles():
+    # Cruise: 0.1 s ramps of 0.005 m each, 0.09 m at 0.1 m/s
+    assert cycle_time.trapezoid_time(0.1, 0.1, 1.0) == pytest.approx(1.1)
+    # Triangle: never reaches the speed limit
+    assert cycle_time.trapezoid_time(0.004, 0.1, 1.0) == pytest.approx(2 * np.sqrt(0.004))
+    # Blended through at full speed
+    assert cycle_time.trapezoid_time(0.1, 0.1, 1.0, 0.1, 0.1) == pytest.approx(1.0)
+    assert list(cycle_time.trapezoid_time([0.0, 0.1], 0.1, 1.0)) == pytest.approx([0.0, 1.1])
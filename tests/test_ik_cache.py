@@ -0,0 +1,78 @@
+"""
+Regression tests for the persistent IK cache
+"""
+
+import struct
+
+import pytest
+
+from yoUR import geometry as rg
+from yoUR import ik_cache
+from yoUR import kinematics
+from yoUR import robot_model
+
+
+def _digest(i):
+    return struct.pack("<QQ", 0, i)
+
+
+def _target(x):
+    return rg.Plane(rg.Point3d(x, -300, 400), rg.Vector3d(1, 0, 0), rg.Vector3d(0, -1, 0))
+
+
+def test_hits_after_the_first_solve_and_after_reopening(tmp_path):
+    path = str(tmp_path / "ik.cache")
+    base = rg.Plane.WorldXY
+    with ik_cache.IKCache(path, capacity = 64) as cache:
+        expected = kinematics.inverse_kinematics(_target(200), base, robot_model.UR5)
+        assert cache.inverse_kinematics(_target(200), base, robot_model.UR5) == expected
+        assert cache.inverse_kinematics(_target(200), base, robot_model.UR5) == expected
+        # Another branch is another key
+        cache.inverse_kinematics(_target(200), base, robot_model.UR5, right_hand = False)
+        assert (cache.hits, cache.misses) == (1, 2)
+    with ik_cache.IKCache(path) as cache:
+        assert cache.capacity == 64
+        assert cache.inverse_kinematics(_target(200), base, robot_model.UR5) == expected
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["misses"] == 0 and stats["hit_rate"] == 1.0
+        assert stats["shared_hits"] == 2 and stats["shared_misses"] == 2 and stats["entries"] == 2
+        # Below the resolution the key does not change
+        assert cache.key(_target(200), base, robot_model.UR5) == cache.key(_target(200.0001), base, robot_model.UR5)
+        assert cache.key(_target(200), base, robot_model.UR5) != cache.key(_target(200.01), base, robot_model.UR5)
+
+
+def test_full_bucket_drops_the_least_recently_used(tmp_path):
+    # Capacity of one bucket, so every key shares it
+    with ik_cache.IKCache(str(tmp_path / "ik.cache"), capacity = ik_cache.WAYS) as cache:
+        for i in range(ik_cache.WAYS):
+            cache.put(_digest(i), [float(i)] * 6)
+        assert cache.get(_digest(0)) == [0.0] * 6
+        cache.put(_digest(100), [1.5] * 6)
+        assert cache.get(_digest(1)) is None
+        assert cache.get(_digest(0)) == [0.0] * 6
+        assert cache.get(_digest(100)) == [1.5] * 6
+        assert all(cache.get(_digest(i)) == [float(i)] * 6 for i in range(2, ik_cache.WAYS))
+        # Replacing a key keeps one entry
+        cache.put(_digest(100), [2.5] * 6)
+        assert cache.get(_digest(100)) == [2.5] * 6
+        assert cache.stats()["entries"] == ik_cache.WAYS
+        cache.clear()
+        assert cache.stats()["entries"] == 0 and cache.get(_digest(0)) is None
+
+
+def test_corrupted_entries_are_misses(tmp_path):
+    with ik_cache.IKCache(str(tmp_path / "ik.cache"), capacity = ik_cache.WAYS) as cache:
+        cache.put(_digest(1), [0.5] * 6)
+        offset = ik_cache._HEADER_SIZE + cache._map[ik_cache._HEADER_SIZE:].find(_digest(1))
+        # Flip a byte of the first joint
+        joint = offset + 16 + 8 + 4
+        cache._map[joint:joint + 1] = bytearray([cache._map[joint] ^ 0xff])
+        assert cache.get(_digest(1)) is None
+        assert cache.misses == 1
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other"
+    path.write_bytes(b"not a cache" * 100)
+    with pytest.raises(ValueError):
+        ik_cache.IKCache(str(path))
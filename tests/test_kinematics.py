@@ -0,0 +1,118 @@
+"""
+Regression tests for batched forward / inverse kinematics and the robot model
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from yoUR import batch_kinematics
+from yoUR import geometry as rg
+from yoUR import kinematics
+from yoUR import robot_model
+
+
+def _matrix(plane):
+    m = np.eye(4)
+    for c, v in enumerate((plane.XAxis, plane.YAxis, plane.ZAxis, plane.Origin)):
+        m[:3, c] = [v.X, v.Y, v.Z]
+    return m
+
+
+def _wrap(angles):
+    return (np.asarray(angles) + np.pi) % (2 * np.pi) - np.pi
+
+
+def test_fk_batch_matches_forward_kinematics():
+    joints = np.random.RandomState(0).uniform(-math.pi, math.pi, (5, 6))
+    base = rg.Plane(rg.Point3d(100, -200, 50), rg.Vector3d(0, 1, 0), rg.Vector3d(-1, 0, 0))
+    frames = batch_kinematics.forward_kinematics_batch(joints, robot_model.UR5, base)
+    assert frames.shape == (5, 7, 4, 4)
+    for q, batch in zip(joints, frames):
+        # forward_kinematics reads the joint angles from the theta column
+        dh = [list(d) for d in robot_model.UR5.dh_parameters]
+        for i in range(6):
+            dh[i][1] += q[i]
+        planes = kinematics.forward_kinematics([0.0] * 6, base, dh)
+        # Frame 0 of forward_kinematics is not moved to the base
+        assert np.allclose([_matrix(p) for p in planes[1:]], batch[1:], atol = 1e-9)
+    assert np.allclose(frames[:, 0], batch_kinematics.as_matrix(base))
+
+
+@pytest.mark.parametrize("model", [robot_model.UR5, robot_model.UR10E, robot_model.UR3])
+def test_fk_ik_round_trip(model):
+    rng = np.random.RandomState(1)
+    joints = rng.uniform(-math.pi, math.pi, (200, 6))
+    frames = batch_kinematics.forward_kinematics_batch(joints, model)[:, -1]
+    solutions, valid = batch_kinematics.inverse_kinematics_batch(frames, model)
+    
+    # Every valid solution reaches the target
+    for branch in range(8):
+        rows = np.flatnonzero(valid[:, branch])
+        reached = batch_kinematics.forward_kinematics_batch(solutions[rows, branch], model)[:, -1]
+        assert np.allclose(reached, frames[rows], atol = 1e-6)
+    
+    # One of them is the configuration the target came from, away from singular wrists
+    wrist = np.abs(np.sin(joints[:, 4])) > 1e-2
+    delta = np.abs(_wrap(solutions - joints[:, None])).max(axis = 2)
+    delta = np.where(valid, delta, np.inf)
+    assert (delta.min(axis = 1)[wrist] < 1e-6).all()
+
+
+def test_ik_marks_targets_out_of_reach():
+    target = np.eye(4)
+    target[:3, 3] = [5000.0, 0.0, 0.0]
+    solutions, valid = batch_kinematics.inverse_kinematics_batch(target[None], robot_model.UR5)
+    assert solutions.shape == (1, 8, 6)
+    assert not valid.any()
+
+
+def test_replace_rebuilds_link_constants():
+    dh = [list(d) for d in robot_model.UR5.dh_parameters]
+    dh[1][2] = -500.0
+    model = robot_model.UR5._replace(dh_parameters = dh)
+    assert model.link_constants[1][0][3] == -500.0
+    assert model.with_dh(dh, name = "calibrated") == model._replace(name = "calibrated")
+    
+    joints = np.zeros((1, 6))
+    from_model = batch_kinematics.forward_kinematics_batch(joints, model)
+    from_table = batch_kinematics.forward_kinematics_batch(joints, model.dh_parameters)
+    assert np.allclose(from_model, from_table)
+    assert not np.allclose(from_model, batch_kinematics.forward_kinematics_batch(joints, robot_model.UR5))
+
+
+def test_model_limits_and_link_matrix():
+    model = robot_model.get_model("UR10e")
+    assert model is robot_model.UR10E
+    assert model.clamp_tool(-5.0, 0.5) == (model.max_accel, 0.5)
+    assert model.clamp_joint(1.0, 10.0) == (1.0, math.radians(120))
+    assert model.within_limits([0.0] * 6) and not model.within_limits([7.0] + [0.0] * 5)
+    # Same matrices as the plain DH table
+    joints = np.random.RandomState(2).uniform(-math.pi, math.pi, 6)
+    expected = batch_kinematics.dh_matrices(joints, model.dh_parameters)[0]
+    assert np.allclose([model.link_matrix(i, q) for i, q in enumerate(joints)], expected)
+
+
+def test_jacobian_matches_finite_differences():
+    joints = np.random.RandomState(5).uniform(-math.pi, math.pi, (4, 6))
+    jacobian = batch_kinematics.jacobian_batch(joints, robot_model.UR5)
+    tip = batch_kinematics.forward_kinematics_batch(joints, robot_model.UR5)[:, -1]
+    h = 1e-6
+    for j in range(6):
+        moved = joints.copy()
+        moved[:, j] += h
+        tip_moved = batch_kinematics.forward_kinematics_batch(moved, robot_model.UR5)[:, -1]
+        linear = (tip_moved[:, :3, 3] - tip[:, :3, 3]) / h / 1000.0
+        # Skew part of dR * R^T is the angular velocity
+        w = np.matmul(tip_moved[:, :3, :3] - tip[:, :3, :3], np.swapaxes(tip[:, :3, :3], 1, 2)) / h
+        angular = np.stack((w[:, 2, 1], w[:, 0, 2], w[:, 1, 0]), axis = 1)
+        assert np.allclose(jacobian[:, :3, j], linear, atol = 1e-5)
+        assert np.allclose(jacobian[:, 3:, j], angular, atol = 1e-5)
+
+
+def test_manipulability_vanishes_at_wrist_singularity():
+    joints = np.array([[0.3, -1.2, 1.4, -1.8, -1.4, 0.2], [0.3, -1.2, 1.4, -1.8, 0.0, 0.2]])
+    w = batch_kinematics.manipulability(batch_kinematics.jacobian_batch(joints, robot_model.UR5))
+    assert w[0] > 1e-3
+    assert w[1] == pytest.approx(0.0, abs = 1e-9)
@@ -0,0 +1,35 @@
+"""
+Regression tests for pose table emission
+"""
+
+import re
+
+import numpy as np
+
+from yoUR import motion_table
+from yoUR import rotations
+
+
+def test_every_list_length_has_its_own_variable():
+    script = motion_table.move_l_table(np.zeros((1250, 6)), 1.0, 0.1, chunk_size = 500)
+    lengths = {}
+    for name, values in re.findall(r"^(your_poses_\w+) = (\[.*\])$", script, re.M):
+        lengths.setdefault(name, set()).add(values.count("p["))
+    assert lengths == {"your_poses_500": set([500]), "your_poses_250": set([250])}
+    assert script.count("your_movel_poses(your_poses_500, 500,") == 2
+    assert script.count("your_movel_poses(your_poses_250, 250,") == 1
+
+
+def test_tables_hold_the_poses_and_limits():
+    rng = np.random.RandomState(9)
+    poses = np.hstack((rng.uniform(-0.5, 0.5, (7, 3)), rng.uniform(-1.0, 1.0, (7, 3))))
+    frames = rotations.poses_to_frames(poses)
+    vel = np.linspace(0.1, 0.7, 7)
+    script = motion_table.move_l_table(frames, 5.0, vel, 0.001, chunk_size = 4, define = False)
+    lines = script.splitlines()
+    assert not script.startswith("def ")
+    listed = [[float(v) for v in p.split(",")] for p in re.findall(r"p\[([^\]]*)\]", script)]
+    assert np.allclose(listed, poses, atol = 1e-4)
+    # Per waypoint speeds need the table call, accel is clamped to the default limit
+    assert lines[1] == "your_movel_table(your_poses_4, 4, [1.5,1.5,1.5,1.5], [0.1,0.2,0.3,0.4], [0.001,0.001,0.001,0.001])"
+    assert lines[3].startswith("your_movel_table(your_poses_3, 3,")
@@ -0,0 +1,71 @@
+"""
+Regression tests for path-level branch selection and singularity screening
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from yoUR import batch_kinematics
+from yoUR import path_planning
+from yoUR import robot_model
+
+
+def _joint_path(n = 50):
+    # A smooth sweep away from singular configurations
+    t = np.linspace(0.0, 1.0, n)[:, None]
+    return np.array([0.3, -1.2, 1.4, -1.8, -1.4, 0.2]) + t * np.array([1.2, 0.3, -0.4, 0.5, 0.6, 2.0])
+
+
+def test_plan_joint_path_follows_the_source_path():
+    joints = _joint_path()
+    targets = batch_kinematics.forward_kinematics_batch(joints, robot_model.UR5)[:, -1]
+    planned, branches, reconfigurations = path_planning.plan_joint_path(targets, robot_model.UR5, start = joints[0])
+
+    assert planned.shape == joints.shape
+    assert len(reconfigurations) == 0
+    # One branch along the whole path, reaching every target
+    assert len(set(branches.tolist())) == 1
+    reached = batch_kinematics.forward_kinematics_batch(planned, robot_model.UR5)[:, -1]
+    assert np.allclose(reached, targets, atol = 1e-6)
+    assert np.allclose(planned, joints, atol = 1e-6)
+
+
+def test_select_branches_unwraps_and_flags_jumps():
+    solutions = np.zeros((3, 2, 6))
+    valid = np.ones((3, 2), dtype = bool)
+    # Branch 0 crosses +-pi, branch 1 jumps by half a turn
+    solutions[:, 0, 0] = [3.1, -3.1, -3.0]
+    solutions[:, 1, 0] = [3.1, 0.0, 0.0]
+    joints, branches, reconfigurations = path_planning.select_branches(solutions, valid)
+    assert list(branches) == [0, 0, 0]
+    assert np.allclose(joints[:, 0], [3.1, 2 * math.pi - 3.1, 2 * math.pi - 3.0])
+    assert len(reconfigurations) == 0
+
+    valid[1, 0] = False
+    joints, branches, reconfigurations = path_planning.select_branches(solutions, valid)
+    assert branches[1] == 1 and list(reconfigurations) == [1]
+
+
+def test_select_branches_rejects_unreachable_waypoints():
+    valid = np.ones((3, 8), dtype = bool)
+    valid[1] = False
+    with pytest.raises(ValueError):
+        path_planning.select_branches(np.zeros((3, 8, 6)), valid)
+
+
+def test_screen_path_marks_singular_and_fast_segments():
+    joints = _joint_path(20)
+    # Wrist 2 passes through 0 in the middle of the path
+    joints[:, 4] = np.linspace(-1.0, 1.0, 20)
+    joints[10, 4] = 0.0
+    w, joint_speed, bad = path_planning.screen_path(joints, robot_model.UR5, 0.1)
+    assert w[10] < 1e-6 and (np.delete(w, 10) > 1e-3).all()
+    assert {9, 10} <= set(bad.tolist())
+    assert joint_speed.shape == (19, 6)
+
+    # The same path far from the singularity passes at a low speed, but not at a high one
+    joints[:, 4] = -1.4
+    assert len(path_planning.screen_path(joints, robot_model.UR5, 0.01)[2]) == 0
+    assert len(path_planning.screen_path(joints, robot_model.UR5, 10.0)[2]) == 19
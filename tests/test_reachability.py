@@ -0,0 +1,47 @@
+"""
+Regression tests for the workspace reachability index
+"""
+
+import numpy as np
+import pytest
+
+from yoUR import batch_kinematics
+from yoUR import reachability
+from yoUR import robot_model
+
+
+@pytest.fixture(scope = "module")
+def index():
+    return reachability.ReachabilityIndex.build(robot_model.UR5, voxel_size = 300.0)
+
+
+def test_reached_poses_score_and_far_poses_do_not(index):
+    joints = np.random.RandomState(3).uniform(-np.pi, np.pi, (200, 6))
+    frames = batch_kinematics.forward_kinematics_batch(joints, robot_model.UR5)[:, -1]
+    score, branch = index.query(frames)
+    # Cells the robot reached were reachable for at least some orientations
+    assert (score > 0).mean() > 0.9
+    assert (branch[score > 0] >= 0).all()
+
+    far = np.tile(np.eye(4), (2, 1, 1))
+    far[:, :3, 3] = [[5000.0, 0.0, 0.0], [0.0, 0.0, -5000.0]]
+    score, branch = index.query(far)
+    assert list(score) == [0.0, 0.0] and list(branch) == [-1, -1]
+    assert not index.is_reachable(far).any()
+
+
+def test_save_and_load_keep_the_index(index, tmp_path):
+    path = str(tmp_path / "ur5.npz")
+    index.save(path)
+    loaded = reachability.ReachabilityIndex.load(path)
+    assert np.array_equal(loaded.score, index.score)
+    assert np.array_equal(loaded.branch, index.branch)
+    assert loaded.model_name == index.model_name == "UR5"
+
+    # A moved base moves the query with it
+    base = np.eye(4)
+    base[:3, 3] = [1000.0, 0.0, 0.0]
+    joints = np.random.RandomState(4).uniform(-np.pi, np.pi, (50, 6))
+    frames = batch_kinematics.forward_kinematics_batch(joints, robot_model.UR5)[:, -1]
+    moved = batch_kinematics.forward_kinematics_batch(joints, robot_model.UR5, base)[:, -1]
+    assert np.array_equal(loaded.query(moved, base)[0], index.query(frames)[0])
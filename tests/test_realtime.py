@@ -0,0 +1,145 @@
+"""
+Regression tests for real time frame decoding, the real time client and the local simulator
+"""
+
+import socket
+import struct
+import time
+import timeit
+
+import numpy as np
+import pytest
+
+from yoUR import comm
+from yoUR import realtime
+from yoUR import simulator
+
+
+def _frame(layout, offset = 0.0):
+    count = sum(c for _, c in layout.fields[1:])
+    return layout.struct.pack(*([layout.size] + [i + offset for i in range(1, count + 1)]))
+
+
+def _wait(condition, timeout = 5.0):
+    deadline = timeit.default_timer() + timeout
+    while not condition():
+        if timeit.default_timer() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.mark.parametrize("layout", realtime.LAYOUTS, ids = [l.version for l in realtime.LAYOUTS])
+def test_get_messages_follows_layout(layout):
+    frame = _frame(layout)
+    decoded = realtime.decode(frame)
+    chunks = {}
+    comm.get_messages(frame, chunks)
+    assert list(chunks["pose"]) == list(decoded["tool_vector"])
+    assert list(chunks["forces"]) == list(decoded["tcp_force"])
+    assert chunks["time"][0] == decoded["controller_timer"]
+
+
+@pytest.mark.parametrize("layout", realtime.LAYOUTS, ids = [l.version for l in realtime.LAYOUTS])
+def test_decoders_agree(layout):
+    frames = [_frame(layout, offset) for offset in (0.0, 0.5, 1.0)]
+    assert realtime.get_layout(layout.size) is layout
+    assert realtime.get_layout(version = layout.version + ".3") is layout
+    decoded = realtime.decode_many(b"".join(frames))
+    assert len(decoded) == 3
+    for i, (frame, unpacked) in enumerate(zip(frames, realtime.iter_frames(b"".join(frames)))):
+        assert unpacked == realtime.decode(frame)
+        for name, count in layout.fields:
+            value = layout.field(frame, name)
+            assert value == unpacked[name]
+            assert list(np.atleast_1d(decoded[name][i])) == list(np.atleast_1d(value))
+
+
+def test_larger_frames_use_the_newest_layout():
+    layout = realtime.LAYOUTS[-1]
+    frame = _frame(layout)
+    # A newer controller with 16 more bytes
+    longer = struct.pack("!i", layout.size + 16) + frame[4:] + b"\0" * 16
+    assert realtime.decode(longer)["q_actual"] == realtime.decode(frame)["q_actual"]
+    assert list(realtime.decode_many(longer + longer)["q_actual"][1]) == list(realtime.decode(frame)["q_actual"])
+    with pytest.raises(ValueError):
+        realtime.get_layout(7)
+    with pytest.raises(ValueError):
+        realtime.decode(struct.pack("!i", 1000) + frame[4:], version = "5.0")
+
+
+@pytest.fixture
+def sim():
+    with simulator.Simulator("127.0.0.1", 0, 0, version = "5.0") as s:
+        yield s
+
+
+def test_client_reads_simulator_frames(sim):
+    with comm.RealtimeClient("127.0.0.1", sim.realtime_port) as client:
+        frame, received = client.wait_frame(timeout = 5.0)
+        assert frame is not None
+        assert realtime.get_layout(len(frame)).version == "5.0"
+        assert client.get_messages()["actual_joints"][1] == pytest.approx(-90.0)
+
+
+def test_client_survives_callback_errors(sim):
+    calls = []
+    
+    def callback(frame, received):
+        calls.append(received)
+        if len(calls) == 2:
+            raise RuntimeError("callback failed")
+    
+    with comm.RealtimeClient("127.0.0.1", sim.realtime_port) as client:
+        client.subscribe(callback)
+        assert _wait(lambda: len(calls) > 10)
+        assert client.callback_errors == 1
+        assert isinstance(client.error, RuntimeError)
+
+
+def test_client_reconnects_after_drops(sim):
+    sim.drop_every = 5
+    sim.fragment = True
+    with comm.RealtimeClient("127.0.0.1", sim.realtime_port, retry = 0.01) as client:
+        assert _wait(lambda: client.frames > 20)
+        assert client.connects > 1
+
+
+def test_client_drops_truncated_frames(sim):
+    sim.truncate_probability = 0.2
+    sizes = []
+    with comm.RealtimeClient("127.0.0.1", sim.realtime_port, retry = 0.01) as client:
+        client.subscribe(lambda frame, received: sizes.append(len(frame)))
+        assert _wait(lambda: client.connects > 2 and len(sizes) > 20)
+    assert set(sizes) == set([sim.layout.size])
+
+
+def test_simulator_moves_without_clients(sim):
+    program = comm.concatenate_script(["movej([0.2,-1.5708,0,-1.5708,0,0], a = 10.0, v = 3.0)\n"])
+    sender = comm.ScriptSender("127.0.0.1", sim.script_port)
+    try:
+        sender.send(program)
+    finally:
+        sender.close()
+    assert _wait(lambda: sim.programs)
+    assert _wait(lambda: not sim.is_running())
+    assert sim.state()[0][0] == pytest.approx(0.2)
+    assert sim.joints[0] == pytest.approx(0.2)
+
+
+def test_simulator_closes_after_drop_every(sim):
+    sim.drop_every = 3
+    sim.fragment = True
+    client = socket.create_connection(("127.0.0.1", sim.realtime_port), 5.0)
+    data = b""
+    try:
+        while True:
+            chunk = client.recv(1 << 16)
+            if not chunk:
+                break
+            data += chunk
+    finally:
+        client.close()
+    assert len(data) == 3 * sim.layout.size
+    assert [f["message_size"] for f in realtime.iter_frames(data)] == [sim.layout.size] * 3
+    assert _wait(lambda: sim.clients() == 0)
@@ -0,0 +1,94 @@
+"""
+Regression tests for the telemetry recorder around chunk boundaries
+"""
+
+import mmap
+import os
+import struct
+import timeit
+
+import pytest
+
+from yoUR import realtime
+from yoUR import recording
+
+
+def _frame(layout, value = 0.5):
+    count = sum(c for _, c in layout.fields[1:])
+    return layout.struct.pack(*([layout.size] + [value] * count))
+
+
+def test_chunk_boundaries_keep_every_frame(tmp_path):
+    path = str(tmp_path / "log")
+    frame = _frame(realtime.get_layout(1060))
+    # A chunk size that leaves 4 or 8 bytes after the last record of 1068 bytes, too little for a padding marker
+    granularity = mmap.ALLOCATIONGRANULARITY
+    chunk_size = [k * granularity for k in range(1, 2000) if k * granularity % 1068 in (4, 8)][0]
+    with recording.Recorder(path, chunk_size = chunk_size) as recorder:
+        count = 3 * chunk_size // 1068 + 7
+        for i in range(count):
+            recorder.write(frame, 1.8e9 + i * 0.008)
+    with recording.Recording(path) as log:
+        received = [t for t, _ in log.records()]
+    assert len(received) == count
+    assert received == sorted(received)
+
+
+@pytest.mark.parametrize("size", [13, 14, 15, 16, 17, 1060, 1108])
+def test_frames_of_any_size(tmp_path, size):
+    path = str(tmp_path / "log")
+    frame = struct.pack("!i", size) + b"x" * (size - 4)
+    with recording.Recorder(path, chunk_size = 1) as recorder:
+        count = 3 * recorder.chunk_size // size
+        for i in range(count):
+            recorder.write(frame, float(i))
+    with recording.Recording(path) as log:
+        frames = [(t, bytes(f)) for t, f in log.records()]
+    assert [t for t, _ in frames] == [float(i) for i in range(count)]
+    assert all(f == frame for _, f in frames)
+
+
+def test_seek_and_missing_index(tmp_path):
+    path = str(tmp_path / "log")
+    frame = _frame(realtime.get_layout(1060))
+    with recording.Recorder(path, chunk_size = 1, index_interval = 0.5) as recorder:
+        for i in range(1000):
+            recorder.write(frame, i * 0.01)
+    with recording.Recording(path) as log:
+        assert [t for t, _ in log.records(5.0, 5.05)] == [i * 0.01 for i in range(500, 505)]
+    os.remove(path + ".idx")
+    with recording.Recording(path) as log:
+        assert sum(1 for _ in log.replay()) == 1000
+
+
+def test_close_with_abandoned_generators(tmp_path):
+    path = str(tmp_path / "log")
+    frame = _frame(realtime.get_layout(1060))
+    with recording.Recorder(path) as recorder:
+        for i in range(10):
+            recorder.write(frame, float(i))
+    log = recording.Recording(path)
+    for _ in log.records():
+        break
+    for _ in log.replay(decode = False):
+        break
+    pending = log.records()
+    next(pending)
+    log.close()
+
+
+def test_replay_decodes_and_paces(tmp_path):
+    path = str(tmp_path / "log")
+    layout = realtime.get_layout(version = "5.0")
+    with recording.Recorder(path) as recorder:
+        for i in range(20):
+            recorder.write(_frame(layout, float(i)), i * 0.01)
+    with recording.Recording(path) as log:
+        decoded = list(log.replay())
+        assert [frame["time"] for _, frame in decoded] == [float(i) for i in range(20)]
+        start = timeit.default_timer()
+        assert len(list(log.replay(speed = 1.0))) == 20
+        assert timeit.default_timer() - start >= 0.19
+        frames = []
+        assert log.play(lambda frame, received: frames.append(bytes(frame)), start_time = 0.1) == 10
+        assert frames[0] == _frame(layout, 10.0)
@@ -0,0 +1,77 @@
+"""
+Regression tests for the rotation conversion kernels, including the 0 and 180 degree cases
+"""
+
+import numpy as np
+
+from yoUR import rotations
+
+
+def _rotvecs():
+    axes = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 0], [1, -1, 1], [0.2, -0.3, 0.9]], dtype = float)
+    axes /= np.linalg.norm(axes, axis = 1)[:, None]
+    angles = np.array([0.0, 1e-9, 1e-4, 0.5, np.pi / 2, np.pi - 1e-6, np.pi])
+    special = (axes[:, None] * angles[None, :, None]).reshape(-1, 3)
+    rng = np.random.RandomState(7)
+    random_axes = rng.normal(size = (200, 3))
+    random_axes /= np.linalg.norm(random_axes, axis = 1)[:, None]
+    return np.vstack((special, random_axes * rng.uniform(0, np.pi, (200, 1))))
+
+
+def _rodrigues(rotvec):
+    angle = np.linalg.norm(rotvec)
+    if angle == 0:
+        return np.eye(3)
+    k = rotvec / angle
+    kx = np.array([[0, -k[2], k[1]], [k[2], 0, -k[0]], [-k[1], k[0], 0]])
+    return np.eye(3) + np.sin(angle) * kx + (1 - np.cos(angle)) * kx.dot(kx)
+
+
+def test_axis_angle_round_trip():
+    rotvecs = _rotvecs()
+    matrices = rotations.axis_angle_to_matrix(rotvecs)
+    assert np.allclose(matrices, [_rodrigues(v) for v in rotvecs], atol = 1e-12)
+    back = rotations.matrix_to_axis_angle(matrices)
+    assert np.allclose(rotations.axis_angle_to_matrix(back), matrices, atol = 1e-9)
+    angles = np.linalg.norm(rotvecs, axis = 1)
+    below = angles < np.pi - 1e-3
+    assert np.allclose(back[below], rotvecs[below], atol = 1e-9)
+    # At 180 degrees both signs of the axis are the same rotation
+    half_turn = angles == np.pi
+    assert np.allclose(np.linalg.norm(back[half_turn], axis = 1), np.pi)
+    assert np.allclose(np.abs(back[half_turn]), np.abs(rotvecs[half_turn]), atol = 1e-9)
+    assert not np.isnan(back).any()
+
+
+def test_quaternions_are_unit_and_canonical():
+    matrices = rotations.axis_angle_to_matrix(_rotvecs())
+    q = rotations.matrix_to_quaternion(matrices)
+    assert np.allclose(np.linalg.norm(q, axis = 1), 1.0)
+    assert (q[:, 0] >= 0).all()
+    assert np.allclose(rotations.quaternion_to_matrix(q), matrices, atol = 1e-12)
+    assert np.allclose(rotations.quaternion_to_matrix(2.0 * q), matrices, atol = 1e-12)
+    assert np.allclose(rotations.quaternion_to_axis_angle(rotations.axis_angle_to_quaternion(_rotvecs()[:-200])),
+        rotations.matrix_to_axis_angle(matrices[:-200]), atol = 1e-9)
+
+
+def test_euler_round_trip():
+    rng = np.random.RandomState(8)
+    euler = rng.uniform(-np.pi, np.pi, (200, 3))
+    euler[:, 1] /= 2.0
+    euler[:3] = [[0, 0, 0], [np.pi, 0, 0], [0, 0, np.pi]]
+    matrices = rotations.euler_to_matrix(euler)
+    # R = Rz * Ry * Rx
+    rx, ry, rz = [rotations.axis_angle_to_matrix(np.eye(3)[i] * euler[:, i:i + 1]) for i in range(3)]
+    assert np.allclose(matrices, np.matmul(rz, np.matmul(ry, rx)), atol = 1e-12)
+    assert np.allclose(rotations.euler_to_matrix(rotations.matrix_to_euler(matrices)), matrices, atol = 1e-9)
+
+
+def test_frames_and_poses():
+    rotvecs = _rotvecs()
+    frames = np.tile(np.eye(4), (len(rotvecs), 1, 1))
+    frames[:, :3, :3] = rotations.axis_angle_to_matrix(rotvecs)
+    frames[:, :3, 3] = np.arange(3 * len(rotvecs)).reshape(-1, 3)
+    poses = rotations.frames_to_poses(frames)
+    # Positions in m, rotations as UR rotation vectors
+    assert np.allclose(poses[:, :3] * 1000.0, frames[:, :3, 3])
+    assert np.allclose(rotations.poses_to_frames(poses), frames, atol = 1e-9)
@@ -0,0 +1,68 @@
+"""
+Regression tests for position and orientation aware waypoint decimation
+"""
+
+import numpy as np
+
+from yoUR import geometry as rg
+from yoUR import rotations
+from yoUR import simplify
+
+
+def _frames(positions, rotvecs):
+    frames = np.tile(np.eye(4), (len(positions), 1, 1))
+    frames[:, :3, :3] = rotations.axis_angle_to_matrix(rotvecs)
+    frames[:, :3, 3] = positions
+    return frames
+
+
+def _helix(n = 400):
+    t = np.linspace(0, 4 * np.pi, n)
+    positions = np.stack((200 * np.cos(t), 200 * np.sin(t), 20 * t), axis = 1)
+    rotvecs = np.stack((0.3 * np.sin(t), 0.3 * np.cos(t), t / 4), axis = 1)
+    return _frames(positions, rotvecs)
+
+
+def _check_within(frames, keep, position_tolerance, angle_tolerance):
+    positions, quaternions = frames[:, :3, 3], rotations.matrix_to_quaternion(frames)
+    dropped = np.setdiff1d(np.arange(len(frames)), keep)
+    segment = np.searchsorted(keep, dropped) - 1
+    distance, angle = simplify.deviations_between(positions, quaternions, dropped, keep[segment], keep[segment + 1])
+    assert (distance <= position_tolerance + 1e-9).all()
+    assert (angle <= angle_tolerance + 1e-9).all()
+
+
+def test_straight_line_keeps_its_ends():
+    positions = np.linspace([0, 0, 0], [500, 100, 0], 100)
+    frames = _frames(positions, np.tile([0, np.pi, 0], (100, 1)))
+    assert list(simplify.simplify_indices(frames)) == [0, 99]
+    assert len(simplify.simplify(frames)) == 2
+
+
+def test_helix_stays_within_tolerances():
+    frames = _helix()
+    coarse = simplify.simplify_indices(frames, 1.0, 2.0)
+    fine = simplify.simplify_indices(frames, 0.2, 0.5)
+    assert coarse[0] == 0 and coarse[-1] == len(frames) - 1
+    assert 2 < len(coarse) < len(fine) < len(frames)
+    _check_within(frames, coarse, 1.0, 2.0)
+    _check_within(frames, fine, 0.2, 0.5)
+
+
+def test_orientation_changes_are_kept():
+    # The tool turns away and back at a fixed position
+    angles = np.r_[np.linspace(0, 1, 20), np.linspace(1, 0, 20)[1:]]
+    frames = _frames(np.zeros((39, 3)), np.outer(angles, [0, 0, 1]))
+    keep = simplify.simplify_indices(frames)
+    assert list(keep) == [0, 19, 38]
+    # Positions alone would drop everything in between
+    assert list(simplify.simplify_indices(frames, 0.1, 360.0)) == [0, 38]
+
+
+def test_planes_and_poses():
+    planes = [rg.Plane(rg.Point3d(x, 0, 0), rg.Vector3d(1, 0, 0), rg.Vector3d(0, 1, 0)) for x in range(10)]
+    simplified = simplify.simplify(planes)
+    assert isinstance(simplified, list) and simplified == [planes[0], planes[-1]]
+    # UR poses in m are read as frames in mm
+    poses = rotations.frames_to_poses(_helix())
+    _check_within(_helix(), simplify.simplify_indices(poses, 1.0, 2.0), 1.0, 2.0)
@@ -0,0 +1,115 @@
+"""
+Regression tests for motion streaming flow control, with the simulator taking the resident program
+"""
+
+import socket
+import struct
+import threading
+import time
+
+import pytest
+
+from yoUR import comm
+from yoUR import simulator
+from yoUR import streaming
+
+
+def _free_port():
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.bind(("127.0.0.1", 0))
+    port = s.getsockname()[1]
+    s.close()
+    return port
+
+
+class _Robot(object):
+    """ Resident program stand-in. Connects back once the simulator has the program, acknowledges on request """
+
+    def __init__(self, sim, port):
+        self.socket = None
+        self.data = b""
+        self._thread = threading.Thread(target = self._connect, args = (sim, port))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _connect(self, sim, port):
+        while not sim.programs:
+            time.sleep(0.01)
+        self.socket = socket.create_connection(("127.0.0.1", port), 5.0)
+
+    def messages(self, count):
+        while self.data.count(b"\n") < count:
+            self.data += self.socket.recv(4096)
+        lines = self.data.split(b"\n")
+        self.data = b"\n".join(lines[count:])
+        return [[float(v) for v in l.decode("utf-8").strip("()").split(",")] for l in lines[:count]]
+
+    def acknowledge(self, *sequences):
+        self.socket.sendall(struct.pack("!%di" % len(sequences), *sequences))
+
+
+@pytest.fixture
+def streamer(monkeypatch):
+    with simulator.Simulator("127.0.0.1", 0, 0, interpolate = False) as sim:
+        sender = comm.ScriptSender("127.0.0.1", sim.script_port)
+        monkeypatch.setattr(comm, "get_sender", lambda robot_ip: sender)
+        port = _free_port()
+        robot = _Robot(sim, port)
+        motion = streaming.MotionStreamer("10.0.0.1", "127.0.0.1", port, window = 2)
+        motion.start(timeout = 5.0)
+        yield motion, robot, sim
+        if motion._connection is not None:
+            motion._connection.close()
+        robot.socket.close()
+        sender.close()
+
+
+def test_resident_program_is_uploaded(streamer):
+    motion, robot, sim = streamer
+    assert len(sim.programs) == 1
+    assert 'socket_open("127.0.0.1",%d)' % motion.port in sim.programs[0]
+    assert "socket_read_ascii_float(%d)" % streaming.MESSAGE_LENGTH in sim.programs[0]
+
+
+def test_window_limits_unacknowledged_commands(streamer):
+    motion, robot, sim = streamer
+    joints = [0.1, -1.5, 1.2, -1.0, -1.5, 0.0]
+    assert motion.move_j(joints, 1.0, 0.5) == 1
+    assert motion.move_l([0.4, 0.1, 0.3, 0.0, 3.14, 0.0], 1.0, 0.1, 0.001) == 2
+    # The window is full until the robot acknowledges
+    with pytest.raises(Exception):
+        motion.sleep(0.5, timeout = 0.2)
+    assert motion.stats()["in_flight"] == 2
+
+    messages = robot.messages(2)
+    assert [len(m) for m in messages] == [streaming.MESSAGE_LENGTH] * 2
+    assert messages[0][:8] == [streaming.MOVE_J, 1] + joints
+    assert messages[1][:2] == [streaming.MOVE_L, 2] and messages[1][-3:] == [1.0, 0.1, 0.001]
+
+    robot.acknowledge(1)
+    assert motion.sleep(0.5, timeout = 2.0) == 3
+    assert not motion.wait(3, timeout = 0.1)
+    robot.acknowledge(2, 3)
+    assert motion.wait(timeout = 2.0)
+    stats = motion.stats()
+    assert (stats["sent"], stats["acknowledged"], stats["in_flight"]) == (3, 3, 0)
+    assert stats["max_latency"] >= stats["mean_latency"] > 0.0
+
+    # stop waits for the robot to finish the stop message
+    timer = threading.Timer(0.1, robot.acknowledge, (4,))
+    timer.start()
+    motion.stop(timeout = 2.0)
+    timer.join()
+    assert robot.messages(2)[1][:2] == [streaming.STOP, 4]
+    assert motion._connection is None
+
+
+def test_closed_connection_raises(streamer):
+    motion, robot, sim = streamer
+    motion.set_digital_out(2, True)
+    assert robot.messages(1)[0][:5] == [streaming.DIGITAL_OUT, 1, 2, 1, 0]
+    robot.socket.close()
+    with pytest.raises(Exception):
+        motion.wait(timeout = 2.0)
+    with pytest.raises(Exception):
+        motion.set_digital_out(2, False, timeout = 2.0)
@@ -0,0 +1,54 @@
+"""
+Regression tests for the telemetry ring buffer around wraparound
+"""
+
+import numpy as np
+
+from yoUR import realtime
+from yoUR import telemetry
+
+
+def _frames(layout, times):
+    count = sum(c for _, c in layout.fields[1:])
+    # time is the first field
+    return [layout.struct.pack(*([layout.size, t] + [0.5] * (count - 1))) for t in times]
+
+
+def test_append_keeps_the_newest_frames_in_order():
+    buffer = telemetry.TelemetryBuffer(seconds = 1, rate = 10)
+    frames = _frames(buffer.layout, [i * 0.1 for i in range(25)])
+    for i, frame in enumerate(frames):
+        buffer.append(frame, received = 100.0 + i)
+        assert len(buffer) == min(i + 1, 10)
+        assert np.allclose(buffer.latest(3)["time"], [j * 0.1 for j in range(max(0, i - 2), i + 1)])
+    assert np.allclose(buffer.latest(100)["time"], [i * 0.1 for i in range(15, 25)])
+    # Views are contiguous slices of the buffer, copies are not
+    assert np.shares_memory(buffer.latest(10), buffer.data)
+    assert not np.shares_memory(buffer.latest(10, copy = True), buffer.data)
+    buffer.clear()
+    assert len(buffer) == 0 and len(buffer.latest(5)) == 0
+
+
+def test_window_across_the_wrap():
+    buffer = telemetry.TelemetryBuffer(seconds = 1, rate = 10)
+    for i, frame in enumerate(_frames(buffer.layout, [i * 0.1 for i in range(17)])):
+        buffer.append(frame, received = 100.0 + i)
+    # Kept: 0.7 .. 1.6, stored across the end of the ring
+    assert np.allclose(buffer.window()["time"], [i * 0.1 for i in range(7, 17)])
+    assert np.allclose(buffer.window(0.95, 1.25)["time"], [1.0, 1.1, 1.2])
+    assert np.allclose(buffer.received_times(0.95, 1.25), [110.0, 111.0, 112.0])
+    assert len(buffer.window(2.0)) == 0 and len(buffer.window(None, 0.5)) == 0
+    assert len(buffer.window(1.2, 1.0)) == 0
+
+
+def test_extend_matches_append():
+    appended = telemetry.TelemetryBuffer(seconds = 1, rate = 10, version = "5.0")
+    extended = telemetry.TelemetryBuffer(seconds = 1, rate = 10, version = "5.0")
+    frames = _frames(appended.layout, [i * 0.1 for i in range(23)])
+    for i, frame in enumerate(frames):
+        appended.append(frame, received = float(i))
+    extended.extend(realtime.decode_many(b"".join(frames[:4])), np.arange(4.0))
+    extended.extend(realtime.decode_many(b"".join(frames[4:])), np.arange(4.0, 23.0))
+    assert len(appended) == len(extended) == 10
+    assert np.array_equal(appended.latest(10), extended.latest(10))
+    assert np.array_equal(appended.received_times(), extended.received_times())
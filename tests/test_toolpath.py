@@ -0,0 +1,60 @@
+"""
+Regression tests for curve sampling, arc fitting and movec emission
+"""
+
+import math
+
+import pytest
+
+from yoUR import toolpath
+
+
+def _arc(radius = 100.0, angle = 2 * math.pi / 3):
+    return lambda s: (radius * math.cos(s * angle), radius * math.sin(s * angle), 0.0)
+
+
+def test_circle_through_known_points():
+    center, radius, normal = toolpath.circle_through((1, 0, 5), (0, 1, 5), (-1, 0, 5))
+    assert center == pytest.approx((0, 0, 5)) and radius == pytest.approx(1.0)
+    assert normal == pytest.approx((0, 0, 1))
+    # Clockwise order flips the normal
+    assert toolpath.circle_through((-1, 0, 5), (0, 1, 5), (1, 0, 5))[2] == pytest.approx((0, 0, -1))
+    assert toolpath.circle_through((0, 0, 0), (1, 1, 1), (3, 3, 3)) is None
+    assert toolpath.circle_through((0, 0, 0), (0, 0, 0), (1, 0, 0)) is None
+
+
+@pytest.mark.parametrize("tolerance", [1.0, 0.1, 0.01])
+def test_sample_curve_stays_within_chord_tolerance(tolerance):
+    points = toolpath.sample_curve(_arc(), tolerance)
+    assert points[0] == pytest.approx((100, 0, 0)) and points[-1] == pytest.approx(_arc()(1.0))
+    for a, b in zip(points[:-1], points[1:]):
+        # Sagitta of the arc between two samples
+        half_chord = math.hypot(b[0] - a[0], b[1] - a[1]) / 2.0
+        assert 100.0 - math.sqrt(100.0 ** 2 - half_chord ** 2) <= tolerance
+
+
+def test_fit_segments_finds_arcs_and_lines():
+    points = toolpath.sample_curve(_arc(), 0.1)
+    end = points[-1]
+    points += [(end[0] - 10 * i, end[1], 0.0) for i in range(1, 10)]
+    segments = toolpath.fit_segments(points)
+    assert [s[0] for s in segments] == ["arc", "line"]
+    arc, line = segments
+    assert arc[2] == pytest.approx(end)
+    assert math.hypot(*arc[1][:2]) == pytest.approx(100.0)
+    assert line[1] == pytest.approx(points[-1])
+    # Too few points on the arc for the minimum, so only lines
+    assert set(s[0] for s in toolpath.fit_segments(points, min_arc_points = len(points))) == set(["line"])
+
+
+def test_curve_script_uses_movec_for_arcs():
+    scripts = toolpath.curve_script(_arc(), 1.0, 0.1, blend = 0.001)
+    assert scripts[0].startswith("movel(p[0.1000,0.0000,0.0000,")
+    assert len(scripts) == 2
+    assert scripts[1].startswith("movec(p[0.0500,0.0866,0.0000,0.0000,0.0000,0.0000], p[-0.0500,0.0866,0.0000,")
+    # The last move stops
+    assert scripts[1].strip().endswith("r = 0.0000)")
+
+    scripts = toolpath.curve_script([(0, 0, 0), (100, 0, 0), (100, 100, 0)], 1.0, 0.1, blend = 0.001)
+    assert [s[:5] for s in scripts] == ["movel"] * 3
+    assert scripts[1].strip().endswith("r = 0.0010)") and scripts[2].strip().endswith("r = 0.0000)")
@@ -0,0 +1,348 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module contains NumPy versions of the kinematics functions that work on
+many joint configurations or poses at once. Frames are returned as 4x4 matrices in mm.
+"""
+
+
+import numpy as np
+
+from . import robot_model
+
+# ----- Conversions -----
+
+def plane_to_matrix(plane):
+    """
+    Function that returns the 4x4 frame matrix of a plane. Works with any object that has
+    Origin, XAxis, YAxis and ZAxis attributes (e.g. Rhino.Geometry Plane)
+
+    Args:
+        plane: Plane. Frame to convert
+
+    Returns:
+        m: (4, 4) array. Columns are x axis, y axis, z axis and origin
+    """
+
+    m = np.eye(4)
+    for i, v in enumerate((plane.XAxis, plane.YAxis, plane.ZAxis, plane.Origin)):
+        m[0, i] = v.X
+        m[1, i] = v.Y
+        m[2, i] = v.Z
+    return m
+
+def as_matrix(frame):
+    """
+    Function that returns a frame as a 4x4 matrix. Accepts None, a plane or an array-like 4x4 matrix (or stack of them)
+
+    Args:
+        frame: None, Plane or array-like. None is taken as the identity
+
+    Returns:
+        m: (..., 4, 4) array
+    """
+
+    if frame is None:
+        return np.eye(4)
+    if hasattr(frame, "XAxis"):
+        return plane_to_matrix(frame)
+    return np.asarray(frame, dtype=float)
+
+def as_matrices(frames):
+    """
+    Function that returns a sequence of frames as a stack of 4x4 matrices
+
+    Args:
+        frames: List of planes, (4, 4) array or (N, 4, 4) array
+
+    Returns:
+        m: (N, 4, 4) array
+    """
+
+    if hasattr(frames, "XAxis"):
+        return plane_to_matrix(frames)[np.newaxis]
+    if len(frames) and hasattr(frames[0], "XAxis"):
+        return np.array([plane_to_matrix(f) for f in frames])
+    m = np.asarray(frames, dtype=float)
+    if m.ndim == 2:
+        m = m[np.newaxis]
+    return m
+
+def invert_frames(m):
+    """
+    Function that inverts rigid 4x4 frame matrices using the transpose of the rotation part
+    
+    Args:
+        m: (..., 4, 4) array of rigid transformations
+    
+    Returns:
+        m_inv: (..., 4, 4) array
+    """
+    
+    r_t = np.swapaxes(m[..., :3, :3], -1, -2)
+    m_inv = np.zeros(m.shape)
+    m_inv[..., :3, :3] = r_t
+    m_inv[..., :3, 3] = -np.matmul(r_t, m[..., :3, 3, None])[..., 0]
+    m_inv[..., 3, 3] = 1.0
+    return m_inv
+
+def _as_joints(joints):
+    """ Internal function that returns joints as a (N, 6) float array """
+
+    joints = np.asarray(joints, dtype=float)
+    if joints.ndim == 1:
+        joints = joints[np.newaxis, :]
+    return joints
+
+# ----- Forward kinematics -----
+
+def dh_matrices(joints, dh_parameters):
+    """
+    Function that creates the Denavit Hartenberg matrices of every link for every joint configuration
+
+    Args:
+        joints: (N, 6) array of joint angles in radians. Added to the theta column of the DH table
+        dh_parameters: RobotModel or tuple of (joint_distance, joint_angle, link_length, link_twist) for each link
+
+    Returns:
+        m: (N, 6, 4, 4) array of Denavit Hartenberg matrices
+    """
+
+    joints = _as_joints(joints)
+    constants = getattr(dh_parameters, "link_constants", None)
+    if constants is None:
+        constants = robot_model.link_constants(dh_parameters)
+    c = np.asarray(constants)
+    theta = joints + np.asarray(robot_model.dh_table(dh_parameters), dtype=float)[:, 1]
+    ct = np.cos(theta)
+    st = np.sin(theta)
+
+    # Each link is Rz(theta) * C with C constant. Fill component by component on
+    # contiguous rows, then move the 4x4 axes last
+    m = np.empty((4, 4) + theta.shape)
+    for k in range(4):
+        m[0, k] = ct * c[:, 0, k] - st * c[:, 1, k]
+        m[1, k] = st * c[:, 0, k] + ct * c[:, 1, k]
+        m[2, k] = c[:, 2, k]
+        m[3, k] = c[:, 3, k]
+    return np.ascontiguousarray(np.moveaxis(m, (0, 1), (-2, -1)))
+
+def forward_kinematics_batch(joints, dh_parameters, base = None):
+    """
+    Function that returns all the frames of a serial kinematic chain for many joint configurations at once.
+    Each frame is the running product of the link matrices, so every link costs one matrix product per configuration.
+
+    Frame i (i > 0) is the frame kinematics.forward_kinematics returns at index i when the joint angles
+    are held in the theta column of the DH table, without the extra joints[0] rotation that function applies to frame 0
+
+    Args:
+        joints: (N, 6) or (6,) array of joint angles in radians
+        dh_parameters: RobotModel or tuple of (joint_distance, joint_angle, link_length, link_twist) for each link. in mm and radians
+        base: Plane or (4, 4) array. frame 0. Defaults to world XY
+
+    Returns:
+        frames: (N, 7, 4, 4) array. frames[:, 0] is the base, frames[:, 6] the tool flange
+    """
+
+    links = dh_matrices(joints, dh_parameters)
+    n, num_links = links.shape[:2]
+    # Link major order keeps every matrix product on contiguous memory
+    links = np.ascontiguousarray(links.swapaxes(0, 1))
+
+    frames = np.empty((num_links + 1, n, 4, 4))
+    frames[0] = as_matrix(base)
+    for i in range(num_links):
+        np.matmul(frames[i], links[i], out = frames[i + 1])
+    return frames.swapaxes(0, 1)
+
+# ----- Differential kinematics -----
+
+def jacobian_batch(joints, dh_parameters, base = None, frames = None):
+    """
+    Function that returns the geometric Jacobian of the tool flange for many joint configurations at once
+
+    Args:
+        joints: (N, 6) or (6,) array of joint angles in radians
+        dh_parameters: RobotModel or tuple of (joint_distance, joint_angle, link_length, link_twist) for each link. in mm and radians
+        base: Plane or (4, 4) array. Robot base. Defaults to world XY
+        frames: (N, 7, 4, 4) array. Result of forward_kinematics_batch, if already computed
+
+    Returns:
+        jacobian: (N, 6, 6) array. Rows 0 - 2 are linear velocity in m/s per rad/s, rows 3 - 5 angular velocity
+    """
+
+    if frames is None:
+        frames = forward_kinematics_batch(joints, dh_parameters, base)
+    # Joint i turns about the z axis of frame i
+    z = frames[:, :-1, :3, 2]
+    o = frames[:, :-1, :3, 3]
+    tip = frames[:, -1:, :3, 3]
+
+    jacobian = np.empty((frames.shape[0], 6, z.shape[1]))
+    jacobian[:, :3] = np.swapaxes(np.cross(z, tip - o), 1, 2) / 1000.0
+    jacobian[:, 3:] = np.swapaxes(z, 1, 2)
+    return jacobian
+
+def manipulability(jacobian):
+    """
+    Function that returns the Yoshikawa manipulability index sqrt(det(J * J^T)) of many Jacobians.
+    It drops to 0 at wrist, shoulder and elbow singularities
+
+    Args:
+        jacobian: (N, 6, 6) array. Result of jacobian_batch
+
+    Returns:
+        w: (N,) array
+    """
+
+    jjt = np.matmul(jacobian, np.swapaxes(jacobian, 1, 2))
+    return np.sqrt(np.clip(np.linalg.det(jjt), 0.0, None))
+
+# ----- Inverse kinematics -----
+
+# Branch index = 4 * shoulder + 2 * wrist + elbow, each flag 0 or 1
+NUM_BRANCHES = 8
+
+def branch_index(shoulder, wrist, elbow):
+    """
+    Function that returns the branch index used by inverse_kinematics_batch
+
+    Args:
+        shoulder: int. 0 or 1. Which of the two base angles that keep the wrist in reach
+        wrist: int. 0 for a positive wrist 2 angle, 1 for a negative one
+        elbow: int. 0 for a positive elbow angle, 1 for a negative one
+
+    Returns:
+        index: int. 0 - 7
+    """
+
+    return 4 * int(shoulder) + 2 * int(wrist) + int(elbow)
+
+def inverse_kinematics_batch(target_poses, dh_parameters, base = None, tool = None):
+    """
+    Function that returns all closed form inverse kinematics solutions of a UR arm for many target poses at once.
+    The DH table is only read, so the function is reentrant. The table must have the UR structure, i.e. link twists
+    of (pi/2, 0, 0, pi/2, -pi/2, 0). Offsets along the parallel shoulder/elbow/wrist 1 axes (d2, d3, d4) are summed.
+
+    Args:
+        target_poses: List of planes or (N, 4, 4) array. Tool frames (flange frames if no tool is given)
+        dh_parameters: RobotModel or tuple of (joint_distance, joint_angle, link_length, link_twist) for each link. in mm and radians
+        base: Plane or (4, 4) array. Robot base. Defaults to world XY
+        tool: (4, 4) array. Tool frame relative to the flange. Defaults to identity
+
+    Returns:
+        joints: (N, 8, 6) array of joint angles in radians, wrapped to -pi..pi. Branch order see branch_index
+        valid: (N, 8) boolean array. False where the branch has no solution (out of reach) or breaks the joint limits of a RobotModel
+    """
+
+    dh = np.asarray(robot_model.dh_table(dh_parameters), dtype=float)
+    a2 = dh[1, 2]
+    a3 = dh[2, 2]
+    d4 = dh[1, 0] + dh[2, 0] + dh[3, 0]
+    d6 = dh[5, 0]
+
+    # Flange poses in robot base coordinates
+    t = np.matmul(invert_frames(as_matrix(base)), as_matrices(target_poses))
+    if tool is not None:
+        t = np.matmul(t, invert_frames(as_matrix(tool)))
+    n = t.shape[0]
+
+    joints = np.zeros((n, 2, 2, 2, 6))
+    valid = np.ones((n, 2, 2, 2), dtype=bool)
+
+    # ----- 1) joint0 (base) from the wrist 2 center
+    p5 = t[:, :3, 3] - d6 * t[:, :3, 2]
+    r = np.hypot(p5[:, 0], p5[:, 1])
+    ratio = d4 / np.maximum(r, 1e-12)
+    valid &= (np.abs(ratio) <= 1.0)[:, None, None, None]
+    phi = np.arccos(np.clip(ratio, -1.0, 1.0))
+    psi = np.arctan2(p5[:, 1], p5[:, 0])
+    q0 = np.stack((psi + phi, psi - phi), axis = 1) + np.pi / 2
+    s0 = np.sin(q0)
+    c0 = np.cos(q0)
+
+    # ----- 2) joint4 (wrist 2)
+    px = t[:, None, 0, 3]
+    py = t[:, None, 1, 3]
+    cos4 = (px * s0 - py * c0 - d4) / d6
+    valid &= (np.abs(cos4) <= 1.0 + 1e-9)[:, :, None, None]
+    q4_pos = np.arccos(np.clip(cos4, -1.0, 1.0))
+    q4 = np.stack((q4_pos, -q4_pos), axis = 2)
+    s4 = np.sin(q4)
+
+    # ----- 3) joint5 (wrist 3). Arbitrary (0) at the wrist singularity
+    xx = t[:, None, None, 0, 0]
+    xy = t[:, None, None, 1, 0]
+    yx = t[:, None, None, 0, 1]
+    yy = t[:, None, None, 1, 1]
+    s0w = s0[:, :, None]
+    c0w = c0[:, :, None]
+    sign = np.where(s4 < 0, -1.0, 1.0)
+    num = -(yx * s0w - yy * c0w) * sign
+    den = (xx * s0w - xy * c0w) * sign
+    singular = np.abs(s4) < 1e-10
+    q5 = np.where(singular, 0.0, np.arctan2(num, den))
+
+    # ----- 4) joints 1 - 3 from the planar shoulder/elbow/wrist 1 chain
+    q_partial = np.zeros((n, 2, 2, 6))
+    q_partial[..., 0] = q0[:, :, None] - dh[0, 1]
+    q_partial[..., 4] = q4 - dh[4, 1]
+    q_partial[..., 5] = q5 - dh[5, 1]
+    m = dh_matrices(q_partial.reshape(-1, 6), dh_parameters)
+    m = m.reshape(n, 2, 2, 6, 4, 4)
+    t01 = m[..., 0, :, :]
+    t46 = np.matmul(m[..., 4, :, :], m[..., 5, :, :])
+    t14 = np.matmul(np.matmul(invert_frames(t01), t[:, None, None]), invert_frames(t46))
+
+    x = t14[..., 0, 3]
+    y = t14[..., 1, 3]
+    cos2 = (x * x + y * y - a2 * a2 - a3 * a3) / (2.0 * a2 * a3)
+    valid &= (np.abs(cos2) <= 1.0 + 1e-9)[..., None]
+    q2_pos = np.arccos(np.clip(cos2, -1.0, 1.0))
+    q2 = np.stack((q2_pos, -q2_pos), axis = 3)
+    q1 = np.arctan2(y, x)[..., None] - np.arctan2(a3 * np.sin(q2), a2 + a3 * np.cos(q2))
+    q3 = np.arctan2(t14[..., 1, 0], t14[..., 0, 0])[..., None] - q1 - q2
+
+    joints[..., 0] = q0[:, :, None, None]
+    joints[..., 1] = q1
+    joints[..., 2] = q2
+    joints[..., 3] = q3
+    joints[..., 4] = q4[..., None]
+    joints[..., 5] = q5[..., None]
+
+    # Remove the DH theta offsets and wrap
+    joints -= dh[:, 1]
+    joints = np.arctan2(np.sin(joints), np.cos(joints))
+    joints = joints.reshape(n, NUM_BRANCHES, 6)
+    valid = valid.reshape(n, NUM_BRANCHES)
+    if hasattr(dh_parameters, "joint_limits"):
+        valid &= within_joint_limits(joints, dh_parameters)
+
+    return joints, valid
+
+# ----- Validation -----
+
+def within_joint_limits(joints, model):
+    """
+    Function that checks many joint configurations against the joint limits of a robot model
+
+    Args:
+        joints: (..., 6) array of joint angles in radians
+        model: RobotModel
+
+    Returns:
+        mask: (...) boolean array. True where all joints are within their limits
+    """
+
+    limits = np.asarray(model.joint_limits)
+    joints = np.asarray(joints, dtype=float)
+    return ((joints >= limits[:, 0]) & (joints <= limits[:, 1])).all(axis = -1)
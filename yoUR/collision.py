@@ -0,0 +1,288 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module contains collision checking with capsule proxies:
+    1) Each link is a capsule between the origins of consecutive DH frames
+    2) Workcell obstacles are boxes, capsules and planes (half spaces)
+    3) Whole trajectories are checked in batch, with axis aligned bounding box culling before exact distances
+All lengths are in mm.
+"""
+
+
+import numpy as np
+
+from . import batch_kinematics
+
+# ----- Distance kernels -----
+
+def _dot(a, b):
+    """ Internal function that returns the row wise dot product of (..., 3) arrays """
+    
+    return (a * b).sum(axis = -1)
+
+def segment_distance(p1, q1, p2, q2):
+    """
+    Function that returns the closest distance between many pairs of line segments.
+    Vectorised version of the closest point of two segments from Ericson, Real-Time Collision Detection 5.1.9
+    
+    Args:
+        p1, q1: (..., 3) arrays. Start and end of the first segments
+        p2, q2: (..., 3) arrays. Start and end of the second segments
+    
+    Returns:
+        distance: (...) array
+    """
+    
+    eps = 1e-12
+    d1 = q1 - p1
+    d2 = q2 - p2
+    r = p1 - p2
+    a = _dot(d1, d1)
+    e = _dot(d2, d2)
+    f = _dot(d2, r)
+    c = _dot(d1, r)
+    b = _dot(d1, d2)
+    
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        denom = a * e - b * b
+        s = np.where(denom > eps, np.clip((b * f - c * e) / denom, 0.0, 1.0), 0.0)
+        t = np.where(e > eps, (b * s + f) / e, 0.0)
+        # Clamp t and recompute s for the clamped value
+        s = np.where(t < 0.0, np.clip(-c / a, 0.0, 1.0), np.where(t > 1.0, np.clip((b - c) / a, 0.0, 1.0), s))
+        t = np.clip(t, 0.0, 1.0)
+        # Degenerate segments (points)
+        s = np.where(a <= eps, 0.0, s)
+        t = np.where(a <= eps, np.where(e > eps, np.clip(f / e, 0.0, 1.0), 0.0), t)
+        s = np.where((a > eps) & (e <= eps), np.clip(-c / a, 0.0, 1.0), s)
+    s = np.nan_to_num(s)
+    t = np.nan_to_num(t)
+    return np.linalg.norm(p1 + d1 * s[..., None] - p2 - d2 * t[..., None], axis = -1)
+
+def _box_signed_distance(points, half_size):
+    """ Internal function that returns the signed distance of points (in box coordinates) to a box """
+    
+    q = np.abs(points) - half_size
+    outside = np.linalg.norm(np.maximum(q, 0.0), axis = -1)
+    inside = np.minimum(q.max(axis = -1), 0.0)
+    return outside + inside
+
+def segment_box_distance(p, q, box_frame, half_size, iterations = 40):
+    """
+    Function that returns the signed distance between many segments and a box.
+    The box distance is convex along a segment, so a golden section search finds the minimum
+    
+    Args:
+        p, q: (..., 3) arrays. Segment start and end points
+        box_frame: (4, 4) array. Box center frame
+        half_size: List of 3 floats. Half the edge lengths of the box
+        iterations: int. Golden section steps. 40 steps give 1e-8 of the segment length
+    
+    Returns:
+        distance: (...) array. Negative inside the box
+    """
+    
+    inv = batch_kinematics.invert_frames(np.asarray(box_frame, dtype=float))
+    p = np.matmul(p, inv[:3, :3].T) + inv[:3, 3]
+    q = np.matmul(q, inv[:3, :3].T) + inv[:3, 3]
+    half_size = np.asarray(half_size, dtype=float)
+    d = q - p
+    
+    ratio = (np.sqrt(5.0) - 1.0) / 2.0
+    lo = np.zeros(p.shape[:-1])
+    hi = np.ones(p.shape[:-1])
+    for _ in range(iterations):
+        t1 = hi - ratio * (hi - lo)
+        t2 = lo + ratio * (hi - lo)
+        f1 = _box_signed_distance(p + d * t1[..., None], half_size)
+        f2 = _box_signed_distance(p + d * t2[..., None], half_size)
+        right = f1 > f2
+        lo = np.where(right, t1, lo)
+        hi = np.where(right, hi, t2)
+    t = (lo + hi) / 2.0
+    
+    # The ends are often the closest points, check them exactly
+    return np.minimum(_box_signed_distance(p + d * t[..., None], half_size),
+        np.minimum(_box_signed_distance(p, half_size), _box_signed_distance(q, half_size)))
+
+# ----- Obstacles -----
+
+class Box(object):
+    """
+    Box obstacle
+    
+    Args:
+        frame: Plane or (4, 4) array. Center frame of the box
+        size: List of 3 floats. Edge lengths along the frame x, y and z axes
+    """
+    
+    def __init__(self, frame, size):
+        self.frame = batch_kinematics.as_matrix(frame)
+        self.half_size = np.asarray(size, dtype=float) / 2.0
+        corners = np.array([[x, y, z] for x in (-1, 1) for y in (-1, 1) for z in (-1, 1)]) * self.half_size
+        corners = np.matmul(corners, self.frame[:3, :3].T) + self.frame[:3, 3]
+        self.aabb = (corners.min(axis = 0), corners.max(axis = 0))
+    
+    def distance(self, p, q):
+        return segment_box_distance(p, q, self.frame, self.half_size)
+
+class Capsule(object):
+    """
+    Capsule obstacle
+    
+    Args:
+        start: List of 3 floats. Start of the axis
+        end: List of 3 floats. End of the axis
+        radius: float
+    """
+    
+    def __init__(self, start, end, radius):
+        self.start = np.asarray(start, dtype=float)
+        self.end = np.asarray(end, dtype=float)
+        self.radius = float(radius)
+        self.aabb = (np.minimum(self.start, self.end) - radius, np.maximum(self.start, self.end) + radius)
+    
+    def distance(self, p, q):
+        return segment_distance(p, q, self.start, self.end) - self.radius
+
+class HalfSpace(object):
+    """
+    Plane obstacle. Everything on the negative side of the plane (against the normal) is occupied, e.g. a table top
+    
+    Args:
+        origin: List of 3 floats. Point on the plane
+        normal: List of 3 floats. Normal pointing to the free side
+    """
+    
+    def __init__(self, origin, normal):
+        self.origin = np.asarray(origin, dtype=float)
+        self.normal = np.asarray(normal, dtype=float) / np.linalg.norm(normal)
+        self.aabb = None
+    
+    def distance(self, p, q):
+        return np.minimum(_dot(p - self.origin, self.normal), _dot(q - self.origin, self.normal))
+
+# ----- Robot -----
+
+class CollisionChecker(object):
+    """
+    Collision checker of a robot with capsule links in a workcell
+    
+    Args:
+        dh_parameters: RobotModel or tuple of (joint_distance, joint_angle, link_length, link_twist) for each link
+        radii: List of floats. Capsule radius of every link (and of the tool, if any). Defaults to 60 mm
+        obstacles: List of Box, Capsule and HalfSpace obstacles
+        base: Plane or (4, 4) array. Robot base. Defaults to world XY
+        tool_length: float. Length of the tool along the flange z axis. 0 for no tool capsule
+        world_links: List of link indices checked against the obstacles. Defaults to all but the base link
+        self_pairs: List of (i, j) link index pairs checked against each other. Defaults to all pairs
+            that are not neighbours in the chain and do not touch in every configuration
+    """
+    
+    def __init__(self, dh_parameters, radii = None, obstacles = (), base = None, tool_length = 0.0, world_links = None, self_pairs = None):
+        self.dh_parameters = dh_parameters
+        self.base = base
+        self.tool_length = float(tool_length)
+        num_links = 6 + (1 if tool_length > 0 else 0)
+        self.radii = np.full(num_links, 60.0) if radii is None else np.asarray(radii, dtype=float)
+        if len(self.radii) != num_links:
+            raise ValueError("Expected %d radii, got %d" % (num_links, len(self.radii)))
+        self.obstacles = list(obstacles)
+        self.world_links = np.arange(1, num_links) if world_links is None else np.asarray(world_links)
+        if self_pairs is None:
+            self_pairs = self._default_self_pairs(num_links)
+        self.self_pairs = np.asarray(self_pairs, dtype = np.intp).reshape(-1, 2)
+    
+    def _default_self_pairs(self, num_links, samples = 1000):
+        """ Internal function that returns all non-neighbour link pairs, except the pairs that touch in every
+        one of a set of random configurations (e.g. the compact wrist links), like an allowed collision matrix """
+        
+        pairs = np.array([(i, j) for i in range(num_links) for j in range(i + 2, num_links)], dtype = np.intp).reshape(-1, 2)
+        joints = np.random.RandomState(0).uniform(-np.pi, np.pi, (samples, 6))
+        starts, ends = self.link_segments(joints)
+        i, j = pairs[:, 0], pairs[:, 1]
+        d = segment_distance(starts[:, i], ends[:, i], starts[:, j], ends[:, j])
+        always = (d < self.radii[i] + self.radii[j]).all(axis = 0)
+        return pairs[~always]
+    
+    def link_segments(self, joints):
+        """
+        Function that returns the capsule axes of all links for many joint configurations
+        
+        Args:
+            joints: (N, 6) array of joint angles in radians
+        
+        Returns:
+            starts: (N, L, 3) array
+            ends: (N, L, 3) array
+        """
+        
+        frames = batch_kinematics.forward_kinematics_batch(joints, self.dh_parameters, self.base)
+        origins = frames[:, :, :3, 3]
+        starts = origins[:, :-1]
+        ends = origins[:, 1:]
+        if self.tool_length > 0:
+            tip = origins[:, -1] + frames[:, -1, :3, 2] * self.tool_length
+            starts = np.concatenate((starts, origins[:, -1:]), axis = 1)
+            ends = np.concatenate((ends, tip[:, None]), axis = 1)
+        return starts, ends
+    
+    def _check_chunk(self, joints):
+        """ Internal function that checks one chunk of configurations """
+        
+        starts, ends = self.link_segments(joints)
+        n = starts.shape[0]
+        
+        # Self collision between the selected link pairs
+        i, j = self.self_pairs[:, 0], self.self_pairs[:, 1]
+        d = segment_distance(starts[:, i], ends[:, i], starts[:, j], ends[:, j])
+        self_hit = (d < self.radii[i] + self.radii[j]).any(axis = 1) if len(i) else np.zeros(n, dtype=bool)
+        
+        # Workcell collision with bounding box culling
+        world_hit = np.zeros(n, dtype=bool)
+        links = self.world_links
+        s = starts[:, links]
+        e = ends[:, links]
+        r = self.radii[links]
+        lo = np.minimum(s, e) - r[:, None]
+        hi = np.maximum(s, e) + r[:, None]
+        for obstacle in self.obstacles:
+            if obstacle.aabb is None:
+                candidates = np.ones(s.shape[:2], dtype=bool)
+            else:
+                candidates = ((hi >= obstacle.aabb[0]) & (lo <= obstacle.aabb[1])).all(axis = -1)
+            sample, link = np.nonzero(candidates)
+            if len(sample) == 0:
+                continue
+            hit = obstacle.distance(s[sample, link], e[sample, link]) < r[link]
+            world_hit[sample[hit]] = True
+        return self_hit, world_hit
+    
+    def check(self, joints, chunk_size = 20000):
+        """
+        Function that checks many joint configurations (e.g. a whole trajectory) for collisions
+        
+        Args:
+            joints: (N, 6) array of joint angles in radians
+            chunk_size: int. Number of configurations checked at once, bounds the memory use
+        
+        Returns:
+            self_collision: (N,) boolean array
+            world_collision: (N,) boolean array
+        """
+        
+        joints = np.asarray(joints, dtype=float).reshape(-1, 6)
+        self_collision = np.zeros(len(joints), dtype=bool)
+        world_collision = np.zeros(len(joints), dtype=bool)
+        for start in range(0, len(joints), chunk_size):
+            stop = start + chunk_size
+            self_collision[start:stop], world_collision[start:stop] = self._check_chunk(joints[start:stop])
+        return self_collision, world_collision
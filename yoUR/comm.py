@@ -14,14 +14,66 @@ This module manages communications and script execution
 """
 
 import socket
-import ur_standard
+from . import ur_standard
+from . import realtime
 
 import traceback
+import itertools
+import io
+import re
+import select
+import threading
+import timeit
+import collections
 from struct import *
 import math
 
 # ------ Wraps communications 
 
+# Largest program the controller accepts on port 30002
+MAX_PROGRAM_SIZE = 2<<18
+
+def _indent(chunks, indent = "\t"):
+    """
+    Internal generator that indents text given in arbitrary chunks, line by line in one pass.
+    Yields the same lines as splitting the joined chunks at "\n" and indenting every part
+    
+    Args:
+        chunks: Iterable of strings. Commands do not need to end with a new line
+        indent: String put in front of every line
+    
+    Yields:
+        line: Indented line, ending with a new line
+    """
+    
+    pending = ""
+    for chunk in chunks:
+        lines = (pending + chunk).split("\n")
+        pending = lines.pop()
+        for l in lines:
+            yield indent + l + "\n"
+    yield indent + pending + "\n"
+
+def iter_script(list_ur_commands, name = "my_script"):
+    """
+    Generator version of concatenate_script. Commands are taken lazily, so a program can be written
+    out without ever holding the whole text in memory
+    
+    Args:
+        list_ur_commands: An iterable (list, generator) of formatted UR Script strings
+        name: String. Name of the UR script function
+        
+    Yields:
+        line: The lines of the wrapped script
+    """
+    
+    yield "\ndef %s():\n" % name
+    #yield '\tpopup("running %s")\n' % name
+    for line in _indent(list_ur_commands):
+        yield line
+    yield 'end\n'
+    yield '\n%s()\n' % name
+
 def concatenate_script(list_ur_commands):
     """
     Internal function that concatenates generated UR script into one large script file. Usually used to combine
@@ -34,21 +86,532 @@ def concatenate_script(list_ur_commands):
         ur_script: The concatenated script
     """
     
-    ur_script = "\ndef my_script():\n"
-    #ur_script += '\tpopup("running my_script")\n'
+    return "".join(iter_script(list_ur_commands))
+
+def write_script(list_ur_commands, target, name = "my_script", chunk_size = 1<<16, max_size = None):
+    """
+    Function that wraps UR script commands and writes them straight into a socket or file in chunks
+    
+    Args:
+        list_ur_commands: An iterable (list, generator) of formatted UR Script strings
+        target: Connected socket (uses sendall) or file object (uses write)
+        name: String. Name of the UR script function
+        chunk_size: int. Number of characters collected before each write
+        max_size: int. Raise if the encoded program is larger than this many bytes. The program is then
+            held in memory until it is complete, so nothing is written if it is too long
+    
+    Returns:
+        size: int. Number of characters written (bytes for sockets and binary files)
+    """
     
-    combined_script = ""
-    for ur_cmd in list_ur_commands:
-        combined_script += ur_cmd
+    if max_size is not None:
+        # a program can not be taken back once it is partly sent, so only write it once its size is known
+        chunk_size = max(chunk_size, max_size + 1)
+    if hasattr(target, "sendall"):
+        write = target.sendall
+        binary = True
+    else:
+        write = target.write
+        binary = isinstance(target, (io.BufferedIOBase, io.RawIOBase)) or "b" in getattr(target, "mode", "")
     
-    #format combined script
-    lines =  combined_script.split("\n")
-    for l in lines:
-        ur_script += "\t" + l + "\n"
+    buffered = []
+    size = 0
+    total = 0
+    for line in iter_script(list_ur_commands, name):
+        buffered.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            total += _flush(buffered, size, total, write, binary, max_size)
+            buffered = []
+            size = 0
+    total += _flush(buffered, size, total, write, binary, max_size)
+    return total
+
+def _flush(buffered, size, total, write, binary, max_size):
+    """ Internal function that writes collected lines. Returns the number of characters written """
     
-    ur_script += 'end\n'
-    ur_script += '\nmy_script()\n'
-    return ur_script
+    chunk = "".join(buffered)
+    if binary:
+        chunk = chunk.encode("utf-8")
+        size = len(chunk)
+    if max_size is not None and total + size > max_size:
+        raise Exception("Program too long")
+    write(chunk)
+    return size
+
+def send_script_stream(list_ur_commands, robot_ip, name = "my_script"):
+    """
+    Opens a socket to the Robot and streams the wrapped commands into it, without building the program string
+    
+    Args:
+        list_ur_commands: An iterable (list, generator) of formatted UR Script strings
+        robot_ip: String. IP of robot
+        name: String. Name of the UR script function
+    
+    Returns:
+        size: int. Number of characters sent
+    
+    Raises socket errors, and an Exception if the program grows beyond MAX_PROGRAM_SIZE
+    """
+    
+    PORT = 30002
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.settimeout(2)
+    try:
+        s.connect((robot_ip, PORT))
+        s.settimeout(None)
+        return write_script(list_ur_commands, s, name, max_size = MAX_PROGRAM_SIZE)
+    finally:
+        s.close()
+
+# ----- Sequenced uploads -----
+
+# UR script calls that set controller state a later part of a split program has to repeat
+_STATE_CALL = re.compile(r"^\s*(set_tcp|set_payload|set_tool_voltage|set_\w*digital_out|set_\w*analog_out)\((.*)\)\s*$")
+_MOVE = re.compile(r"\b(?:move[cjlp]|(your_movel_\w+))\(")
+_BLEND = re.compile(r"\br\s*=\s*([-+0-9.eE]+)")
+# motion_table calls pass the blend radius as the last argument, a number or a list with one radius per waypoint
+_TABLE_BLEND = re.compile(r"([-+]?[0-9.]+(?:[eE][-+]?[0-9]+)?)\]?\s*\)")
+# pose table assignments from motion_table. They have to stay in the same part as the call that uses them
+_TABLE = re.compile(r"^\s*your_poses_\w*\s*=")
+# Port on the PC that split programs report back to
+SEQUENCE_PORT = 30010
+
+def _state_key(line):
+    """ Internal function that returns what a state setting line overrides, or None """
+    
+    match = _STATE_CALL.match(line)
+    if match is None:
+        return None
+    name, args = match.groups()
+    if name.endswith("_out"):
+        # Outputs are set per id
+        return name + "(" + args.split(",")[0].strip()
+    return name
+
+def _last_blend(command):
+    """ Internal function that returns the blend radius of the last move in a command, None if it has no move """
+    
+    moves = list(_MOVE.finditer(command))
+    if not moves:
+        return None
+    move = moves[-1]
+    rest = command[move.start():]
+    if move.group(1):
+        blend = _TABLE_BLEND.search(rest)
+    else:
+        blend = _BLEND.search(rest)
+    return float(blend.group(1)) if blend else 0.0
+
+def _command_info(command):
+    """ Internal function that returns (is definition, state lines, ends with a stop, is a pose table) for one command """
+    
+    lines = command.split("\n")
+    if command.lstrip().startswith("def "):
+        return True, [], False, False
+    state = [(_state_key(l), l.strip()) for l in lines]
+    state = [(k, l) for k, l in state if k is not None]
+    table = _TABLE.match(command) is not None and _MOVE.search(command) is None
+    return False, state, _last_blend(command) == 0, table
+
+def _command_size(command):
+    """ Internal function that returns the size of a command once indented into a program """
+    
+    return len(command) + command.count("\n") + 1
+
+def _part_size(commands, name):
+    """ Internal function that returns the size of a wrapped program """
+    
+    return sum(len(l) for l in iter_script(commands, name))
+
+def split_script(list_ur_commands, max_size = MAX_PROGRAM_SIZE, name = "my_script", notify = None):
+    """
+    Function that wraps UR script commands into as many programs as needed to keep each one below max_size.
+    Programs are split between commands, after a move that stops (no blend) where possible and never between a
+    motion_table pose table and its call. Every part starts by repeating
+    the function definitions and TCP/payload/IO settings made in earlier parts
+    
+    Args:
+        list_ur_commands: An iterable (list, generator) of formatted UR Script strings
+        max_size: int. Largest program size in characters
+        name: String. Name of the UR script function
+        notify: (ip, port) of the PC. Each part ends by sending "<name>_<part index>_done" there
+    
+    Returns:
+        programs: List of wrapped UR scripts
+    """
+    
+    # Space for the wrapper and the notification, with room for longer part indices
+    budget = max_size - _part_size(_notification(name, 0, notify), name) - 8
+    definitions = []
+    state = {}
+    parts = []
+    carried = []
+    part = []
+    safe = 0
+    size = 0
+    for command in list_ur_commands:
+        cost = _command_size(command)
+        if cost > budget:
+            raise Exception("Command too long for one program")
+        if size + cost > budget and part:
+            count = safe if safe else _free_split(part)
+            if not count:
+                raise Exception("Pose table and its call too long for one program")
+            parts.append(carried + [c for c, _ in part[:count]])
+            for c, (is_def, lines, _, _) in part[:count]:
+                if is_def:
+                    definitions.append(c)
+                for k, l in lines:
+                    state[k] = l + "\n"
+            carried = definitions + list(state.values())
+            part = part[count:]
+            size = sum(_command_size(c) for c in carried) + sum(_command_size(c) for c, _ in part)
+            safe = max([i + 1 for i, (_, info) in enumerate(part) if info[2]] or [0])
+            if size + cost > budget:
+                raise Exception("Program state too long to repeat in every part")
+        info = _command_info(command)
+        part.append((command, info))
+        size += cost
+        if info[2]:
+            safe = len(part)
+    parts.append(carried + [c for c, _ in part])
+    
+    programs = []
+    for i, commands in enumerate(parts):
+        program = "".join(iter_script(commands + _notification(name, i, notify), name))
+        if len(program) > max_size:
+            raise Exception("Program too long")
+        programs.append(program)
+    return programs
+
+def _free_split(part):
+    """ Internal function that returns where to split a part without a stop, never right after a pose table """
+    
+    count = len(part)
+    while count and part[count - 1][1][3]:
+        count -= 1
+    return count
+
+def _notification(name, index, notify):
+    """ Internal function that returns the commands reporting a finished part to the PC """
+    
+    if notify is None:
+        return []
+    ip, port = notify
+    script = ur_standard.socket_open('"%s"' % ip, port)
+    script += ur_standard.socket_send_string('"%s_%d_done"' % (name, index))
+    script += "socket_close()\n"
+    return [script]
+
+def send_script_parts(list_ur_commands, robot_ip, pc_ip, port = SEQUENCE_PORT, name = "my_script", timeout = None):
+    """
+    Function that splits a program with split_script and uploads the parts back to back. Each next part is
+    sent as soon as the robot reports the previous one finished. The connection for it is opened beforehand,
+    so the robot only waits for the upload itself
+    
+    Args:
+        list_ur_commands: An iterable (list, generator) of formatted UR Script strings
+        robot_ip: String. IP of robot
+        pc_ip: String. IP of this computer as seen from the robot
+        port: int. Port to listen at for finished parts
+        name: String. Name of the UR script function
+        timeout: float. Seconds to wait for each part. None waits forever
+    
+    Returns:
+        count: int. Number of parts run
+    
+    Raises socket errors, and an Exception if the robot reports something unexpected
+    """
+    
+    programs = [p.encode("utf-8") for p in split_script(list_ur_commands, name = name, notify = (pc_ip, port))]
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server.settimeout(timeout)
+    try:
+        server.bind(("", port))
+        server.listen(1)
+        robot = _connect_robot(robot_ip)
+        for i, program in enumerate(programs):
+            try:
+                robot.sendall(program)
+            finally:
+                robot.close()
+            if i + 1 < len(programs):
+                robot = _connect_robot(robot_ip)
+            _wait_done(server, "%s_%d_done" % (name, i))
+    finally:
+        server.close()
+    return len(programs)
+
+def _connect_robot(robot_ip):
+    """ Internal function that opens a socket to the robot program port """
+    
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.settimeout(2)
+    s.connect((robot_ip, 30002))
+    s.settimeout(None)
+    return s
+
+def _wait_done(server, message):
+    """ Internal function that waits until the robot sends the message """
+    
+    connection, _ = server.accept()
+    try:
+        connection.settimeout(server.gettimeout())
+        data = b""
+        expected = message.encode("utf-8")
+        while len(data) < len(expected):
+            chunk = connection.recv(64)
+            if not chunk:
+                break
+            data += chunk
+    finally:
+        connection.close()
+    if data.strip() != expected:
+        raise Exception("Unexpected message from robot: %r" % data)
+
+# ----- Persistent connections -----
+
+class ScriptSender(object):
+    """
+    Class that keeps one connection to a robot open and sends programs through it. A dropped connection is
+    opened again on the next send. Programs are sent whole with sendall, errors are raised
+    
+    Args:
+        robot_ip: String. IP of robot
+        port: int. Port of the robot program interface
+        timeout: float. Seconds allowed for connecting and sending
+        history: int. Number of latencies kept for stats
+    """
+    
+    def __init__(self, robot_ip, port = 30002, timeout = 2.0, history = 1000):
+        self.robot_ip = robot_ip
+        self.port = port
+        self.timeout = timeout
+        self.socket = None
+        self.connects = 0
+        self.connect_times = collections.deque(maxlen = history)
+        self.send_times = collections.deque(maxlen = history)
+        # Reentrant, send holds it while it connects
+        self._lock = threading.RLock()
+    
+    def connect(self):
+        """ Function that opens the connection, if it is not open """
+        
+        with self._lock:
+            if self.socket is not None:
+                return
+            start = timeit.default_timer()
+            s = socket.create_connection((self.robot_ip, self.port), self.timeout)
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.connect_times.append(timeit.default_timer() - start)
+            self.connects += 1
+            self.socket = s
+    
+    def _drain(self):
+        """ Internal function that discards robot state messages and checks the connection is still open """
+        
+        while self.socket is not None:
+            readable = select.select([self.socket], [], [], 0)[0]
+            if not readable:
+                return
+            try:
+                data = self.socket.recv(1<<16)
+            except socket.error:
+                data = b""
+            if not data:
+                self.close()
+    
+    def send(self, script_to_send):
+        """
+        Function that sends a program, opening the connection again once if it dropped
+        
+        Args:
+            script_to_send: String or bytes. Program to send
+        
+        Returns:
+            seconds: float. Time taken by the send
+        """
+        
+        if not isinstance(script_to_send, bytes):
+            script_to_send = script_to_send.encode("utf-8")
+        if len(script_to_send) > MAX_PROGRAM_SIZE:
+            raise Exception("Program too long")
+        with self._lock:
+            for attempt in (0, 1):
+                self._drain()
+                self.connect()
+                start = timeit.default_timer()
+                try:
+                    self.socket.sendall(script_to_send)
+                except socket.error:
+                    self.close()
+                    if attempt:
+                        raise
+                    continue
+                elapsed = timeit.default_timer() - start
+                self.send_times.append(elapsed)
+                return elapsed
+    
+    def stats(self):
+        """
+        Function that returns latency statistics in seconds
+        
+        Returns:
+            stats: Dictionary with connects, and count, mean, min, max and last of the connect and send times
+        """
+        
+        result = {"connects": self.connects}
+        for name, times in (("connect", self.connect_times), ("send", self.send_times)):
+            times = list(times)
+            result[name] = {"count": len(times), "mean": sum(times) / len(times) if times else 0.0,
+                "min": min(times) if times else 0.0, "max": max(times) if times else 0.0,
+                "last": times[-1] if times else 0.0}
+        return result
+    
+    def close(self):
+        """ Function that closes the connection """
+        
+        with self._lock:
+            if self.socket is not None:
+                self.socket.close()
+                self.socket = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
+
+_SENDERS = {}
+_SENDERS_LOCK = threading.Lock()
+
+def get_sender(robot_ip, port = 30002):
+    """
+    Function that returns the shared ScriptSender of a robot, so that scripts reuse its connection
+    
+    Args:
+        robot_ip: String. IP of robot
+        port: int. Port of the robot program interface
+    
+    Returns:
+        sender: ScriptSender
+    """
+    
+    key = (robot_ip, port)
+    with _SENDERS_LOCK:
+        if key not in _SENDERS:
+            _SENDERS[key] = ScriptSender(robot_ip, port)
+        return _SENDERS[key]
+
+# ----- Multi-robot dispatch -----
+
+# Outcome of sending one program. error is None when it was sent, sent_at is a timeit.default_timer() value.
+# timed_out is True for robots that had not finished when dispatch returned
+DispatchResult = collections.namedtuple("DispatchResult", "robot_ip ok sent_at seconds error timed_out")
+
+def dispatch(programs, synchronized = False, timeout = 10.0):
+    """
+    Function that sends programs to several robots in parallel, one thread per robot, over the shared
+    connections of get_sender. With synchronized, every robot is connected and its program encoded first,
+    then all programs are released together. If not every robot is connected before the timeout, no program is sent
+    
+    Args:
+        programs: Dictionary of robot (IP string, or robot ID for get_ip_ur) to program (string or bytes)
+        synchronized: Boolean. Release all programs at the same moment
+        timeout: float. Seconds to wait for all robots
+    
+    Returns:
+        results: Dictionary of robot to DispatchResult. Robots that did not finish (or with synchronized, did not
+            connect) in time have ok False and timed_out True. Sends still running after that do not change
+            the returned dictionary
+    """
+    
+    results = {}
+    lock = threading.Lock()
+    closed = []
+    # Robots done connecting, with synchronized
+    ready = threading.Condition()
+    connected = []
+    aborted = []
+    start = threading.Event()
+    
+    def _store(robot, result):
+        with lock:
+            if not closed:
+                results[robot] = result
+    
+    def _send(robot, program):
+        robot_ip = get_ip_ur(robot) if isinstance(robot, int) else robot
+        sent_at = None
+        try:
+            try:
+                sender = get_sender(robot_ip)
+                if not isinstance(program, bytes):
+                    program = program.encode("utf-8")
+                if synchronized:
+                    sender.connect()
+            finally:
+                if synchronized:
+                    # Robots that failed count as done, so the others are not held back
+                    with ready:
+                        connected.append(robot)
+                        ready.notify_all()
+            if synchronized:
+                start.wait()
+                if aborted:
+                    return
+            sent_at = timeit.default_timer()
+            seconds = sender.send(program)
+            _store(robot, DispatchResult(robot_ip, True, sent_at, seconds, None, False))
+        except Exception as e:
+            _store(robot, DispatchResult(robot_ip, False, sent_at, None, e, False))
+    
+    threads = [threading.Thread(target = _send, args = item) for item in programs.items()]
+    deadline = timeit.default_timer() + timeout
+    for t in threads:
+        t.daemon = True
+        t.start()
+    if synchronized:
+        with ready:
+            while len(connected) < len(threads):
+                remaining = deadline - timeit.default_timer()
+                if remaining <= 0:
+                    aborted.append(True)
+                    break
+                ready.wait(remaining)
+            ready_robots = list(connected)
+        start.set()
+    if not aborted:
+        for t in threads:
+            t.join(max(deadline - timeit.default_timer(), 0))
+    with lock:
+        closed.append(True)
+        snapshot = dict(results)
+    for robot in programs:
+        if robot not in snapshot:
+            robot_ip = get_ip_ur(robot) if isinstance(robot, int) else robot
+            if aborted and robot in ready_robots:
+                snapshot[robot] = DispatchResult(robot_ip, False, None, None,
+                    Exception("Not sent, other robots did not connect in time"), False)
+            else:
+                snapshot[robot] = DispatchResult(robot_ip, False, None, None, Exception("Timed out"), True)
+    return snapshot
+
+def start_skew(results):
+    """
+    Function that returns the spread of the release times of a dispatch in seconds, without the upload times
+    
+    Args:
+        results: Dictionary returned by dispatch
+    
+    Returns:
+        skew: float. Time between the first and last program released
+    """
+    
+    times = [r.sent_at for r in results.values() if r.ok]
+    return max(times) - min(times) if times else 0.0
 
 def stop_script():
     """
@@ -83,24 +646,28 @@ def send_script(script_to_send,robot_ip):
     PORT = 30002        
     HOST = robot_ip
     
-    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    s.settimeout(2)
-    try:
-        s.connect((HOST, PORT))
-    except:
-        print ("Cannot connect to ",HOST,PORT)
-        
-    s.settimeout(None)
-    max_size= 2<<18
+    # The limit applies to the bytes sent, not to the characters
+    if not isinstance(script_to_send, bytes):
+        script_to_send = script_to_send.encode("utf-8")
     n=len(script_to_send)
-    if n>max_size:
+    if n>MAX_PROGRAM_SIZE:
         raise Exception("Program too long")
-        
+    
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.settimeout(2)
     try:
-        s.send(script_to_send)
-    except:
-        print("failed to send")
-    s.close()
+        try:
+            s.connect((HOST, PORT))
+        except socket.error:
+            print ("Cannot connect to ",HOST,PORT)
+            return
+        s.settimeout(None)
+        try:
+            s.sendall(script_to_send)
+        except socket.error:
+            print("failed to send")
+    finally:
+        s.close()
 
 def get_ip_ur(ur_number):
     """
@@ -144,14 +711,8 @@ def create_ur_script(template, scripts,robot_id):
     """
     
     header = template.replace("<<<ip_axis>>>", _get_ip_axis(robot_id))
-    body = _concatenate_script(scripts)
-    combined_script = header + body
-    lines = combined_script.split("\n")
-    
-    ur_script = ""
-    for l in lines:
-        ur_script += "\t" + l + "\n"
-    return ur_script
+    body = iter_script(scripts)
+    return "".join(_indent(itertools.chain([header], body)))
 
 # ------ Real time 
 
@@ -172,7 +733,7 @@ def listen_to_robot(robot_ip):
 
 def read(HOST, PORT):
     """
-    Method that opens a TCP socket to the robot, receives data from the robot server and then closes socket
+    Method that opens a TCP socket to the robot, receives one whole frame from the robot server and then closes socket
     
     Returns:
         data: Data broadcast by the robot. In bytes
@@ -182,15 +743,203 @@ def read(HOST, PORT):
     s.settimeout(0.1)
     try:
         s.connect((HOST, PORT))
-        print "connected"
+        print("connected")
     except:
         traceback.print_exc()
-        print "Cannot connect to ",HOST,PORT
+        print("Cannot connect to ",HOST,PORT)
     #s.settimeout(None)
-    data = s.recv(1024)
+    data = read_frame(s)
     s.close()
     return data
 
+# Real time frames start with their length as a big endian int, which includes these 4 bytes
+_FRAME_SIZE = Struct("!i")
+# Sizes outside of this range mean the stream lost its alignment
+MIN_FRAME_SIZE = 256
+MAX_FRAME_SIZE = 4096
+
+def _recv_exactly(s, size):
+    """ Internal function that receives exactly size bytes, or raises socket.error when the connection closes """
+    
+    data = bytearray()
+    while len(data) < size:
+        chunk = s.recv(size - len(data))
+        if not chunk:
+            raise socket.error("Connection closed")
+        data += chunk
+    return bytes(data)
+
+def read_frame(s):
+    """
+    Function that receives one whole real time frame from a connected socket
+    
+    Args:
+        s: Connected socket
+    
+    Returns:
+        data: The frame, including its length prefix. In bytes
+    """
+    
+    head = _recv_exactly(s, 4)
+    size = _FRAME_SIZE.unpack(head)[0]
+    if not MIN_FRAME_SIZE <= size <= MAX_FRAME_SIZE:
+        raise socket.error("Bad frame size %d" % size)
+    return head + _recv_exactly(s, size - 4)
+
+class RealtimeClient(object):
+    """
+    Class that keeps a connection to the real time interface open and reads whole frames on a background thread.
+    The latest frame is always at hand, and callbacks see every frame. A lost connection, or a stream that lost
+    its alignment, is opened again
+    
+    Args:
+        robot_ip: String. IP of robot
+        port: int. Real time interface port
+        timeout: float. Seconds without data before the connection counts as lost
+        retry: float. Seconds between connection attempts
+    """
+    
+    def __init__(self, robot_ip, port = 30003, timeout = 2.0, retry = 0.5):
+        self.robot_ip = robot_ip
+        self.port = port
+        self.timeout = timeout
+        self.retry = retry
+        self.frames = 0
+        self.connects = 0
+        self.error = None
+        self.callback_errors = 0
+        self._latest = (None, None)
+        self._callbacks = []
+        self._condition = threading.Condition()
+        self._running = False
+        self._socket = None
+        self._thread = None
+    
+    def subscribe(self, callback):
+        """
+        Function that registers a function called from the reader thread for every frame.
+        Exceptions raised by the callback are stored in error and counted in callback_errors, reading goes on
+        
+        Args:
+            callback: Function of (frame bytes, receive time as timeit.default_timer())
+        """
+        
+        self._callbacks.append(callback)
+    
+    def start(self):
+        """ Function that starts the reader thread """
+        
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target = self._run)
+        self._thread.daemon = True
+        self._thread.start()
+    
+    def _run(self):
+        """ Internal function that connects and reads frames until stopped """
+        
+        while self._running:
+            try:
+                s = socket.create_connection((self.robot_ip, self.port), self.timeout)
+                s.settimeout(self.timeout)
+                self._socket = s
+                self.connects += 1
+                while self._running:
+                    frame = read_frame(s)
+                    received = timeit.default_timer()
+                    with self._condition:
+                        self._latest = (frame, received)
+                        self.frames += 1
+                        self._condition.notify_all()
+                    for callback in self._callbacks:
+                        try:
+                            callback(frame, received)
+                        except Exception as e:
+                            self.error = e
+                            self.callback_errors += 1
+            except Exception as e:
+                # Socket errors, and anything unexpected, reconnect instead of ending the thread
+                self.error = e
+            finally:
+                if self._socket is not None:
+                    self._socket.close()
+                    self._socket = None
+            if self._running:
+                with self._condition:
+                    self._condition.wait(self.retry)
+    
+    def latest(self):
+        """
+        Function that returns the latest frame
+        
+        Returns:
+            (frame, received): Frame bytes and its receive time as timeit.default_timer(). (None, None) before the first
+        """
+        
+        return self._latest
+    
+    def wait_frame(self, frames = None, timeout = None):
+        """
+        Function that waits for a new frame
+        
+        Args:
+            frames: int. Wait until more than this many frames were received. Defaults to the current count
+            timeout: float. Seconds to wait
+        
+        Returns:
+            (frame, received): as latest. (None, None) when the timeout passed first
+        """
+        
+        with self._condition:
+            if frames is None:
+                frames = self.frames
+            deadline = None if timeout is None else timeit.default_timer() + timeout
+            while self.frames <= frames:
+                remaining = None if deadline is None else deadline - timeit.default_timer()
+                if remaining is not None and remaining <= 0:
+                    return None, None
+                self._condition.wait(remaining)
+            return self._latest
+    
+    def get_messages(self):
+        """
+        Function that parses the latest frame with get_messages
+        
+        Returns:
+            chunks: Dictionary as filled by get_messages. None before the first frame
+        """
+        
+        frame = self._latest[0]
+        if frame is None:
+            return None
+        chunks = {}
+        get_messages(frame, chunks)
+        return chunks
+    
+    def stop(self):
+        """ Function that stops the reader thread and closes the connection """
+        
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+        s = self._socket
+        if s is not None:
+            try:
+                s.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+        if self._thread is not None:
+            self._thread.join(self.timeout + self.retry)
+            self._thread = None
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, *args):
+        self.stop()
+
 def get_messages(bytes, chunks_info):
     """
     Function parses data stream and selects the following information:
@@ -202,30 +951,19 @@ def get_messages(bytes, chunks_info):
     
     This data is formatted and the chunks dictionary is updated
     for more info see: http://wiki03.lynero.net/Technical/RealTimeClientInterface
+    The layout is found from the frame size, see realtime.get_layout. realtime.decode reads every field
     """
     
     
-    # get messages
-    q_target = bytes[12:60]
-    q_actual = bytes[252:300]
-    tcp_force = bytes[540:588]
-    tool_vector = bytes[588:636]
-    controller_time = bytes[740:748]
-    
-    # format type: int, 
-    fmt_double6 = "!dddddd"
-    fmt_double1 = "!d"
-    
-    #Unpack selected data
-    target_joints = unpack(fmt_double6,q_target)
-    chunks_info["target_joints"]= (math.degrees(j) for j in target_joints)
-    actual_joints = unpack(fmt_double6,q_actual)
-    chunks_info["actual_joints"]= (math.degrees(j) for j in actual_joints)
-    forces = unpack(fmt_double6,tcp_force)
+    #Unpack selected data in place, at the offsets of the controller version
+    layout = realtime.get_layout(_FRAME_SIZE.unpack_from(bytes, 0)[0])
+    target_joints = layout.field(bytes, "q_target")
+    chunks_info["target_joints"]= [math.degrees(j) for j in target_joints]
+    actual_joints = layout.field(bytes, "q_actual")
+    chunks_info["actual_joints"]= [math.degrees(j) for j in actual_joints]
+    forces = layout.field(bytes, "tcp_force")
     chunks_info["forces"]= forces
-    pose = unpack(fmt_double6,tool_vector)
+    pose = layout.field(bytes, "tool_vector")
     chunks_info["pose"]= pose
-    time = unpack(fmt_double1,controller_time)
+    time = (layout.field(bytes, "controller_timer"),)
     chunks_info["time"]= time
-
-
@@ -0,0 +1,427 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module estimates how long a generated program takes to run, without a robot.
+Every move follows a trapezoidal velocity profile under its a / v limits:
+    1) movel and movec: tool path length at the tool speed. Blended moves (r > 0) pass their waypoint at speed
+    2) movej: every joint under a / v capped by the robot model joint limits. All joints arrive together
+    3) move_linear_axis: both axes at the axis speed and accel
+    4) sleep: the given time
+Moves relative to the current pose (ur_custom.move_local) are followed from the move before them. Moves to other
+expressions have an unknown target: they take no time and the position stays unknown until the next absolute move.
+Other commands take no time. The path shortening of blends and the controller joint speed limiting of movel are
+not modelled, so blended programs are estimated slightly long and fast movel near singularities short.
+"""
+
+
+import re
+
+import numpy as np
+
+from . import batch_kinematics
+from . import robot_model
+from . import rotations
+
+# Command kinds
+OTHER = 0
+MOVE_L = 1
+MOVE_J = 2
+MOVE_C = 3
+SLEEP = 4
+MOVE_AXIS = 5
+
+_CALL = re.compile(r"^\s*(movel|movej|movec|sleep|move_linear_axis)\((.*)\)\s*$")
+# movel / movej as ur_standard writes them, read in one go
+_SIMPLE = re.compile(r"^\s*(movel\(p|movej\()\[([^\[\]]*)\]\s*,\s*a\s*=\s*([^,()]+),\s*v\s*=\s*([^,()]+?)\s*(?:,\s*r\s*=\s*([^,()]+?)\s*)?\)\s*$")
+_ASSIGN = re.compile(r"^\s*([A-Za-z_]\w*)\s*=\s*(.*?)\s*$")
+_KEYWORD = re.compile(r"^([A-Za-z_]\w*)\s*=\s*(.*)$")
+_LIST = re.compile(r"^(p?)\[([^\[\]]*)\]$")
+_POSE_TRANS = re.compile(r"^pose_trans\((.*)\)$")
+# Calls that return the current tool pose
+_CURRENT = ("get_forward_kin()", "get_actual_tcp_pose()")
+_KINDS = {"movel": MOVE_L, "movej": MOVE_J, "movec": MOVE_C, "sleep": SLEEP, "move_linear_axis": MOVE_AXIS}
+# URScript defaults of a and v
+_DEFAULTS = {MOVE_L: (1.2, 0.25), MOVE_C: (1.2, 0.25), MOVE_J: (1.4, 1.05)}
+
+# ----- Parsing -----
+
+def _arguments(text):
+    """ Internal function that splits call arguments at the commas that are not inside brackets """
+    
+    arguments = []
+    depth = 0
+    start = 0
+    for i, c in enumerate(text):
+        if c in "([":
+            depth += 1
+        elif c in ")]":
+            depth -= 1
+        elif c == "," and depth == 0:
+            arguments.append(text[start:i].strip())
+            start = i + 1
+    arguments.append(text[start:].strip())
+    return arguments
+
+def _literal(text, pose):
+    """ Internal function that returns the numbers of a p[...] (pose True) or [...] literal, or None """
+    
+    match = _LIST.match(text)
+    if match is None or bool(match.group(1)) != pose:
+        return None
+    try:
+        values = [float(v) for v in match.group(2).split(",")]
+    except ValueError:
+        return None
+    return values if len(values) == 6 else None
+
+def _number(text, default = 0.0):
+    """ Internal function that returns a number argument, or the default for expressions and missing arguments """
+    
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return default
+
+def _pose_value(text, variables):
+    """
+    Internal function that reads a pose expression.
+    Returns ("pose", pose), ("relative", base row, offset pose) or None when it is unknown
+    """
+    
+    pose = _literal(text, True)
+    if pose is not None:
+        return ("pose", pose)
+    if text in variables:
+        return variables[text]
+    if text in _CURRENT:
+        return ("relative", None, [0.0] * 6)
+    match = _POSE_TRANS.match(text)
+    if match is not None:
+        arguments = _arguments(match.group(1))
+        if len(arguments) == 2:
+            base = _pose_value(arguments[0], variables)
+            offset = _literal(arguments[1], True)
+            if base is not None and base[0] == "relative" and base[2] == [0.0] * 6 and offset is not None:
+                return ("relative", base[1], offset)
+    return None
+
+def parse_script(list_ur_commands):
+    """
+    Function that reads UR script commands into arrays. Every command is parsed on its own: targets are read from
+    p[...] / [...] literals or from variables assigned one earlier, a / v / r by keyword or by position
+    (movel: pose, a, v, t, r). Moves relative to the current pose (pose_trans(get_forward_kin(), p[...]) as written by
+    ur_custom) keep their offset. Moves to any other expression have an unknown target
+    
+    Args:
+        list_ur_commands: An iterable of formatted UR Script strings, as returned by ur_standard and ur_custom
+    
+    Returns:
+        program: Dictionary of arrays with one row per line:
+            kind (N,) int. One of OTHER, MOVE_L, MOVE_J, MOVE_C, SLEEP, MOVE_AXIS
+            target (N, 6). Pose in m (movel, movec), joints (movej), [x, z, 0...] in m (move_linear_axis).
+                The offset pose for relative moves
+            known (N,) bool. The target is an absolute value
+            relative (N,) bool. The target is an offset from the pose after row base
+            base (N,) int. Row of the last move before the current pose was read, -1 for the start
+            via (N, 3). Via point of movec in m
+            accel, vel, blend, time (N,). time holds the sleep duration
+    """
+    
+    lines = [l for c in list_ur_commands for l in c.split("\n") if l.strip()]
+    n = len(lines)
+    kind = np.zeros(n, dtype = np.int8)
+    target = np.zeros((n, 6))
+    via = np.zeros((n, 3))
+    values = np.zeros((n, 4))
+    known = np.zeros(n, dtype = bool)
+    relative = np.zeros(n, dtype = bool)
+    base = np.full(n, -1, dtype = np.int64)
+    # variable name -> ("pose", pose) or ("relative", base row, offset)
+    variables = {}
+    last_move = -1
+    for i, line in enumerate(lines):
+        match = _SIMPLE.match(line)
+        if match is not None:
+            try:
+                pose = [float(v) for v in match.group(2).split(",")]
+                numbers = [float(match.group(3)), float(match.group(4)), float(match.group(5) or 0.0)]
+            except ValueError:
+                pose = None
+            if pose is not None and len(pose) == 6:
+                kind[i] = MOVE_L if match.group(1) == "movel(p" else MOVE_J
+                target[i] = pose
+                values[i, :3] = numbers
+                known[i] = True
+                last_move = i
+                continue
+        match = _CALL.match(line)
+        if match is None:
+            match = _ASSIGN.match(line)
+            if match is not None:
+                name, expression = match.groups()
+                value = _pose_value(expression, variables)
+                if value is not None and value[0] == "relative" and value[1] is None:
+                    value = ("relative", last_move, value[2])
+                if value is None:
+                    variables.pop(name, None)
+                else:
+                    variables[name] = value
+            continue
+        k = _KINDS[match.group(1)]
+        kind[i] = k
+        positional = []
+        keywords = {}
+        for argument in _arguments(match.group(2)):
+            keyword = _KEYWORD.match(argument)
+            if keyword is None:
+                positional.append(argument)
+            else:
+                keywords[keyword.group(1)] = keyword.group(2)
+        positional += [None] * (6 - len(positional))
+        if k == SLEEP:
+            values[i, 3] = _number(positional[0])
+            continue
+        if k == MOVE_AXIS:
+            target[i, :2] = _number(positional[0]), _number(positional[1])
+            known[i] = positional[0] is not None and positional[1] is not None
+            continue
+        if k == MOVE_C:
+            point = _pose_value(positional[0] or "", variables)
+            if point is not None and point[0] == "pose":
+                via[i] = point[1][:3]
+            positional = positional[1:]
+        previous, last_move = last_move, i
+        accel, vel = _DEFAULTS[k]
+        values[i, 0] = _number(keywords.get("a", positional[1]), accel)
+        values[i, 1] = _number(keywords.get("v", positional[2]), vel)
+        values[i, 2] = _number(keywords.get("r", positional[4]))
+        if k == MOVE_J:
+            joints = _literal(positional[0] or "", False)
+            if joints is not None:
+                target[i] = joints
+                known[i] = True
+            continue
+        pose = _pose_value(positional[0] or "", variables)
+        if pose is None:
+            continue
+        if pose[0] == "pose":
+            target[i] = pose[1]
+            known[i] = True
+        else:
+            target[i] = pose[2]
+            relative[i] = True
+            base[i] = previous if pose[1] is None else pose[1]
+    return {"kind": kind, "target": target, "known": known, "relative": relative, "base": base, "via": via,
+        "accel": values[:, 0].copy(), "vel": values[:, 1].copy(), "blend": values[:, 2].copy(), "time": values[:, 3].copy()}
+
+# ----- Profiles -----
+
+def trapezoid_time(distance, vel, accel, v_start = 0.0, v_end = 0.0):
+    """
+    Function that returns the time to cover distances with a trapezoidal (or triangular) velocity profile
+    
+    Args:
+        distance: array. Distances, non-negative
+        vel: array. Speed limits
+        accel: array. Acceleration limits
+        v_start: array. Speeds at the start, at most vel
+        v_end: array. Speeds at the end, at most vel
+    
+    Returns:
+        time: array
+    """
+    
+    distance, vel, accel, v_start, v_end = np.broadcast_arrays(*[np.asarray(x, dtype = float) for x in (distance, vel, accel, v_start, v_end)])
+    vel = np.maximum(vel, 1e-9)
+    accel = np.maximum(accel, 1e-9)
+    # Highest speed reachable when accelerating then decelerating
+    peak2 = accel * distance + 0.5 * (v_start ** 2 + v_end ** 2)
+    peak = np.sqrt(peak2)
+    ramps = (2 * vel ** 2 - v_start ** 2 - v_end ** 2) / (2 * accel)
+    cruise = (vel - v_start) / accel + (vel - v_end) / accel + (distance - ramps) / vel
+    triangle = (2 * peak - v_start - v_end) / accel
+    # Too short to even change between the boundary speeds
+    ramp_only = 2 * distance / np.maximum(v_start + v_end, 1e-9)
+    short = 2 * accel * distance < np.abs(v_start ** 2 - v_end ** 2)
+    return np.where(short, ramp_only, np.where(peak >= vel, cruise, triangle))
+
+def _arc_length(start, via, end):
+    """ Internal function that returns lengths of circular arcs from start through via to end, (N, 3) arrays """
+    
+    a = via - start
+    b = end - start
+    n = np.cross(a, b)
+    n2 = np.einsum("ij,ij->i", n, n)
+    aa = np.einsum("ij,ij->i", a, a)
+    bb = np.einsum("ij,ij->i", b, b)
+    line = n2 <= 1e-18 + 1e-12 * aa * bb
+    n2 = np.where(line, 1.0, n2)
+    offset = (aa[:, None] * np.cross(b, n) + bb[:, None] * np.cross(n, a)) / (2 * n2[:, None])
+    radius = np.linalg.norm(offset, axis = 1)
+    # Angle from start to end, going the way through via
+    u = -offset
+    v = np.cross(n / np.sqrt(n2)[:, None], u)
+    d = end - start + u
+    angle = np.arctan2(np.einsum("ij,ij->i", d, v), np.einsum("ij,ij->i", d, u)) % (2 * np.pi)
+    return np.where(line, np.sqrt(bb), radius * angle)
+
+# ----- Estimate -----
+
+def _forward_fill(values, known, moved = None):
+    """
+    Internal function that replaces every row by the last row before it that moved (defaults to known rows).
+    Returns the filled values and whether they are known
+    """
+    
+    if moved is None:
+        moved = known
+    index = np.where(moved, np.arange(len(moved)), 0)
+    np.maximum.accumulate(index, out = index)
+    return values[index], known[index]
+
+def _resolve_relative(program, robot, start_joints):
+    """
+    Internal function that turns relative moves into absolute targets, in program order so that relative moves
+    can follow each other. Returns the targets and which ones are known
+    """
+    
+    kind = program["kind"]
+    target = program["target"].copy()
+    known = program["known"].copy()
+    for i in np.flatnonzero(program["relative"]):
+        b = program["base"][i]
+        if b < 0:
+            if start_joints is None:
+                continue
+            frame = batch_kinematics.forward_kinematics_batch([start_joints], robot)[0, -1]
+        elif not known[b]:
+            continue
+        elif kind[b] == MOVE_J:
+            frame = batch_kinematics.forward_kinematics_batch(target[b:b + 1], robot)[0, -1]
+        elif kind[b] in (MOVE_L, MOVE_C):
+            frame = rotations.poses_to_frames(target[b])
+        else:
+            continue
+        target[i] = rotations.frames_to_poses(np.dot(frame, rotations.poses_to_frames(target[i])))
+        known[i] = True
+    return target, known
+
+def estimate(program, robot = None, start_joints = None, axis_speed = 0.1, axis_accel = 0.5):
+    """
+    Function that estimates the execution time of every command of a program
+    
+    Args:
+        program: List of UR Script strings, or a dictionary returned by parse_script
+        robot: RobotModel. Joint limits and kinematics. If none specified, UR5 is assumed
+        start_joints: List of 6 joint angles where the program starts. If none specified, the first move is free
+        axis_speed: float. Linear axis speed in m/s
+        axis_accel: float. Linear axis accel in m/s^2
+    
+    Returns:
+        (times, total): (N,) array of seconds per line, and their sum. Moves to targets that are not known take
+            no time, and the position after them is not known either
+    """
+    
+    if not isinstance(program, dict):
+        program = parse_script(program)
+    if robot is None:
+        robot = robot_model.UR5
+    kind = program["kind"]
+    target, target_known = _resolve_relative(program, robot, start_joints)
+    accel = program["accel"]
+    vel = program["vel"]
+    n = len(kind)
+    times = np.where(kind == SLEEP, program["time"], 0.0)
+    if n == 0:
+        return times, 0.0
+    
+    tool = (kind == MOVE_L) | (kind == MOVE_C)
+    joint = kind == MOVE_J
+    axis = kind == MOVE_AXIS
+    # Tool position after every command, in m. movej targets go through forward kinematics
+    position = np.zeros((n + 1, 3))
+    known = np.zeros(n + 1, dtype = bool)
+    position[1:][tool] = target[tool, :3]
+    if joint.any():
+        position[1:][joint] = batch_kinematics.forward_kinematics_batch(target[joint], robot)[:, -1, :3, 3] / 1000.0
+    known[1:] = (tool | joint) & target_known
+    moved = np.ones(n + 1, dtype = bool)
+    moved[1:] = tool | joint
+    if start_joints is not None:
+        position[0] = batch_kinematics.forward_kinematics_batch([start_joints], robot)[0, -1, :3, 3] / 1000.0
+        known[0] = True
+    # Position before every command. It is not known after a move to an unknown target
+    before, before_known = _forward_fill(position, known, moved)
+    start = before[:-1]
+    # A move starts at its own target when the start is not known
+    start = np.where(before_known[:-1, None], start, position[1:])
+    
+    # ----- Tool moves
+    length = np.linalg.norm(target[:, :3] - start, axis = 1)
+    circular = (kind == MOVE_C) & target_known
+    if circular.any():
+        length[circular] = _arc_length(start[circular], program["via"][circular], target[circular, :3])
+    length[~target_known] = 0.0
+    # Blended tool moves hand over at the slower of both speeds
+    blended = tool[:-1] & tool[1:] & (program["blend"][:-1] > 0)
+    handover = np.where(blended, np.minimum(vel[:-1], vel[1:]), 0.0)
+    v_end = np.append(handover, 0.0)
+    v_start = np.insert(handover, 0, 0.0)
+    tool_time = trapezoid_time(length, vel, accel, np.minimum(v_start, vel), np.minimum(v_end, vel))
+    times = np.where(tool, tool_time, times)
+    
+    # ----- Joint moves. Joints before a movej come from the previous movej, or the closest IK solution after tool moves
+    if joint.any():
+        joints = np.zeros((n + 1, 6))
+        joints_known = np.zeros(n + 1, dtype = bool)
+        joints[1:][joint] = target[joint]
+        joints_known[1:] = joint & target_known
+        joint_moved = np.ones(n + 1, dtype = bool)
+        joint_moved[1:] = joint
+        if start_joints is not None:
+            joints[0] = start_joints
+            joints_known[0] = True
+        previous, previous_known = _forward_fill(joints, joints_known, joint_moved)
+        last_move = np.where(tool | joint, np.arange(n), -1)
+        np.maximum.accumulate(last_move, out = last_move)
+        index = np.flatnonzero(joint)
+        prior = np.where(index > 0, last_move[np.maximum(index - 1, 0)], -1)
+        from_tool = (prior >= 0) & tool[np.maximum(prior, 0)]
+        q_start = previous[index]
+        # Nothing is known after a tool move to an unknown target, or for a movej to an unknown target
+        has_start = previous_known[index] & target_known[index] & ~(from_tool & ~target_known[np.maximum(prior, 0)])
+        from_tool &= target_known[np.maximum(prior, 0)] & target_known[index]
+        if from_tool.any():
+            frames = np.tile(np.eye(4), (int(from_tool.sum()), 1, 1))
+            pose = target[prior[from_tool]]
+            frames[:, :3, :3] = rotations.axis_angle_to_matrix(pose[:, 3:])
+            frames[:, :3, 3] = pose[:, :3] * 1000.0
+            solutions, valid = batch_kinematics.inverse_kinematics_batch(frames, robot)
+            goal = target[index[from_tool]]
+            delta = np.abs((solutions - goal[:, None] + np.pi) % (2 * np.pi) - np.pi).max(axis = 2)
+            delta = np.where(valid, delta, np.inf)
+            best = np.argmin(delta, axis = 1)
+            solved = valid.any(axis = 1)
+            q_start[from_tool] = np.where(solved[:, None], goal + ((solutions[np.arange(len(best)), best] - goal + np.pi) % (2 * np.pi) - np.pi), q_start[from_tool])
+            has_start[from_tool] = solved | has_start[from_tool]
+        distance = np.abs(target[index] - np.where(has_start[:, None], q_start, target[index]))
+        joint_vel = np.minimum(vel[index, None], robot.max_joint_speed)
+        joint_accel = np.minimum(accel[index, None], robot.max_joint_accel)
+        times[index] = trapezoid_time(distance, joint_vel, joint_accel).max(axis = 1)
+    
+    # ----- Linear axis
+    if axis.any():
+        index = np.flatnonzero(axis)
+        axis_position = target[index, :2]
+        axis_start = np.vstack([axis_position[:1], axis_position[:-1]])
+        times[index] = trapezoid_time(np.abs(axis_position - axis_start), axis_speed, axis_accel).max(axis = 1)
+    return times, float(times.sum())
@@ -0,0 +1,471 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module contains a small pure Python geometry layer that stands in for Rhino.Geometry:
+    1) Vector3d, Point3d, Plane, Transform and Circle with the part of the RhinoCommon API the library uses
+    2) Lazy import of Rhino.Geometry and conversion, only when Rhino objects are passed in
+
+The classes follow RhinoCommon naming and value semantics (properties return copies), and accept
+any object with the same attributes, so Rhino points, vectors and planes can be passed in directly.
+"""
+
+
+import math
+
+# ----- Lazy Rhino import -----
+
+_rhino_geometry = None
+
+def rhino_geometry():
+    """
+    Function that imports Rhino.Geometry on first use
+    
+    Returns:
+        module: Rhino.Geometry, or None when running outside of Rhino
+    """
+    
+    global _rhino_geometry
+    if _rhino_geometry is None:
+        try:
+            import Rhino.Geometry as rg
+            _rhino_geometry = rg
+        except ImportError:
+            _rhino_geometry = False
+    return _rhino_geometry or None
+
+def is_rhino(obj):
+    """
+    Function that checks whether an object is a RhinoCommon object. Does not import Rhino
+    
+    Args:
+        obj: Any object
+    
+    Returns:
+        bool
+    """
+    
+    return getattr(type(obj), "__module__", "").startswith("Rhino")
+
+def to_rhino(obj):
+    """
+    Function that converts a geometry object of this module to its Rhino.Geometry equivalent
+    
+    Args:
+        obj: Vector3d, Point3d, Plane or Transform
+    
+    Returns:
+        obj: Rhino.Geometry object. Returned unchanged outside of Rhino or if it already is a Rhino object
+    """
+    
+    rg = rhino_geometry()
+    if rg is None or is_rhino(obj):
+        return obj
+    if isinstance(obj, Plane):
+        return rg.Plane(to_rhino(obj.Origin), to_rhino(obj.XAxis), to_rhino(obj.YAxis))
+    if isinstance(obj, Point3d):
+        return rg.Point3d(obj.X, obj.Y, obj.Z)
+    if isinstance(obj, Vector3d):
+        return rg.Vector3d(obj.X, obj.Y, obj.Z)
+    if isinstance(obj, Transform):
+        m = rg.Transform()
+        for i in range(4):
+            for j in range(4):
+                m[i, j] = obj[i, j]
+        return m
+    return obj
+
+def match(obj, reference):
+    """
+    Function that converts obj to Rhino.Geometry if reference is a Rhino object, so results
+    go back to the caller in the type they came in
+    
+    Args:
+        obj: Geometry object of this module
+        reference: Object passed in by the caller
+    
+    Returns:
+        obj: Rhino.Geometry or geometry object
+    """
+    
+    return to_rhino(obj) if is_rhino(reference) else obj
+
+class _classproperty(object):
+    """ Internal descriptor for static properties such as Plane.WorldXY """
+    
+    def __init__(self, function):
+        self.function = function
+    
+    def __get__(self, obj, cls):
+        return self.function(cls)
+
+# ----- Vectors and points -----
+
+class _Coordinates(object):
+    """ Internal base class that stores x, y and z in a list """
+    
+    __slots__ = ("_v",)
+    
+    def __init__(self, x = 0.0, y = 0.0, z = 0.0):
+        if hasattr(x, "X"):
+            self._v = [float(x.X), float(x.Y), float(x.Z)]
+        else:
+            self._v = [float(x), float(y), float(z)]
+    
+    def _get(i):
+        return property(lambda self: self._v[i], lambda self, value: self._v.__setitem__(i, float(value)))
+    X = _get(0)
+    Y = _get(1)
+    Z = _get(2)
+    del _get
+    
+    def __getitem__(self, i):
+        return self._v[i]
+    
+    def __setitem__(self, i, value):
+        self._v[i] = float(value)
+    
+    def __iter__(self):
+        return iter(self._v)
+    
+    def __eq__(self, other):
+        return hasattr(other, "X") and self._v == [other.X, other.Y, other.Z]
+    
+    def __ne__(self, other):
+        return not self.__eq__(other)
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return "%s,%s,%s" % tuple(self._v)
+    
+    def __neg__(self):
+        return type(self)(-self._v[0], -self._v[1], -self._v[2])
+    
+    def __truediv__(self, value):
+        return type(self)(self._v[0] / value, self._v[1] / value, self._v[2] / value)
+    
+    __div__ = __truediv__
+
+class Vector3d(_Coordinates):
+    """ Stand-in for Rhino.Geometry.Vector3d """
+    
+    __slots__ = ()
+    
+    @_classproperty
+    def XAxis(cls):
+        return cls(1.0, 0.0, 0.0)
+    
+    @_classproperty
+    def YAxis(cls):
+        return cls(0.0, 1.0, 0.0)
+    
+    @_classproperty
+    def ZAxis(cls):
+        return cls(0.0, 0.0, 1.0)
+    
+    @_classproperty
+    def Zero(cls):
+        return cls(0.0, 0.0, 0.0)
+    
+    @property
+    def Length(self):
+        x, y, z = self._v
+        return math.sqrt(x * x + y * y + z * z)
+    
+    @property
+    def IsZero(self):
+        return self._v == [0.0, 0.0, 0.0]
+    
+    def Unitize(self):
+        length = self.Length
+        if length == 0.0:
+            return False
+        self._v = [c / length for c in self._v]
+        return True
+    
+    def Reverse(self):
+        self._v = [-c for c in self._v]
+        return True
+    
+    def Rotate(self, angle, axis):
+        self._v = list(Transform.Rotation(angle, axis, Point3d(0, 0, 0)) * self)
+        return True
+    
+    def __add__(self, other):
+        return Vector3d(self._v[0] + other.X, self._v[1] + other.Y, self._v[2] + other.Z)
+    
+    def __sub__(self, other):
+        return Vector3d(self._v[0] - other.X, self._v[1] - other.Y, self._v[2] - other.Z)
+    
+    def __mul__(self, other):
+        # Vector * Vector is the dot product, as in RhinoCommon
+        if hasattr(other, "X"):
+            return self._v[0] * other.X + self._v[1] * other.Y + self._v[2] * other.Z
+        return Vector3d(self._v[0] * other, self._v[1] * other, self._v[2] * other)
+    
+    __rmul__ = __mul__
+    
+    @staticmethod
+    def CrossProduct(a, b):
+        return Vector3d(a.Y * b.Z - a.Z * b.Y, a.Z * b.X - a.X * b.Z, a.X * b.Y - a.Y * b.X)
+    
+    @staticmethod
+    def Multiply(a, b):
+        if hasattr(a, "X") and hasattr(b, "X"):
+            return a.X * b.X + a.Y * b.Y + a.Z * b.Z
+        if hasattr(a, "X"):
+            return Vector3d(a) * b
+        return Vector3d(b) * a
+    
+    @staticmethod
+    def VectorAngle(a, b):
+        a = Vector3d(a)
+        b = Vector3d(b)
+        if not (a.Unitize() and b.Unitize()):
+            return float("nan")
+        return math.acos(max(-1.0, min(1.0, a * b)))
+
+class Point3d(_Coordinates):
+    """ Stand-in for Rhino.Geometry.Point3d """
+    
+    __slots__ = ()
+    
+    @_classproperty
+    def Origin(cls):
+        return cls(0.0, 0.0, 0.0)
+    
+    def DistanceTo(self, other):
+        return (self - Point3d(other)).Length
+    
+    def __add__(self, other):
+        return Point3d(self._v[0] + other.X, self._v[1] + other.Y, self._v[2] + other.Z)
+    
+    def __sub__(self, other):
+        # Point - Point is a vector, Point - Vector a point, as in RhinoCommon
+        cls = Vector3d if isinstance(other, Point3d) or type(other).__name__ == "Point3d" else Point3d
+        return cls(self._v[0] - other.X, self._v[1] - other.Y, self._v[2] - other.Z)
+    
+    def __mul__(self, value):
+        return Point3d(self._v[0] * value, self._v[1] * value, self._v[2] * value)
+    
+    __rmul__ = __mul__
+
+# ----- Transform -----
+
+class Transform(object):
+    """ Stand-in for Rhino.Geometry.Transform. 4x4 matrix stored row by row in a flat list """
+    
+    __slots__ = ("_m",)
+    
+    def __init__(self, diagonal = 0.0):
+        if hasattr(diagonal, "M00"):
+            self._m = [float(diagonal[i, j]) for i in range(4) for j in range(4)]
+        else:
+            self._m = [float(diagonal) if i % 5 == 0 else 0.0 for i in range(16)]
+    
+    @_classproperty
+    def Identity(cls):
+        return cls(1.0)
+    
+    def __getitem__(self, index):
+        i, j = index
+        return self._m[4 * i + j]
+    
+    def __setitem__(self, index, value):
+        i, j = index
+        self._m[4 * i + j] = float(value)
+    
+    def __eq__(self, other):
+        return hasattr(other, "M00") and all(self[i, j] == other[i, j] for i in range(4) for j in range(4))
+    
+    def __ne__(self, other):
+        return not self.__eq__(other)
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return "R0=(%s,%s,%s,%s), R1=(%s,%s,%s,%s), R2=(%s,%s,%s,%s), R3=(%s,%s,%s,%s)" % tuple(self._m)
+    
+    def __mul__(self, other):
+        m = self._m
+        if hasattr(other, "M00"):
+            o = [other[i, j] for i in range(4) for j in range(4)]
+            result = Transform()
+            result._m = [m[4 * i] * o[j] + m[4 * i + 1] * o[4 + j] + m[4 * i + 2] * o[8 + j] + m[4 * i + 3] * o[12 + j]
+                for i in range(4) for j in range(4)]
+            return result
+        x, y, z = other.X, other.Y, other.Z
+        if isinstance(other, Vector3d) or type(other).__name__ == "Vector3d":
+            return Vector3d(m[0] * x + m[1] * y + m[2] * z, m[4] * x + m[5] * y + m[6] * z, m[8] * x + m[9] * y + m[10] * z)
+        w = m[12] * x + m[13] * y + m[14] * z + m[15]
+        return Point3d((m[0] * x + m[1] * y + m[2] * z + m[3]) / w,
+            (m[4] * x + m[5] * y + m[6] * z + m[7]) / w,
+            (m[8] * x + m[9] * y + m[10] * z + m[11]) / w)
+    
+    @staticmethod
+    def Translation(motion):
+        m = Transform(1.0)
+        m[0, 3] = motion.X
+        m[1, 3] = motion.Y
+        m[2, 3] = motion.Z
+        return m
+    
+    @staticmethod
+    def Rotation(angle, axis, center):
+        """ Rotation by angle (radians) about axis through center """
+        
+        a = Vector3d(axis)
+        a.Unitize()
+        x, y, z = a
+        c = math.cos(angle)
+        s = math.sin(angle)
+        t = 1.0 - c
+        m = Transform(1.0)
+        rows = ((t * x * x + c, t * x * y - s * z, t * x * z + s * y),
+            (t * x * y + s * z, t * y * y + c, t * y * z - s * x),
+            (t * x * z - s * y, t * y * z + s * x, t * z * z + c))
+        cx, cy, cz = center.X, center.Y, center.Z
+        for i in range(3):
+            m[i, 0], m[i, 1], m[i, 2] = rows[i]
+            m[i, 3] = (cx, cy, cz)[i] - (rows[i][0] * cx + rows[i][1] * cy + rows[i][2] * cz)
+        return m
+    
+    @staticmethod
+    def PlaneToPlane(plane0, plane1):
+        """ Transformation that maps plane0 onto plane1 """
+        
+        return _frame_matrix(plane1) * _inverse_frame_matrix(plane0)
+
+def _matrix_property(i, j):
+    """ Internal function that creates the M00 - M33 properties of Transform """
+    
+    return property(lambda self: self[i, j], lambda self, value: self.__setitem__((i, j), value))
+
+for _i in range(4):
+    for _j in range(4):
+        setattr(Transform, "M%d%d" % (_i, _j), _matrix_property(_i, _j))
+del _i, _j
+
+def _frame_matrix(plane):
+    """ Internal function that returns the transform from world XY to a plane """
+    
+    m = Transform(1.0)
+    for j, v in enumerate((plane.XAxis, plane.YAxis, plane.ZAxis, plane.Origin)):
+        m[0, j] = v.X
+        m[1, j] = v.Y
+        m[2, j] = v.Z
+    return m
+
+def _inverse_frame_matrix(plane):
+    """ Internal function that returns the transform from a plane to world XY """
+    
+    m = Transform(1.0)
+    o = plane.Origin
+    for i, v in enumerate((plane.XAxis, plane.YAxis, plane.ZAxis)):
+        m[i, 0] = v.X
+        m[i, 1] = v.Y
+        m[i, 2] = v.Z
+        m[i, 3] = -(v.X * o.X + v.Y * o.Y + v.Z * o.Z)
+    return m
+
+# ----- Plane -----
+
+class Plane(object):
+    """ Stand-in for Rhino.Geometry.Plane. Plane(plane) copies, Plane(origin, x_axis, y_axis) builds an orthonormal frame """
+    
+    __slots__ = ("_origin", "_x", "_y", "_z")
+    
+    def __init__(self, origin = None, x_axis = None, y_axis = None):
+        if origin is None:
+            origin = Point3d(0, 0, 0)
+            x_axis = Vector3d(1, 0, 0)
+            y_axis = Vector3d(0, 1, 0)
+        elif x_axis is None:
+            # Copy of another plane
+            origin, x_axis, y_axis = origin.Origin, origin.XAxis, origin.YAxis
+        self._set_frame(origin, x_axis, y_axis)
+    
+    def _set_frame(self, origin, x_axis, y_axis):
+        x = Vector3d(x_axis)
+        x.Unitize()
+        z = Vector3d.CrossProduct(x, y_axis)
+        z.Unitize()
+        self._origin = Point3d(origin)
+        self._x = x
+        self._y = Vector3d.CrossProduct(z, x)
+        self._z = z
+    
+    @_classproperty
+    def WorldXY(cls):
+        return cls()
+    
+    @_classproperty
+    def WorldYZ(cls):
+        return cls(Point3d(0, 0, 0), Vector3d(0, 1, 0), Vector3d(0, 0, 1))
+    
+    @_classproperty
+    def WorldZX(cls):
+        return cls(Point3d(0, 0, 0), Vector3d(0, 0, 1), Vector3d(1, 0, 0))
+    
+    def _get_origin(self):
+        return Point3d(self._origin)
+    
+    def _set_origin(self, value):
+        self._origin = Point3d(value)
+    
+    Origin = property(_get_origin, _set_origin)
+    OriginX = property(lambda self: self._origin.X)
+    OriginY = property(lambda self: self._origin.Y)
+    OriginZ = property(lambda self: self._origin.Z)
+    XAxis = property(lambda self: Vector3d(self._x))
+    YAxis = property(lambda self: Vector3d(self._y))
+    ZAxis = property(lambda self: Vector3d(self._z))
+    Normal = ZAxis
+    
+    def __eq__(self, other):
+        return (hasattr(other, "XAxis") and self._origin == other.Origin and self._x == other.XAxis
+            and self._y == other.YAxis and self._z == other.ZAxis)
+    
+    def __ne__(self, other):
+        return not self.__eq__(other)
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return "Origin=%r XAxis=%r, YAxis=%r, ZAxis=%r" % (self._origin, self._x, self._y, self._z)
+    
+    def PointAt(self, u, v, w = 0.0):
+        return self._origin + self._x * u + self._y * v + self._z * w
+    
+    def Transform(self, xform):
+        origin = xform * self._origin
+        self._set_frame(origin, xform * self._x, xform * self._y)
+        return True
+    
+    def Translate(self, delta):
+        self._origin = self._origin + delta
+        return True
+    
+    def Rotate(self, angle, axis, center = None):
+        return self.Transform(Transform.Rotation(angle, axis, self._origin if center is None else center))
+
+# ----- Circle -----
+
+class Circle(object):
+    """ Stand-in for Rhino.Geometry.Circle """
+    
+    def __init__(self, plane, radius):
+        self.Plane = Plane(plane)
+        self.Radius = float(radius)
+    
+    Center = property(lambda self: self.Plane.Origin)
+    Normal = property(lambda self: self.Plane.Normal)
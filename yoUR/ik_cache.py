@@ -0,0 +1,235 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module keeps inverse kinematics results in a persistent cache on disk.
+The key is the quantized target plane, the base plane, the DH table and the branch choice.
+The cache file is memory-mapped, so several processes (e.g. Grasshopper and a script) can share it.
+It is a hash table of buckets with 8 entries each. A full bucket drops its least recently used entry,
+so the file never grows beyond its capacity.
+Every entry carries a checksum. An entry half-written by another process reads as a miss, never as wrong joints.
+"""
+
+
+from . import kinematics
+from . import robot_model
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+
+# ----- File layout -----
+
+_MAGIC = b"yoURIK01"
+# magic, capacity, clock, hits, misses
+_HEADER = struct.Struct("<8sQQQQ")
+_HEADER_SIZE = 64
+# digest, last use, checksum, joints
+_SLOT = struct.Struct("<16sQI6d")
+_SLOT_SIZE = 80
+# Entries per bucket
+WAYS = 8
+
+class IKCache(object):
+    """
+    Class for a persistent inverse kinematics cache
+    
+    Args:
+        path: String. Cache file. Created if missing, an existing cache keeps its capacity
+        capacity: int. Number of entries in a new cache file
+        resolution: float. Target and base origins are rounded to this in mm
+        axis_resolution: float. Target and base axis components are rounded to this
+    """
+    
+    def __init__(self, path, capacity = 1<<16, resolution = 0.001, axis_resolution = 1e-6):
+        self.path = path
+        self.resolution = resolution
+        self.axis_resolution = axis_resolution
+        self.hits = 0
+        self.misses = 0
+        
+        capacity = max(WAYS, (capacity + WAYS - 1) // WAYS * WAYS)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, capacity, 0, 0, 0).ljust(_HEADER_SIZE, b"\0"))
+                f.truncate(_HEADER_SIZE + capacity * _SLOT_SIZE)
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, self.capacity = _HEADER.unpack_from(self._map, 0)[:2]
+        if magic != _MAGIC or len(self._map) != _HEADER_SIZE + self.capacity * _SLOT_SIZE:
+            self.close()
+            raise ValueError("Not an IK cache file: %s" % path)
+        self._buckets = self.capacity // WAYS
+    
+    # ----- Keys -----
+    
+    def _plane_key(self, plane):
+        """ Internal function that quantizes a plane """
+        
+        r = self.resolution
+        a = self.axis_resolution
+        o, x, y = plane.Origin, plane.XAxis, plane.YAxis
+        return struct.pack("<9q", int(round(o.X / r)), int(round(o.Y / r)), int(round(o.Z / r)),
+            int(round(x.X / a)), int(round(x.Y / a)), int(round(x.Z / a)),
+            int(round(y.X / a)), int(round(y.Y / a)), int(round(y.Z / a)))
+    
+    def key(self, target_pose, base, dh_parameters, right_hand = True, wrist_up = False, elbow_up = False):
+        """
+        Function that returns the 16 byte cache key of an IK query
+        
+        Args:
+            see kinematics.inverse_kinematics
+        
+        Returns:
+            digest: bytes
+        """
+        
+        dh = robot_model.dh_table(dh_parameters)
+        table = struct.pack("<%dd" % (4 * len(dh)), *[float(v) for row in dh for v in row])
+        branch = struct.pack("<3?", bool(right_hand), bool(wrist_up), bool(elbow_up))
+        data = self._plane_key(target_pose) + self._plane_key(base) + table + branch
+        return hashlib.sha1(data).digest()[:16]
+    
+    # ----- Storage -----
+    
+    def _bucket(self, digest):
+        """ Internal function that returns the offset of the first slot of a bucket """
+        
+        index = struct.unpack("<Q", digest[:8])[0] % self._buckets
+        return _HEADER_SIZE + index * WAYS * _SLOT_SIZE
+    
+    def _tick(self, counter):
+        """ Internal function that increments a header counter (1 clock, 2 hits, 3 misses) and returns it """
+        
+        offset = 8 + 8 * counter
+        value = struct.unpack_from("<Q", self._map, offset)[0] + 1
+        struct.pack_into("<Q", self._map, offset, value)
+        return value
+    
+    def get(self, digest):
+        """
+        Function that looks up a key
+        
+        Args:
+            digest: bytes. Key from IKCache.key
+        
+        Returns:
+            joints: List of 6 joint angles, or None on a miss
+        """
+        
+        start = self._bucket(digest)
+        for offset in range(start, start + WAYS * _SLOT_SIZE, _SLOT_SIZE):
+            stored, used, checksum = _SLOT.unpack_from(self._map, offset)[:3]
+            if used and stored == digest:
+                joints = _SLOT.unpack_from(self._map, offset)[3:]
+                if checksum == _checksum(digest, joints):
+                    struct.pack_into("<Q", self._map, offset + 16, self._tick(1))
+                    self.hits += 1
+                    self._tick(2)
+                    return list(joints)
+        self.misses += 1
+        self._tick(3)
+        return None
+    
+    def put(self, digest, joints):
+        """
+        Function that stores joints under a key, replacing the least recently used entry of a full bucket
+        
+        Args:
+            digest: bytes. Key from IKCache.key
+            joints: List of 6 joint angles
+        """
+        
+        start = self._bucket(digest)
+        target = None
+        oldest = None
+        for offset in range(start, start + WAYS * _SLOT_SIZE, _SLOT_SIZE):
+            stored, used = _SLOT.unpack_from(self._map, offset)[:2]
+            if stored == digest or not used:
+                target = offset
+                break
+            if oldest is None or used < oldest:
+                oldest, target = used, offset
+        joints = [float(j) for j in joints]
+        # Mark unused while writing, so other processes skip the entry
+        struct.pack_into("<Q", self._map, target + 16, 0)
+        _SLOT.pack_into(self._map, target, digest, 0, _checksum(digest, joints), *joints)
+        struct.pack_into("<Q", self._map, target + 16, self._tick(1))
+    
+    # ----- Interface -----
+    
+    def inverse_kinematics(self, target_pose, base, dh_parameters, right_hand = True, wrist_up = False, elbow_up = False):
+        """
+        Function that returns joint angles given a target_pose, from the cache when possible
+        
+        Args:
+            see kinematics.inverse_kinematics
+        
+        Returns:
+            joints: A list of joint angles in radians
+        """
+        
+        digest = self.key(target_pose, base, dh_parameters, right_hand, wrist_up, elbow_up)
+        joints = self.get(digest)
+        if joints is None:
+            joints = kinematics.inverse_kinematics(target_pose, base, dh_parameters, right_hand, wrist_up, elbow_up)
+            self.put(digest, joints)
+        return joints
+    
+    def stats(self):
+        """
+        Function that returns cache statistics
+        
+        Returns:
+            stats: Dictionary with hits, misses and hit_rate of this instance, shared_hits and shared_misses of all
+            processes using the file, entries and capacity
+        """
+        
+        shared_hits, shared_misses = struct.unpack_from("<QQ", self._map, 24)
+        entries = sum(1 for offset in range(_HEADER_SIZE, len(self._map), _SLOT_SIZE)
+            if struct.unpack_from("<Q", self._map, offset + 16)[0])
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": float(self.hits) / lookups if lookups else 0.0,
+            "shared_hits": shared_hits, "shared_misses": shared_misses, "entries": entries, "capacity": self.capacity}
+    
+    def clear(self):
+        """ Function that removes all entries and resets the statistics """
+        
+        self._map[8:] = b"\0" * (len(self._map) - 8)
+        struct.pack_into("<Q", self._map, 8, self.capacity)
+        self.hits = 0
+        self.misses = 0
+    
+    def flush(self):
+        """ Function that writes changes to disk """
+        
+        self._map.flush()
+    
+    def close(self):
+        """ Function that flushes and closes the cache file """
+        
+        if getattr(self, "_map", None) is not None:
+            self._map.flush()
+            self._map.close()
+            self._map = None
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
+
+def _checksum(digest, joints):
+    """ Internal function that returns the checksum of an entry """
+    
+    return zlib.crc32(digest + struct.pack("<6d", *joints)) & 0xffffffff
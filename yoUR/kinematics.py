@@ -14,8 +14,10 @@ This module contains functions that are used for kinematics
 """
 
 
-import utils
-import Rhino.Geometry as rg
+from . import utils
+from . import robot_model
+# Rhino-free stand-in for Rhino.Geometry. Rhino objects that are passed in are read through the same attributes
+from . import geometry as rg
 import math
 
 def forward_kinematics(joints, base, dh_parameters):
@@ -25,13 +27,14 @@ def forward_kinematics(joints, base, dh_parameters):
     Args:
         base: Plane. frame 0 
         joints: List of angles. joint angle in radians
-        dh_parameters: Tuple of (joint_distance, joint_angle, link_length, link_twist). This is the Denavit Hartenberg parameter table. 
+        dh_parameters: RobotModel or tuple of (joint_distance, joint_angle, link_length, link_twist). This is the Denavit Hartenberg parameter table. 
     
     Returns:
-        frames: A list of plane (frames)
+        frames: A list of plane (frames). Rhino planes if base is a Rhino plane
     """
     
-    _matrices_fk = [utils.dh_matrix(dh) for dh in dh_parameters]
+    _matrices_fk = _link_transforms(dh_parameters)
+    dh_parameters = robot_model.dh_table(dh_parameters)
     
     #Set base frame
     frame_0 = rg.Plane.WorldXY
@@ -46,7 +49,23 @@ def forward_kinematics(joints, base, dh_parameters):
         _p.Transform(_m)
         frames_fk.append(_p)
     
-    return frames_fk
+    return [rg.match(f, base) for f in frames_fk]
+
+
+def _link_transforms(dh_parameters):
+    """ Internal function that returns the link transforms at zero joint angles, from the RobotModel if one is given """
+    
+    if not hasattr(dh_parameters, "link_matrix"):
+        return [utils.dh_matrix(dh) for dh in dh_parameters]
+    transforms = []
+    for i in range(len(dh_parameters.dh_parameters)):
+        rows = dh_parameters.link_matrix(i, 0.0)
+        m = rg.Transform()
+        for r in range(4):
+            for c in range(4):
+                m[r, c] = rows[r][c]
+        transforms.append(m)
+    return transforms
 
 
 def inverse_kinematics(target_pose, base, dh_parameters, right_hand = True, wrist_up = False, elbow_up = False):
@@ -57,15 +76,21 @@ def inverse_kinematics(target_pose, base, dh_parameters, right_hand = True, wris
     Args:
         base: Plane. robot base
         target_pose: Plane. target frame 
-        dh_parameters: Tuple of (joint_distance, joint_angle, link_length, link_twist). This is the Denavit Hartenberg parameter table. 
+        dh_parameters: RobotModel or tuple of (joint_distance, joint_angle, link_length, link_twist). This is the Denavit Hartenberg parameter table. 
         right_hand: Boolean. Choose between right or left hand solution
         wrist_up: Boolean. Choose between wrist up or down solution
         elbow_down: Boolean. Choose between elbow up or down solution 
     
     Returns:
         joints: A list of joint angles in radians
+    
+    Note:
+        batch_kinematics.inverse_kinematics_batch returns all 8 solutions for many poses at once
     """
     
+    # Work on a copy so the caller's DH table is left untouched
+    dh_parameters = [list(dh) for dh in robot_model.dh_table(dh_parameters)]
+    
     _m_target_to_robot = rg.Transform.PlaneToPlane(base, rg.Plane.WorldXY)
     _pose = rg.Plane(target_pose)
     _pose.Transform(_m_target_to_robot)
@@ -107,9 +132,8 @@ def inverse_kinematics(target_pose, base, dh_parameters, right_hand = True, wris
     frame1_t = rg.Plane(frame1)
     frame1_t.Translate(frame1.Normal * (dh_parameters[1][0] + dh_parameters[3][0])) # d2 and d4
     v_f1t = rg.Vector3d(frame1_t.Origin)
-    x_line = rg.Intersect.Intersection.PlanePlane(frame5_target,frame1_t)[1]
-    
-    frame4_z = x_line.Direction
+    # Direction of the intersection line of both planes. Its sign is fixed by wrist_up below
+    frame4_z = rg.Vector3d.CrossProduct(frame5_target.Normal, frame1_t.Normal)
     if wrist_up and frame4_z.Z < 0: 
         frame4_z.Reverse() 
     elif not wrist_up and frame4_z.Z > 0: 
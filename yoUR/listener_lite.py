@@ -162,11 +162,9 @@ class ListenForm(Form):
         self._timer1.Enabled = False
 
 import scriptcontext
-import socket
 import traceback
-import struct
-
-##note need to open socket once only
+from yoUR import comm
+from yoUR import realtime
 
 class ListenFormController():
 
@@ -177,23 +175,28 @@ class ListenFormController():
         # Geometry stuff
         self.myPoint = Rhino.Geometry.Point3d(0,0,0)
         self.prevPoint = Rhino.Geometry.Point3d(0,0,0)
+        # One connection, kept open and read on a background thread
+        self.client = None
         
     #Event handlers
     def OnFormClosed(self, sender, e):
+        if self.client:
+            self.client.stop()
         print("control off")
 
     def listen(self,id):
-        mySocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         HOST = "192.168.10.%s3"%(id)
         try:
-            mySocket.settimeout(1)
-            mySocket.connect((HOST,30003))
-            # message size on Matlab interface is 756
-            bytes = mySocket.recv(756)
-            tool_vector = bytes[588:636]
-            pose = struct.unpack("!dddddd",tool_vector)
+            if self.client is None or self.client.robot_ip != HOST:
+                if self.client:
+                    self.client.stop()
+                self.client = comm.RealtimeClient(HOST)
+                self.client.start()
+            bytes = self.client.latest()[0]
+            if bytes is None:
+                return
+            pose = realtime.get_layout(len(bytes)).field(bytes, "tool_vector")
             self.update_position(pose[0],pose[1],pose[2])
-            mySocket.close()
         except:
             # add exception
             traceback.print_exc()
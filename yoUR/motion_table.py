@@ -0,0 +1,138 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module emits dense linear motions as pose tables instead of one movel line per waypoint.
+Waypoints are written as compact URScript list literals and run by a small URScript loop, which keeps
+the program small and quick for the controller to parse. The motion is the same as with ur_standard.move_l.
+"""
+
+
+import numpy as np
+
+from . import batch_kinematics
+from . import rotations
+from . import ur_standard
+
+# URScript helpers that run a pose table. One version for constant a/v/r, one for per waypoint values
+TABLE_FUNCTIONS = """def your_movel_poses(poses, n, a, v, r):
+  i = 0
+  while i < n:
+    movel(poses[i], a = a, v = v, r = r)
+    i = i + 1
+  end
+end
+def your_movel_table(poses, n, a, v, r):
+  i = 0
+  while i < n:
+    movel(poses[i], a = a[i], v = v[i], r = r[i])
+    i = i + 1
+  end
+end
+"""
+
+# ----- Formatting -----
+
+def _number(value, digits = 4):
+    """ Internal function that formats a number with trailing zeros removed """
+    
+    text = ("%%.%df" % digits) % value
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text in ("-0", "") else text
+
+def _pose_list(poses):
+    """ Internal function that formats (N, 6) poses as a URScript list of pose literals """
+    
+    return "[" + ",".join("p[" + ",".join(_number(v) for v in pose) + "]" for pose in poses) + "]"
+
+def _value_list(values):
+    """ Internal function that formats numbers as a URScript list """
+    
+    return "[" + ",".join(_number(v) for v in values) + "]"
+
+def as_poses(targets):
+    """
+    Function that returns UR pose vectors for planes, 4x4 frames (mm) or UR poses
+    
+    Args:
+        targets: List of planes, (N, 4, 4) frames in mm or (N, 6) UR poses [x, y, z, rx, ry, rz] in m
+    
+    Returns:
+        poses: (N, 6) array
+    """
+    
+    if len(targets) and hasattr(targets[0], "XAxis"):
+        return rotations.frames_to_poses(batch_kinematics.as_matrices(targets))
+    targets = np.asarray(targets, dtype=float)
+    if targets.shape[-2:] == (4, 4):
+        return rotations.frames_to_poses(targets)
+    return targets.reshape(-1, 6)
+
+# ----- Emission -----
+
+def iter_move_l_table(targets, accel, vel, blend = 0, robot = None, chunk_size = 500, define = True):
+    """
+    Generator that yields UR script for linear movements through many waypoints as pose tables.
+    Can be passed straight to comm.iter_script / comm.write_script
+    
+    Args:
+        targets: List of planes, (N, 4, 4) frames in mm or (N, 6) UR poses in m (in UR base coordinate system)
+        accel: tool accel in m/s^2. A number or one value per waypoint
+        vel: tool speed in m/s. A number or one value per waypoint
+        blend: blend radius in m. A number or one value per waypoint
+        robot: RobotModel. Optional, limits accel and vel to the model
+        chunk_size: int. Waypoints per list literal, keeps every URScript list short
+        define: Boolean. Emit the table functions. Only needed once per program
+    
+    Yields:
+        script: UR script parts
+    """
+    
+    poses = as_poses(targets)
+    n = len(poses)
+    if robot is not None:
+        max_accel, max_velocity = robot.max_accel, robot.max_velocity
+    else:
+        max_accel, max_velocity = ur_standard.MAX_ACCEL, ur_standard.MAX_VELOCITY
+    # Check acceleration and velocity are non-negative and below a set limit
+    accel = np.broadcast_to(np.minimum(np.abs(np.asarray(accel, dtype=float)), max_accel), (n,))
+    vel = np.broadcast_to(np.minimum(np.abs(np.asarray(vel, dtype=float)), max_velocity), (n,))
+    blend = np.broadcast_to(np.asarray(blend, dtype=float), (n,))
+    constant = all((v == v[0]).all() for v in (accel, vel, blend)) if n else True
+    
+    if define:
+        yield TABLE_FUNCTIONS
+    for start in range(0, n, chunk_size):
+        stop = min(start + chunk_size, n)
+        # URScript fixes the length of a list when it is first assigned, so every length gets its own variable
+        name = "your_poses_%d" % (stop - start)
+        yield "%s = %s\n" % (name, _pose_list(poses[start:stop]))
+        if constant:
+            yield "your_movel_poses(%s, %d, %s, %s, %s)\n" % (name,
+                stop - start, _number(accel[0], 2), _number(vel[0], 2), _number(blend[0]))
+        else:
+            yield "your_movel_table(%s, %d, %s, %s, %s)\n" % (name, stop - start,
+                _value_list(accel[start:stop]), _value_list(vel[start:stop]), _value_list(blend[start:stop]))
+
+def move_l_table(targets, accel, vel, blend = 0, robot = None, chunk_size = 500, define = True):
+    """
+    Function that returns UR script for linear movements through many waypoints as pose tables.
+    Same motion as one ur_standard.move_l per waypoint, at a fraction of the program size
+    
+    Args:
+        see iter_move_l_table
+    
+    Returns:
+        script: UR script
+    """
+    
+    return "".join(iter_move_l_table(targets, accel, vel, blend, robot, chunk_size, define))
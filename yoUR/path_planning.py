@@ -0,0 +1,191 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module contains path level planning functions:
+    1) Inverse kinematics branch selection along a toolpath
+    2) Singularity and joint speed screening of a toolpath
+"""
+
+
+import numpy as np
+import math
+
+from . import batch_kinematics
+
+# ----- Branch selection -----
+
+def _angle_diff(a, b):
+    """ Internal function that returns the shortest signed angle from b to a """
+    
+    return np.remainder(a - b + np.pi, 2 * np.pi) - np.pi
+
+def transition_costs(solutions, valid, weights = None):
+    """
+    Function that returns the weighted joint motion between every pair of branches of consecutive waypoints
+    
+    Args:
+        solutions: (N, B, 6) array of joint angles in radians. B branches per waypoint
+        valid: (N, B) boolean array. Invalid branches get an infinite cost
+        weights: List of 6 floats. Weight of each joint. Defaults to 1 for all joints
+    
+    Returns:
+        costs: (N - 1, B, B) array. costs[i, a, b] is the cost from branch a at waypoint i to branch b at waypoint i + 1
+    """
+    
+    weights = np.ones(6) if weights is None else np.asarray(weights, dtype=float)
+    q_from = solutions[:-1, :, None, :]
+    q_to = solutions[1:, None, :, :]
+    
+    # Accumulate joint by joint to keep the temporary arrays small
+    costs = np.zeros((solutions.shape[0] - 1, solutions.shape[1], solutions.shape[1]))
+    for j in range(solutions.shape[2]):
+        costs += weights[j] * np.abs(_angle_diff(q_to[..., j], q_from[..., j]))
+    costs[~(valid[:-1, :, None] & valid[1:, None, :])] = np.inf
+    return costs
+
+def select_branches(solutions, valid, weights = None, start = None, max_step = math.radians(30)):
+    """
+    Function that picks one inverse kinematics branch per waypoint so that the total weighted joint motion
+    along the path is minimal. Uses dynamic programming over the waypoint x branch lattice.
+    
+    Args:
+        solutions: (N, B, 6) array of joint angles in radians, e.g. from batch_kinematics.inverse_kinematics_batch
+        valid: (N, B) boolean array. Mask of branches that have a solution
+        weights: List of 6 floats. Weight of each joint. Defaults to 1 for all joints
+        start: List of 6 joint angles. Current robot joints. If given, the motion to the first waypoint is included
+        max_step: float. Largest joint change in radians between waypoints that is not treated as a reconfiguration
+    
+    Returns:
+        joints: (N, 6) array. Selected joint angles, unwrapped so that consecutive waypoints are continuous
+        branches: (N,) int array. Selected branch index per waypoint
+        reconfigurations: int array. Indices of waypoints that can only be reached with a joint jump above max_step
+    """
+    
+    solutions = np.asarray(solutions, dtype=float)
+    valid = np.asarray(valid, dtype=bool)
+    n, num_branches = valid.shape
+    weights = np.ones(6) if weights is None else np.asarray(weights, dtype=float)
+    
+    unreachable = np.flatnonzero(~valid.any(axis = 1))
+    if len(unreachable):
+        raise ValueError("Waypoints out of reach: %s" % unreachable[:10].tolist())
+    
+    # Cost to reach every branch of the first waypoint
+    if start is None:
+        acc = np.zeros(num_branches)
+    else:
+        acc = (weights * np.abs(_angle_diff(solutions[0], np.asarray(start, dtype=float)))).sum(axis = 1)
+    acc[~valid[0]] = np.inf
+    
+    # Forward pass
+    costs = transition_costs(solutions, valid, weights)
+    back = np.empty((n - 1, num_branches), dtype = np.intp)
+    for i in range(n - 1):
+        total = acc[:, None] + costs[i]
+        back[i] = total.argmin(axis = 0)
+        acc = total[back[i], np.arange(num_branches)]
+    
+    # Backtrack the cheapest sequence
+    branches = np.empty(n, dtype = np.intp)
+    branches[-1] = acc.argmin()
+    for i in range(n - 2, -1, -1):
+        branches[i] = back[i, branches[i + 1]]
+    
+    joints = solutions[np.arange(n), branches]
+    if start is not None:
+        joints = np.unwrap(np.vstack((start, joints)), axis = 0)[1:]
+    else:
+        joints = np.unwrap(joints, axis = 0)
+    
+    steps = np.abs(np.diff(joints, axis = 0)).max(axis = 1)
+    reconfigurations = np.flatnonzero(steps > max_step) + 1
+    if start is not None and np.abs(joints[0] - start).max() > max_step:
+        reconfigurations = np.concatenate(([0], reconfigurations))
+    return joints, branches, reconfigurations
+
+def plan_joint_path(target_poses, dh_parameters, base = None, tool = None, weights = None, start = None, max_step = math.radians(30)):
+    """
+    Function that solves all inverse kinematics branches of a toolpath and selects the sequence with the least joint motion
+    
+    Args:
+        target_poses: List of planes or (N, 4, 4) array. Tool frames along the path
+        dh_parameters: RobotModel or tuple of (joint_distance, joint_angle, link_length, link_twist) for each link. in mm and radians
+        base: Plane or (4, 4) array. Robot base. Defaults to world XY
+        tool: (4, 4) array. Tool frame relative to the flange. Defaults to identity
+        weights: List of 6 floats. Weight of each joint
+        start: List of 6 joint angles. Current robot joints
+        max_step: float. Largest joint change in radians that is not treated as a reconfiguration
+    
+    Returns:
+        joints, branches, reconfigurations: see select_branches
+    """
+    
+    solutions, valid = batch_kinematics.inverse_kinematics_batch(target_poses, dh_parameters, base, tool)
+    return select_branches(solutions, valid, weights, start, max_step)
+
+# ----- Singularity screening -----
+
+def segment_times(frames, vel):
+    """
+    Function that returns the time a linear move at tool speed vel needs between consecutive tool frames.
+    Like movel, the speed applies to the larger of the travel (m) and the tool rotation (rad)
+    
+    Args:
+        frames: (N, 4, 4) array. Tool frames in mm
+        vel: float. tool speed in m/s
+    
+    Returns:
+        times: (N - 1,) array in s
+    """
+    
+    distance = np.linalg.norm(np.diff(frames[:, :3, 3], axis = 0), axis = 1) / 1000.0
+    relative = np.matmul(np.swapaxes(frames[:-1, :3, :3], 1, 2), frames[1:, :3, :3])
+    cos_angle = (np.trace(relative, axis1 = 1, axis2 = 2) - 1.0) / 2.0
+    angle = np.arccos(np.clip(cos_angle, -1.0, 1.0))
+    return np.maximum(distance, angle) / abs(vel)
+
+def screen_path(joints, dh_parameters, vel, max_joint_speed = None, min_manipulability = 1e-3, base = None):
+    """
+    Function that checks a joint path before it is sent as linear moves. A segment is marked when the joints
+    would need to turn faster than their speed limit to keep the tool speed vel, or when it touches a sample
+    with a manipulability below min_manipulability (close to a singularity)
+    
+    Args:
+        joints: (N, 6) array of joint angles in radians along the path, e.g. from select_branches
+        dh_parameters: RobotModel or tuple of (joint_distance, joint_angle, link_length, link_twist) for each link
+        vel: float. tool speed in m/s
+        max_joint_speed: List of 6 joint speeds in rad/s. Defaults to the limits of the RobotModel, or pi
+        min_manipulability: float. Smallest accepted manipulability index
+        base: Plane or (4, 4) array. Robot base. Defaults to world XY
+    
+    Returns:
+        manipulability: (N,) array. Manipulability index of every sample
+        joint_speed: (N - 1, 6) array. Joint speed in rad/s each segment needs
+        bad_segments: int array. Index i marks the segment from sample i to sample i + 1
+    """
+    
+    joints = np.asarray(joints, dtype=float)
+    if max_joint_speed is None:
+        max_joint_speed = getattr(dh_parameters, "max_joint_speed", (math.pi,) * 6)
+    max_joint_speed = np.asarray(max_joint_speed, dtype=float)
+    
+    frames = batch_kinematics.forward_kinematics_batch(joints, dh_parameters, base)
+    w = batch_kinematics.manipulability(batch_kinematics.jacobian_batch(joints, dh_parameters, frames = frames))
+    
+    times = segment_times(frames[:, -1], vel)
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        joint_speed = np.abs(np.diff(joints, axis = 0)) / times[:, None]
+    joint_speed[np.isnan(joint_speed)] = 0.0
+    
+    near_singular = w < min_manipulability
+    bad = (joint_speed > max_joint_speed).any(axis = 1) | near_singular[:-1] | near_singular[1:]
+    return w, joint_speed, np.flatnonzero(bad)
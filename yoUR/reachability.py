@@ -0,0 +1,226 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module contains a precomputed reachability index of a robot workspace.
+The workspace is split into voxels and every voxel into tool direction bins. Each cell stores
+the fraction of sampled orientations that have an IK solution and the branch that was most often valid.
+The index is built offline once per robot model and queried in O(1) per target.
+"""
+
+
+import numpy as np
+import math
+
+from . import batch_kinematics
+from . import robot_model
+
+# ----- Orientation bins -----
+
+def _direction_bins(directions, num_azimuth, num_polar):
+    """ Internal function that returns the bin index of unit tool z directions (N, 3) """
+    
+    polar = np.arccos(np.clip(directions[:, 2], -1.0, 1.0))
+    azimuth = np.arctan2(directions[:, 1], directions[:, 0])
+    i_polar = np.minimum((polar / math.pi * num_polar).astype(np.intp), num_polar - 1)
+    i_azimuth = np.minimum(((azimuth + math.pi) / (2 * math.pi) * num_azimuth).astype(np.intp), num_azimuth - 1)
+    return i_polar * num_azimuth + i_azimuth
+
+def _bin_directions(num_azimuth, num_polar):
+    """ Internal function that returns the center direction of every bin as (num_polar * num_azimuth, 3) """
+    
+    polar = (np.arange(num_polar) + 0.5) / num_polar * math.pi
+    azimuth = (np.arange(num_azimuth) + 0.5) / num_azimuth * 2 * math.pi - math.pi
+    polar, azimuth = np.meshgrid(polar, azimuth, indexing = "ij")
+    return np.stack((np.sin(polar) * np.cos(azimuth), np.sin(polar) * np.sin(azimuth), np.cos(polar)), axis = -1).reshape(-1, 3)
+
+def _frames_from_directions(points, directions, spin):
+    """ Internal function that builds tool frames with z along directions, rotated by spin about z """
+    
+    z = directions
+    helper = np.where(np.abs(z[:, 2:3]) < 0.9, [[0.0, 0.0, 1.0]], [[1.0, 0.0, 0.0]])
+    x = np.cross(helper, z)
+    x /= np.linalg.norm(x, axis = 1)[:, None]
+    y = np.cross(z, x)
+    c = np.cos(spin)[:, None]
+    s = np.sin(spin)[:, None]
+    x, y = c * x + s * y, c * y - s * x
+    
+    frames = np.zeros((len(points), 4, 4))
+    frames[:, :3, 0] = x
+    frames[:, :3, 1] = y
+    frames[:, :3, 2] = z
+    frames[:, :3, 3] = points
+    frames[:, 3, 3] = 1.0
+    return frames
+
+# ----- Reachability index -----
+
+class ReachabilityIndex(object):
+    """
+    Voxel x orientation bin reachability index of one robot model. Coordinates are in the robot base frame, in mm.
+    
+    Args:
+        origin: List of 3 floats. Lower corner of the voxel grid
+        voxel_size: float. Edge length of a voxel
+        shape: Tuple of 3 ints. Number of voxels along x, y and z
+        num_azimuth: int. Number of azimuth bins of the tool z direction
+        num_polar: int. Number of polar bins of the tool z direction
+        score: (X, Y, Z, num_polar * num_azimuth) uint8 array. Reachable fraction scaled to 0 - 255
+        branch: (X, Y, Z, num_polar * num_azimuth) int8 array. Most often valid IK branch, -1 if none
+        model_name: String. Name of the robot model the index was built for
+    """
+    
+    def __init__(self, origin, voxel_size, shape, num_azimuth, num_polar, score, branch, model_name = ""):
+        self.origin = np.asarray(origin, dtype=float)
+        self.voxel_size = float(voxel_size)
+        self.shape = tuple(int(v) for v in shape)
+        self.num_azimuth = int(num_azimuth)
+        self.num_polar = int(num_polar)
+        self.score = score
+        self.branch = branch
+        self.model_name = model_name
+    
+    @classmethod
+    def build(cls, model, voxel_size = 50.0, num_azimuth = 8, num_polar = 4, samples_per_cell = 4, extent = None, seed = 0, chunk_size = 200000):
+        """
+        Function that samples the workspace of a robot model and builds the index. Slow, run offline.
+        
+        Args:
+            model: RobotModel or DH table
+            voxel_size: float. Edge length of a voxel in mm
+            num_azimuth: int. Number of azimuth bins of the tool z direction
+            num_polar: int. Number of polar bins of the tool z direction
+            samples_per_cell: int. Number of random poses tested per voxel and bin
+            extent: float. Half size of the sampled cube around the base. Defaults to the reach of the model
+            seed: int. Random seed, so that builds are reproducible
+            chunk_size: int. Number of poses solved per IK call
+        
+        Returns:
+            index: ReachabilityIndex
+        """
+        
+        dh = np.asarray(robot_model.dh_table(model), dtype=float)
+        if extent is None:
+            extent = np.abs(dh[:, 0]).sum() + np.abs(dh[:, 2]).sum()
+        count = int(math.ceil(2 * extent / voxel_size))
+        shape = (count, count, count)
+        origin = np.full(3, -extent)
+        num_bins = num_azimuth * num_polar
+        num_cells = count ** 3 * num_bins
+        rng = np.random.RandomState(seed)
+        
+        hits = np.zeros(num_cells, dtype = np.int32)
+        branch_hits = np.zeros((num_cells, batch_kinematics.NUM_BRANCHES), dtype = np.int32)
+        num_samples = num_cells * samples_per_cell
+        
+        for start in range(0, num_samples, chunk_size):
+            sample = np.arange(start, min(start + chunk_size, num_samples))
+            cell = sample // samples_per_cell
+            voxel = cell // num_bins
+            direction_bin = cell % num_bins
+            ijk = np.stack(np.unravel_index(voxel, shape), axis = 1)
+            points = origin + (ijk + rng.uniform(size = ijk.shape)) * voxel_size
+            
+            # Random direction inside the bin
+            i_polar = direction_bin // num_azimuth
+            i_azimuth = direction_bin % num_azimuth
+            cos_lo = np.cos(i_polar * math.pi / num_polar)
+            cos_hi = np.cos((i_polar + 1) * math.pi / num_polar)
+            polar = np.arccos(cos_lo + rng.uniform(size = len(sample)) * (cos_hi - cos_lo))
+            azimuth = (i_azimuth + rng.uniform(size = len(sample))) * 2 * math.pi / num_azimuth - math.pi
+            directions = np.stack((np.sin(polar) * np.cos(azimuth), np.sin(polar) * np.sin(azimuth), np.cos(polar)), axis = 1)
+            spin = rng.uniform(-math.pi, math.pi, size = len(sample))
+            
+            _, valid = batch_kinematics.inverse_kinematics_batch(_frames_from_directions(points, directions, spin), model)
+            np.add.at(hits, cell, valid.any(axis = 1))
+            np.add.at(branch_hits, cell, valid)
+        
+        score = np.round(255.0 * hits / samples_per_cell).astype(np.uint8)
+        branch = np.where(hits > 0, branch_hits.argmax(axis = 1), -1).astype(np.int8)
+        return cls(origin, voxel_size, shape, num_azimuth, num_polar,
+            score.reshape(shape + (num_bins,)), branch.reshape(shape + (num_bins,)),
+            getattr(model, "name", ""))
+    
+    def _cells(self, points, directions):
+        """ Internal function that returns voxel indices (N, 3), bin indices (N,) and an inside mask (N,) """
+        
+        ijk = np.floor((points - self.origin) / self.voxel_size).astype(np.intp)
+        inside = ((ijk >= 0) & (ijk < self.shape)).all(axis = 1)
+        ijk = np.clip(ijk, 0, np.asarray(self.shape) - 1)
+        bins = _direction_bins(directions, self.num_azimuth, self.num_polar)
+        return ijk, bins, inside
+    
+    def query(self, target_poses, base = None):
+        """
+        Function that looks up the reachability of many targets at once
+        
+        Args:
+            target_poses: List of planes or (N, 4, 4) array. Tool frames
+            base: Plane or (4, 4) array. Robot base. Defaults to world XY
+        
+        Returns:
+            score: (N,) float array. Fraction 0 - 1 of reachable orientations in the cell, 0 outside of the grid
+            branch: (N,) int array. Best IK branch of the cell, -1 if none
+        """
+        
+        poses = batch_kinematics.as_matrices(target_poses)
+        if base is not None:
+            poses = np.matmul(batch_kinematics.invert_frames(batch_kinematics.as_matrix(base)), poses)
+        ijk, bins, inside = self._cells(poses[:, :3, 3], poses[:, :3, 2])
+        score = self.score[ijk[:, 0], ijk[:, 1], ijk[:, 2], bins] / 255.0
+        branch = self.branch[ijk[:, 0], ijk[:, 1], ijk[:, 2], bins].astype(np.intp)
+        score[~inside] = 0.0
+        branch[~inside] = -1
+        return score, branch
+    
+    def is_reachable(self, target_poses, base = None, threshold = 0.5):
+        """
+        Function that returns a reachable mask of many targets at once
+        
+        Args:
+            target_poses: List of planes or (N, 4, 4) array. Tool frames
+            base: Plane or (4, 4) array. Robot base. Defaults to world XY
+            threshold: float. Minimal score of a cell to count as reachable
+        
+        Returns:
+            mask: (N,) boolean array
+        """
+        
+        return self.query(target_poses, base)[0] >= threshold
+    
+    def save(self, path):
+        """
+        Function that saves the index to a compressed .npz file
+        
+        Args:
+            path: String. File path
+        """
+        
+        np.savez_compressed(path, origin = self.origin, voxel_size = self.voxel_size, shape = self.shape,
+            num_azimuth = self.num_azimuth, num_polar = self.num_polar, score = self.score,
+            branch = self.branch, model_name = self.model_name)
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Function that loads an index saved with save()
+        
+        Args:
+            path: String. File path
+        
+        Returns:
+            index: ReachabilityIndex
+        """
+        
+        with np.load(path) as data:
+            return cls(data["origin"], data["voxel_size"], data["shape"], data["num_azimuth"],
+                data["num_polar"], data["score"], data["branch"], str(data["model_name"]))
@@ -0,0 +1,222 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module decodes frames of the real time interface (port 30003) for every controller software version.
+Each version has a Layout with precompiled struct.Struct objects. The version is found from the frame size.
+Buffers are read in place (bytes, bytearray, memoryview, mmap). Many frames decode at once into a NumPy
+structured array that is a view on the buffer (NumPy is only needed for that).
+Units as sent by the controller: m, rad, N, A, V, s. Digital in / outputs are bit fields stored as doubles.
+"""
+
+
+import struct
+
+# ----- Layouts -----
+# (name, number of doubles). Every frame starts with its size as an int
+
+_V1 = [("time", 1), ("q_target", 6), ("qd_target", 6), ("qdd_target", 6), ("i_target", 6), ("m_target", 6),
+    ("q_actual", 6), ("qd_actual", 6), ("i_actual", 6), ("tool_accelerometer", 3), ("unused", 15),
+    ("tcp_force", 6), ("tool_vector", 6), ("tcp_speed", 6), ("digital_inputs", 1), ("motor_temperatures", 6),
+    ("controller_timer", 1), ("test_value", 1)]
+_V1_8 = _V1 + [("robot_mode", 1), ("joint_modes", 6)]
+_V3_0 = [("time", 1), ("q_target", 6), ("qd_target", 6), ("qdd_target", 6), ("i_target", 6), ("m_target", 6),
+    ("q_actual", 6), ("qd_actual", 6), ("i_actual", 6), ("i_control", 6), ("tool_vector", 6), ("tcp_speed", 6),
+    ("tcp_force", 6), ("tool_vector_target", 6), ("tcp_speed_target", 6), ("digital_inputs", 1),
+    ("motor_temperatures", 6), ("controller_timer", 1), ("test_value", 1), ("robot_mode", 1), ("joint_modes", 6),
+    ("safety_mode", 1), ("reserved_0", 6), ("tool_accelerometer", 3), ("reserved_1", 6), ("speed_scaling", 1),
+    ("linear_momentum_norm", 1), ("reserved_2", 1), ("reserved_3", 1), ("v_main", 1), ("v_robot", 1),
+    ("i_robot", 1), ("v_actual", 6)]
+_V3_2 = _V3_0 + [("digital_outputs", 1), ("program_state", 1)]
+_V3_5 = _V3_2 + [("elbow_position", 3), ("elbow_velocity", 3)]
+_V5 = _V3_5 + [("safety_status", 1)]
+
+class Layout(object):
+    """
+    Class for the frame layout of one controller software version
+    
+    Args:
+        version: String. First controller version with this layout
+        fields: List of (name, number of doubles)
+    """
+    
+    def __init__(self, version, fields):
+        self.version = version
+        self.fields = [("message_size", 0)] + list(fields)
+        self.names = [name for name, _ in self.fields]
+        self.struct = struct.Struct("!i" + "".join("%dd" % count for _, count in fields))
+        self.size = self.struct.size
+        # Per field: (offset, Struct, count)
+        self.offsets = {"message_size": (0, struct.Struct("!i"), 0)}
+        offset = 4
+        for name, count in fields:
+            self.offsets[name] = (offset, struct.Struct("!%dd" % count), count)
+            offset += 8 * count
+    
+    def unpack(self, buffer, offset = 0):
+        """
+        Function that decodes every field of a frame
+        
+        Args:
+            buffer: bytes, bytearray, memoryview or mmap holding the frame
+            offset: int. Start of the frame in the buffer
+        
+        Returns:
+            frame: Dictionary of field name to float (int for message_size) or tuple of floats
+        """
+        
+        values = self.struct.unpack_from(buffer, offset)
+        result = {"message_size": values[0]}
+        i = 1
+        for name, count in self.fields[1:]:
+            result[name] = values[i] if count == 1 else values[i:i + count]
+            i += count
+        return result
+    
+    def field(self, buffer, name, offset = 0):
+        """
+        Function that decodes one field of a frame
+        
+        Args:
+            buffer: bytes, bytearray, memoryview or mmap holding the frame
+            name: String. Field name
+            offset: int. Start of the frame in the buffer
+        
+        Returns:
+            value: float, or tuple of floats
+        """
+        
+        start, unpacker, count = self.offsets[name]
+        values = unpacker.unpack_from(buffer, offset + start)
+        return values if count > 1 else values[0]
+    
+    def dtype(self):
+        """
+        Function that returns the NumPy structured dtype of a frame. Fields are big endian, as sent
+        
+        Returns:
+            dtype: numpy.dtype
+        """
+        
+        import numpy as np
+        names = []
+        formats = []
+        offsets = []
+        for name, count in self.fields:
+            start = self.offsets[name][0]
+            names.append(name)
+            formats.append(">i4" if name == "message_size" else (">f8" if count == 1 else (">f8", (count,))))
+            offsets.append(start)
+        return np.dtype({"names": names, "formats": formats, "offsets": offsets, "itemsize": self.size})
+
+LAYOUTS = [Layout("1.5", _V1), Layout("1.8", _V1_8), Layout("3.0", _V3_0), Layout("3.2", _V3_2),
+    Layout("3.5", _V3_5), Layout("5.0", _V5)]
+_BY_SIZE = dict((layout.size, layout) for layout in LAYOUTS)
+_BY_VERSION = dict((layout.version, layout) for layout in LAYOUTS)
+_SIZE = struct.Struct("!i")
+
+def get_layout(size = None, version = None):
+    """
+    Function that finds the layout of a frame size or controller version
+    
+    Args:
+        size: int. Frame size in bytes. Larger frames than any known use the newest layout for their known part
+        version: String. Controller version, e.g. "3.5" or "5.11". Uses the newest layout at or before it
+    
+    Returns:
+        layout: Layout
+    """
+    
+    if version is not None:
+        key = tuple(int(v) for v in str(version).split(".")[:2])
+        known = [layout for layout in LAYOUTS if tuple(int(v) for v in layout.version.split(".")) <= key]
+        if not known:
+            raise ValueError("Unknown controller version %s" % version)
+        return known[-1]
+    if size in _BY_SIZE:
+        return _BY_SIZE[size]
+    if size is not None and size > LAYOUTS[-1].size:
+        return LAYOUTS[-1]
+    raise ValueError("Unknown frame size %s" % size)
+
+# ----- Decoding -----
+
+def decode(frame, version = None, offset = 0):
+    """
+    Function that decodes every field of one frame
+    
+    Args:
+        frame: bytes, bytearray, memoryview or mmap holding the frame
+        version: String. Controller version. If none specified, found from the frame size
+        offset: int. Start of the frame in the buffer
+    
+    Returns:
+        frame: Dictionary of field name to value, see Layout.unpack
+    """
+    
+    size = _SIZE.unpack_from(frame, offset)[0]
+    layout = get_layout(size, version)
+    if size < layout.size:
+        raise ValueError("Frame of %d bytes is too short for version %s" % (size, layout.version))
+    return layout.unpack(frame, offset)
+
+def iter_frames(buffer, version = None):
+    """
+    Generator that decodes consecutive frames of a buffer, e.g. received data or a recording
+    
+    Args:
+        buffer: bytes, bytearray, memoryview or mmap holding whole frames
+        version: String. Controller version. If none specified, found from the frame sizes
+    
+    Yields:
+        frame: Dictionary of field name to value
+    """
+    
+    view = memoryview(buffer)
+    offset = 0
+    while offset + 4 <= len(view):
+        size = _SIZE.unpack_from(view, offset)[0]
+        if size <= 0 or offset + size > len(view):
+            break
+        yield get_layout(size, version).unpack(view, offset)
+        offset += size
+
+def decode_many(buffer, version = None, native = False):
+    """
+    Function that decodes many frames of the same size at once into a NumPy structured array
+    
+    Args:
+        buffer: bytes, bytearray, memoryview, mmap holding frames back to back, or a list of frames
+        version: String. Controller version. If none specified, found from the first frame size
+        native: Boolean. Convert to native byte order (a copy). Otherwise the result is a view on the buffer
+    
+    Returns:
+        frames: (N,) structured array with one field per Layout field
+    """
+    
+    import numpy as np
+    if isinstance(buffer, (list, tuple)):
+        buffer = b"".join(bytes(f) for f in buffer)
+    size = _SIZE.unpack_from(buffer, 0)[0]
+    layout = get_layout(size, version)
+    if size < layout.size:
+        raise ValueError("Frame of %d bytes is too short for version %s" % (size, layout.version))
+    dtype = layout.dtype()
+    if size != layout.size:
+        dtype = np.dtype({"names": dtype.names, "formats": [dtype.fields[n][0] for n in dtype.names],
+            "offsets": [dtype.fields[n][1] for n in dtype.names], "itemsize": size})
+    count = len(memoryview(buffer)) // size
+    frames = np.frombuffer(buffer, dtype = dtype, count = count)
+    if (frames["message_size"] != size).any():
+        raise ValueError("Frames of different sizes")
+    if native:
+        frames = frames.astype(dtype.newbyteorder("="))
+    return frames
@@ -0,0 +1,319 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module records raw real time frames (port 30003) to disk and replays them.
+The log is a binary file that grows in chunks, each chunk memory-mapped while it is written:
+    header: magic, end of data, wall clock start time, chunk size (64 bytes)
+    records: receive time (double) followed by the frame as received (its first int is its size), padded to 4 bytes
+A record never crosses a chunk boundary. A zero size pads the rest of a chunk. When less than a receive time and a
+size is left in a chunk there is no room for it, and readers continue at the next chunk.
+Every index_interval seconds of receive time the offset of a record is added to an index file (path + ".idx"),
+so replays can start at any time without reading the log from the start. Replays read the file through a
+read-only memory map and decode frames with realtime.decode, so logs of hours never have to fit in memory.
+"""
+
+
+from . import realtime
+import bisect
+import mmap
+import os
+import struct
+import time
+import timeit
+import weakref
+
+_MAGIC = b"yoURREC1"
+# magic, end of data, wall clock start, chunk size
+_HEADER = struct.Struct("<8sQdQ")
+_HEADER_SIZE = 64
+_RECEIVED = struct.Struct("<d")
+_SIZE = struct.Struct("!i")
+_INDEX = struct.Struct("<dQ")
+# Records start at multiples of this, so the space left in a chunk is either too small for a record header or
+# large enough for a padding marker
+_ALIGN = 4
+
+def _aligned(offset):
+    """ Internal function that rounds an offset up to the record alignment """
+    
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+class Recorder(object):
+    """
+    Class that appends frames to a log. Creates the log, replacing an existing one
+    
+    Args:
+        path: String. Log file
+        chunk_size: int. Bytes the file grows by. Rounded up to the memory map granularity
+        index_interval: float. Seconds of receive time between index entries
+    """
+    
+    def __init__(self, path, chunk_size = 1<<24, index_interval = 1.0):
+        granularity = mmap.ALLOCATIONGRANULARITY
+        self.path = path
+        self.chunk_size = max(1, (chunk_size + granularity - 1) // granularity) * granularity
+        self.index_interval = index_interval
+        self.frames = 0
+        self._file = open(path, "w+b")
+        self._file.truncate(self.chunk_size)
+        self._index = open(path + ".idx", "wb")
+        self._header = mmap.mmap(self._file.fileno(), _HEADER_SIZE)
+        self._header[:_HEADER_SIZE] = b"\0" * _HEADER_SIZE
+        _HEADER.pack_into(self._header, 0, _MAGIC, _HEADER_SIZE, time.time(), self.chunk_size)
+        self._chunk_start = 0
+        self._map = mmap.mmap(self._file.fileno(), self.chunk_size)
+        self._end = _HEADER_SIZE
+        self._next_index = None
+    
+    def write(self, frame, received = None):
+        """
+        Function that appends one frame. Matches the comm.RealtimeClient.subscribe callback
+        
+        Args:
+            frame: bytes, bytearray or memoryview of one frame
+            received: float. Receive time in s, from any clock that does not go back. If none specified, time.time()
+        """
+        
+        if received is None:
+            received = time.time()
+        size = len(frame)
+        record = _aligned(_RECEIVED.size + size)
+        if record > self.chunk_size:
+            raise ValueError("Frame larger than a chunk")
+        position = self._end - self._chunk_start
+        if position + record > self.chunk_size:
+            self._next_chunk(position)
+            position = 0
+        if self._next_index is None or received >= self._next_index:
+            self._index.write(_INDEX.pack(received, self._end))
+            self._next_index = received + self.index_interval
+        _RECEIVED.pack_into(self._map, position, received)
+        self._map[position + _RECEIVED.size:position + _RECEIVED.size + size] = bytes(frame)
+        self._end += record
+        self.frames += 1
+    
+    def _next_chunk(self, position):
+        """ Internal function that pads the current chunk and maps a new one at the end of the file """
+        
+        if position + _RECEIVED.size + _SIZE.size <= self.chunk_size:
+            _SIZE.pack_into(self._map, position + _RECEIVED.size, 0)
+        self._map.flush()
+        self._map.close()
+        # A file can not be resized while it is mapped on Windows
+        self._header.close()
+        self._chunk_start += self.chunk_size
+        self._end = self._chunk_start
+        self._file.truncate(self._chunk_start + self.chunk_size)
+        self._header = mmap.mmap(self._file.fileno(), _HEADER_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), self.chunk_size, offset = self._chunk_start)
+        self.flush()
+    
+    def flush(self):
+        """ Function that makes everything written so far visible to readers """
+        
+        self._map.flush()
+        self._index.flush()
+        struct.pack_into("<Q", self._header, 8, self._end)
+        self._header.flush()
+    
+    def close(self):
+        """ Function that flushes and closes the log, trimming unused space """
+        
+        if self._map is None:
+            return
+        self.flush()
+        self._map.close()
+        self._header.close()
+        self._map = None
+        self._file.truncate(self._end)
+        self._file.close()
+        self._index.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
+
+class Recording(object):
+    """
+    Class that reads a log written by Recorder, also while it is still being written
+    
+    Args:
+        path: String. Log file
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        # Record generators still reading the map, closed with the log
+        self._readers = weakref.WeakSet()
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, self._end, self.start_time, self.chunk_size = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError("Not a recording: %s" % path)
+        self._end = min(self._end, len(self._map))
+        self._load_index()
+    
+    def _load_index(self):
+        """ Internal function that reads the index file, or builds the index in memory when it is missing """
+        
+        self.index_times = []
+        self.index_offsets = []
+        if os.path.exists(self.path + ".idx"):
+            with open(self.path + ".idx", "rb") as f:
+                data = f.read()
+            for i in range(0, len(data) - _INDEX.size + 1, _INDEX.size):
+                received, offset = _INDEX.unpack_from(data, i)
+                if offset < self._end:
+                    self.index_times.append(received)
+                    self.index_offsets.append(offset)
+        else:
+            for offset, received, _ in self._records(_HEADER_SIZE):
+                if not self.index_times or received >= self.index_times[-1] + 1.0:
+                    self.index_times.append(received)
+                    self.index_offsets.append(offset)
+    
+    def _records(self, offset):
+        """ Internal function that returns a generator of records from an offset, see _iter_records """
+        
+        reader = self._iter_records(offset)
+        self._readers.add(reader)
+        return reader
+    
+    def _iter_records(self, offset):
+        """
+        Internal generator of (offset, receive time, frame memoryview) from an offset.
+        A frame view is released when the next record is read or the generator ends, so the log can be closed
+        """
+        
+        view = memoryview(self._map)
+        frame = None
+        try:
+            while offset + _RECEIVED.size + _SIZE.size <= self._end:
+                next_chunk = (offset // self.chunk_size + 1) * self.chunk_size
+                if offset + _RECEIVED.size + _SIZE.size > next_chunk:
+                    # No room for a record or a padding marker, continue in the next chunk
+                    offset = next_chunk
+                    continue
+                size = _SIZE.unpack_from(view, offset + _RECEIVED.size)[0]
+                if size <= 0:
+                    # Padding, continue in the next chunk
+                    offset = next_chunk
+                    continue
+                start = offset + _RECEIVED.size
+                if start + size > self._end:
+                    break
+                frame = view[start:start + size]
+                yield offset, _RECEIVED.unpack_from(view, offset)[0], frame
+                frame.release()
+                offset = _aligned(start + size)
+        finally:
+            if frame is not None:
+                frame.release()
+            view.release()
+    
+    def seek(self, start_time):
+        """
+        Function that returns the offset of the last indexed record at or before a time
+        
+        Args:
+            start_time: float. Receive time
+        
+        Returns:
+            offset: int
+        """
+        
+        i = bisect.bisect_right(self.index_times, start_time) - 1
+        return self.index_offsets[i] if i >= 0 else _HEADER_SIZE
+    
+    def records(self, start_time = None, end_time = None):
+        """
+        Generator of raw records with start_time <= receive time < end_time
+        
+        Args:
+            start_time: float. If none specified, from the first record
+            end_time: float. If none specified, to the last record
+        
+        Yields:
+            (received, frame): Receive time and the frame as a memoryview into the log. It is valid until the next
+                record is read, copy it with bytes(frame) to keep it
+        """
+        
+        offset = _HEADER_SIZE if start_time is None else self.seek(start_time)
+        for _, received, frame in self._records(offset):
+            if start_time is not None and received < start_time:
+                continue
+            if end_time is not None and received >= end_time:
+                break
+            yield received, frame
+    
+    def replay(self, speed = None, start_time = None, end_time = None, decode = True, version = None):
+        """
+        Generator that plays records back, optionally paced like they were received
+        
+        Args:
+            speed: float. 1 plays at true speed, 10 ten times faster. If none specified, as fast as possible
+            start_time: float. Receive time to start at
+            end_time: float. Receive time to stop at
+            decode: Boolean. Yield frames decoded with realtime.decode, or raw memoryviews
+            version: String. Controller version for decoding. If none specified, found from the frame size
+        
+        Yields:
+            (received, frame): Receive time and the frame
+        """
+        
+        first = None
+        for received, frame in self.records(start_time, end_time):
+            if speed is not None:
+                if first is None:
+                    first = received
+                    started = timeit.default_timer()
+                delay = (received - first) / speed - (timeit.default_timer() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            yield received, (realtime.decode(frame, version) if decode else frame)
+    
+    def play(self, callback, speed = None, start_time = None, end_time = None):
+        """
+        Function that feeds raw frames to a callback of (frame, received), as comm.RealtimeClient subscribers get them
+        
+        Args:
+            callback: Function, e.g. TelemetryBuffer.append
+            speed, start_time, end_time: see replay
+        
+        Returns:
+            count: int. Number of frames played
+        """
+        
+        count = 0
+        for received, frame in self.replay(speed, start_time, end_time, decode = False):
+            callback(frame, received)
+            count += 1
+        return count
+    
+    def close(self):
+        """ Function that closes the log. Generators of records or replays that are still open end """
+        
+        for reader in list(self._readers):
+            reader.close()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
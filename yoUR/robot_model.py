@@ -0,0 +1,233 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module contains the robot model:
+    1) Immutable RobotModel holding the DH table and the motion limits of one robot
+    2) Presets for UR3/UR5/UR10 and the e-series
+"""
+
+
+import collections
+import math
+
+# ----- DH helpers -----
+
+def link_constants(dh_parameters):
+    """
+    Function that precomputes the constant part of every Denavit Hartenberg link transform.
+    A link transform is Rz(theta) * C, where C = Tz(d) * Tx(a) * Rx(alpha) only depends on the robot
+    
+    Args:
+        dh_parameters: Tuple of (joint_distance, joint_angle, link_length, link_twist) for each link
+    
+    Returns:
+        constants: Tuple of 4x4 matrices (tuples of rows), one per link
+    """
+    
+    constants = []
+    for (d, theta, a, alpha) in dh_parameters:
+        ca = math.cos(alpha)
+        sa = math.sin(alpha)
+        constants.append((
+            (1.0, 0.0, 0.0, a),
+            (0.0, ca, -sa, 0.0),
+            (0.0, sa, ca, d),
+            (0.0, 0.0, 0.0, 1.0)))
+    return tuple(constants)
+
+def dh_table(dh_parameters):
+    """
+    Function that returns the DH table of a RobotModel, or the given table unchanged
+    
+    Args:
+        dh_parameters: RobotModel or tuple of (joint_distance, joint_angle, link_length, link_twist)
+    
+    Returns:
+        dh_parameters: Tuple of (joint_distance, joint_angle, link_length, link_twist) for each link
+    """
+    
+    return getattr(dh_parameters, "dh_parameters", dh_parameters)
+
+# ----- Robot model -----
+
+_RobotModel = collections.namedtuple("_RobotModel", [
+    "name", "dh_parameters", "joint_limits", "max_joint_speed", "max_joint_accel",
+    "max_velocity", "max_accel"])
+
+# link constants per DH table, shared by all models with the same table
+_LINK_CONSTANTS = {}
+
+class RobotModel(_RobotModel):
+    """
+    Immutable description of a robot. Holds the DH table (mm, radians) and the joint, tool speed and
+    acceleration limits. The constant part of each link transform is derived from the DH table on first use.
+    
+    Args:
+        name: String. Name of the model
+        dh_parameters: Tuple of (joint_distance, joint_angle, link_length, link_twist) for each link
+        joint_limits: Tuple of (min, max) joint angles in radians. Defaults to +-2pi
+        max_joint_speed: Tuple of max joint speeds in rad/s. Defaults to pi
+        max_joint_accel: Tuple of max joint accelerations in rad/s^2. Defaults to 14 (about 800 deg/s^2)
+        max_velocity: float. max tool speed in m/s
+        max_accel: float. max tool accel in m/s^2
+    """
+    
+    __slots__ = ()
+    
+    def __new__(cls, name, dh_parameters, joint_limits = None, max_joint_speed = None,
+                max_joint_accel = None, max_velocity = 2.0, max_accel = 1.5):
+        dh_parameters = tuple(tuple(float(v) for v in dh) for dh in dh_parameters)
+        num_joints = len(dh_parameters)
+        if joint_limits is None:
+            joint_limits = ((-2 * math.pi, 2 * math.pi),) * num_joints
+        if max_joint_speed is None:
+            max_joint_speed = (math.pi,) * num_joints
+        if max_joint_accel is None:
+            max_joint_accel = (14.0,) * num_joints
+        return _RobotModel.__new__(cls, name, dh_parameters,
+            tuple((float(lo), float(hi)) for (lo, hi) in joint_limits),
+            tuple(float(v) for v in max_joint_speed),
+            tuple(float(v) for v in max_joint_accel),
+            float(max_velocity), float(max_accel))
+    
+    @property
+    def link_constants(self):
+        """ Tuple of 4x4 matrices, the constant part of each link transform. See link_constants() """
+        
+        constants = _LINK_CONSTANTS.get(self.dh_parameters)
+        if constants is None:
+            constants = _LINK_CONSTANTS[self.dh_parameters] = link_constants(self.dh_parameters)
+        return constants
+    
+    def _replace(self, **kwargs):
+        """ Internal function. Goes through the constructor so replaced fields are normalised as well """
+        
+        fields = self._asdict()
+        fields.update(kwargs)
+        return type(self)(**fields)
+    
+    def with_dh(self, dh_parameters, name = None):
+        """
+        Function that returns a copy of the model with another DH table, e.g. from a calibration
+        
+        Args:
+            dh_parameters: Tuple of (joint_distance, joint_angle, link_length, link_twist) for each link
+            name: String. Name of the new model. Defaults to the current name
+        
+        Returns:
+            model: RobotModel
+        """
+        
+        return self._replace(dh_parameters = dh_parameters, name = self.name if name is None else name)
+    
+    def link_matrix(self, i, joint):
+        """
+        Function that returns the Denavit Hartenberg matrix of link i using the precomputed constants
+        
+        Args:
+            i: int. Link index
+            joint: float. Joint angle in radians, added to the theta of the DH table
+        
+        Returns:
+            m: 4x4 matrix as a list of rows
+        """
+        
+        theta = self.dh_parameters[i][1] + joint
+        ct = math.cos(theta)
+        st = math.sin(theta)
+        c0, c1, c2, c3 = self.link_constants[i]
+        return [
+            [ct * c0[k] - st * c1[k] for k in range(4)],
+            [st * c0[k] + ct * c1[k] for k in range(4)],
+            list(c2),
+            list(c3)]
+    
+    def clamp_tool(self, accel, vel):
+        """
+        Function that makes tool accel and speed non-negative and below the limits of the model
+        
+        Args:
+            accel: tool accel in m/s^2
+            vel: tool speed in m/s
+        
+        Returns:
+            (accel, vel): Clamped values
+        """
+        
+        return min(abs(accel), self.max_accel), min(abs(vel), self.max_velocity)
+    
+    def clamp_joint(self, accel, vel):
+        """
+        Function that makes joint accel and speed non-negative and below the slowest joint limit of the model
+        
+        Args:
+            accel: joint accel in rad/s^2
+            vel: joint speed in rad/s
+        
+        Returns:
+            (accel, vel): Clamped values
+        """
+        
+        return min(abs(accel), min(self.max_joint_accel)), min(abs(vel), min(self.max_joint_speed))
+    
+    def within_limits(self, joints):
+        """
+        Function that checks a joint configuration against the joint limits
+        
+        Args:
+            joints: List of joint angles in radians
+        
+        Returns:
+            bool. True if all joints are within their limits
+        """
+        
+        return all(lo <= q <= hi for q, (lo, hi) in zip(joints, self.joint_limits))
+
+# ----- Presets -----
+
+def _ur_model(name, d1, a2, a3, d4, d5, d6, joint_speed_deg):
+    """ Internal function that builds a UR model from the standard UR DH parameters (mm) """
+    
+    dh = [
+        (d1, 0, 0, math.pi / 2),
+        (0, 0, a2, 0),
+        (0, 0, a3, 0),
+        (d4, 0, 0, math.pi / 2),
+        (d5, 0, 0, -math.pi / 2),
+        (d6, 0, 0, 0)]
+    return RobotModel(name, dh, max_joint_speed = [math.radians(s) for s in joint_speed_deg])
+
+UR3 = _ur_model("UR3", 151.9, -243.65, -213.25, 112.35, 85.35, 81.9, (180, 180, 180, 360, 360, 360))
+UR5 = _ur_model("UR5", 89.159, -425.0, -392.25, 109.15, 94.65, 82.3, (180,) * 6)
+UR10 = _ur_model("UR10", 127.3, -612.0, -572.3, 163.941, 115.7, 92.2, (120, 120, 180, 180, 180, 180))
+UR3E = _ur_model("UR3e", 151.85, -243.55, -213.2, 131.05, 85.35, 92.1, (180, 180, 180, 360, 360, 360))
+UR5E = _ur_model("UR5e", 162.5, -425.0, -392.2, 133.3, 99.7, 99.6, (180,) * 6)
+UR10E = _ur_model("UR10e", 180.7, -612.7, -571.55, 174.15, 119.85, 116.55, (120, 120, 180, 180, 180, 180))
+UR16E = _ur_model("UR16e", 180.7, -478.4, -360.0, 174.15, 119.85, 116.55, (120, 120, 180, 180, 180, 180))
+
+MODELS = dict((m.name, m) for m in (UR3, UR5, UR10, UR3E, UR5E, UR10E, UR16E))
+
+def get_model(name):
+    """
+    Function that returns a preset robot model
+    
+    Args:
+        name: String. One of UR3, UR5, UR10, UR3e, UR5e, UR10e, UR16e
+    
+    Returns:
+        model: RobotModel
+    """
+    
+    try:
+        return MODELS[name]
+    except KeyError:
+        raise ValueError("Unknown robot model %s. Choose from %s" % (name, sorted(MODELS)))
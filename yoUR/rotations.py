@@ -0,0 +1,241 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module contains vectorised rotation conversions between
+    1) rotation matrices (N, 3, 3)
+    2) axis-angle / rotation vectors (N, 3), the UR pose format
+    3) unit quaternions (N, 4) as (w, x, y, z)
+    4) Euler angles (N, 3) as (rx, ry, rz) with R = Rz * Ry * Rx, as utils.matrix_to_euler
+and between 4x4 frames in mm and UR pose vectors [x, y, z, rx, ry, rz] in m.
+All conversions go through quaternions, so the 0 and 180 degree cases need no special tolerances.
+"""
+
+
+import numpy as np
+
+# ----- Quaternions -----
+
+def matrix_to_quaternion(r):
+    """
+    Function that converts rotation matrices to unit quaternions with the Shepperd method, which
+    picks the numerically largest component for every matrix. w is kept non-negative
+    
+    Args:
+        r: (..., 3, 3) array. Rotation matrices (the 3x3 part of 4x4 frames is also accepted)
+    
+    Returns:
+        q: (..., 4) array of (w, x, y, z)
+    """
+    
+    r = np.asarray(r, dtype=float)[..., :3, :3]
+    m00 = r[..., 0, 0]
+    m11 = r[..., 1, 1]
+    m22 = r[..., 2, 2]
+    trace = m00 + m11 + m22
+    
+    # 4 * component^2 for w, x, y and z
+    diagonal = np.stack((1.0 + trace, 1.0 + m00 - m11 - m22, 1.0 - m00 + m11 - m22, 1.0 - m00 - m11 + m22), axis = -1)
+    choice = diagonal.argmax(axis = -1)
+    
+    # Rows of (w, x, y, z) * 4 * component for each choice of the largest component
+    w_x = r[..., 2, 1] - r[..., 1, 2]
+    w_y = r[..., 0, 2] - r[..., 2, 0]
+    w_z = r[..., 1, 0] - r[..., 0, 1]
+    x_y = r[..., 0, 1] + r[..., 1, 0]
+    x_z = r[..., 0, 2] + r[..., 2, 0]
+    y_z = r[..., 1, 2] + r[..., 2, 1]
+    candidates = np.stack((
+        np.stack((diagonal[..., 0], w_x, w_y, w_z), axis = -1),
+        np.stack((w_x, diagonal[..., 1], x_y, x_z), axis = -1),
+        np.stack((w_y, x_y, diagonal[..., 2], y_z), axis = -1),
+        np.stack((w_z, x_z, y_z, diagonal[..., 3]), axis = -1)), axis = -2)
+    q = np.take_along_axis(candidates, choice[..., None, None], axis = -2)[..., 0, :]
+    q /= np.linalg.norm(q, axis = -1)[..., None]
+    return q * np.where(q[..., :1] < 0, -1.0, 1.0)
+
+def quaternion_to_matrix(q):
+    """
+    Function that converts quaternions to rotation matrices
+    
+    Args:
+        q: (..., 4) array of (w, x, y, z). Normalised on the way
+    
+    Returns:
+        r: (..., 3, 3) array
+    """
+    
+    q = np.asarray(q, dtype=float)
+    q = q / np.linalg.norm(q, axis = -1)[..., None]
+    w, x, y, z = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    r = np.empty(q.shape[:-1] + (3, 3))
+    r[..., 0, 0] = 1 - 2 * (y * y + z * z)
+    r[..., 0, 1] = 2 * (x * y - z * w)
+    r[..., 0, 2] = 2 * (x * z + y * w)
+    r[..., 1, 0] = 2 * (x * y + z * w)
+    r[..., 1, 1] = 1 - 2 * (x * x + z * z)
+    r[..., 1, 2] = 2 * (y * z - x * w)
+    r[..., 2, 0] = 2 * (x * z - y * w)
+    r[..., 2, 1] = 2 * (y * z + x * w)
+    r[..., 2, 2] = 1 - 2 * (x * x + y * y)
+    return r
+
+def quaternion_to_axis_angle(q):
+    """
+    Function that converts quaternions to rotation vectors (axis * angle), angle in 0..pi
+    
+    Args:
+        q: (..., 4) array of (w, x, y, z)
+    
+    Returns:
+        rotvec: (..., 3) array
+    """
+    
+    q = np.asarray(q, dtype=float)
+    q = q * np.where(q[..., :1] < 0, -1.0, 1.0)
+    v = q[..., 1:]
+    s = np.linalg.norm(v, axis = -1)
+    angle = 2.0 * np.arctan2(s, q[..., 0])
+    # angle / sin(angle / 2), with its limit 2 for small angles
+    small = s < 1e-8
+    scale = np.where(small, 2.0 / np.where(small, q[..., 0], 1.0), angle / np.where(small, 1.0, s))
+    return v * scale[..., None]
+
+def axis_angle_to_quaternion(rotvec):
+    """
+    Function that converts rotation vectors (axis * angle) to quaternions
+    
+    Args:
+        rotvec: (..., 3) array
+    
+    Returns:
+        q: (..., 4) array of (w, x, y, z)
+    """
+    
+    rotvec = np.asarray(rotvec, dtype=float)
+    angle = np.linalg.norm(rotvec, axis = -1)
+    half = angle / 2.0
+    # sin(angle / 2) / angle, with its Taylor series for small angles
+    small = angle < 1e-6
+    safe = np.where(small, 1.0, angle)
+    scale = np.where(small, 0.5 - angle * angle / 48.0, np.sin(half) / safe)
+    return np.concatenate((np.cos(half)[..., None], rotvec * scale[..., None]), axis = -1)
+
+# ----- Axis-angle -----
+
+def matrix_to_axis_angle(r):
+    """
+    Function that converts rotation matrices to rotation vectors (axis * angle), as used in UR poses.
+    Accurate to machine precision, including 0 and 180 degree rotations
+    
+    Args:
+        r: (..., 3, 3) array. Rotation matrices (the 3x3 part of 4x4 frames is also accepted)
+    
+    Returns:
+        rotvec: (..., 3) array
+    """
+    
+    return quaternion_to_axis_angle(matrix_to_quaternion(r))
+
+def axis_angle_to_matrix(rotvec):
+    """
+    Function that converts rotation vectors (axis * angle) to rotation matrices
+    
+    Args:
+        rotvec: (..., 3) array
+    
+    Returns:
+        r: (..., 3, 3) array
+    """
+    
+    return quaternion_to_matrix(axis_angle_to_quaternion(rotvec))
+
+# ----- Euler angles -----
+
+def matrix_to_euler(r):
+    """
+    Function that converts rotation matrices to Euler angles (rx, ry, rz) with R = Rz * Ry * Rx.
+    At gimbal lock (ry = +-pi/2) rx is set to 0
+    
+    Args:
+        r: (..., 3, 3) array
+    
+    Returns:
+        euler: (..., 3) array in radians
+    """
+    
+    r = np.asarray(r, dtype=float)[..., :3, :3]
+    cos_y = np.hypot(r[..., 0, 0], r[..., 1, 0])
+    lock = cos_y < 1e-9
+    ry = np.arctan2(-r[..., 2, 0], cos_y)
+    rx = np.where(lock, 0.0, np.arctan2(r[..., 2, 1], r[..., 2, 2]))
+    rz = np.where(lock, np.arctan2(-r[..., 0, 1], r[..., 1, 1]), np.arctan2(r[..., 1, 0], r[..., 0, 0]))
+    return np.stack((rx, ry, rz), axis = -1)
+
+def euler_to_matrix(euler):
+    """
+    Function that converts Euler angles (rx, ry, rz) to rotation matrices R = Rz * Ry * Rx
+    
+    Args:
+        euler: (..., 3) array in radians
+    
+    Returns:
+        r: (..., 3, 3) array
+    """
+    
+    euler = np.asarray(euler, dtype=float)
+    cx, cy, cz = np.cos(euler[..., 0]), np.cos(euler[..., 1]), np.cos(euler[..., 2])
+    sx, sy, sz = np.sin(euler[..., 0]), np.sin(euler[..., 1]), np.sin(euler[..., 2])
+    r = np.empty(euler.shape[:-1] + (3, 3))
+    r[..., 0, 0] = cz * cy
+    r[..., 0, 1] = cz * sy * sx - sz * cx
+    r[..., 0, 2] = cz * sy * cx + sz * sx
+    r[..., 1, 0] = sz * cy
+    r[..., 1, 1] = sz * sy * sx + cz * cx
+    r[..., 1, 2] = sz * sy * cx - cz * sx
+    r[..., 2, 0] = -sy
+    r[..., 2, 1] = cy * sx
+    r[..., 2, 2] = cy * cx
+    return r
+
+# ----- UR poses -----
+
+def frames_to_poses(frames):
+    """
+    Function that converts 4x4 frames (mm) to UR pose vectors [x, y, z, rx, ry, rz] (m, axis-angle)
+    
+    Args:
+        frames: (N, 4, 4) array
+    
+    Returns:
+        poses: (N, 6) array
+    """
+    
+    frames = np.asarray(frames, dtype=float)
+    return np.concatenate((frames[..., :3, 3] / 1000.0, matrix_to_axis_angle(frames)), axis = -1)
+
+def poses_to_frames(poses):
+    """
+    Function that converts UR pose vectors [x, y, z, rx, ry, rz] (m, axis-angle) to 4x4 frames (mm)
+    
+    Args:
+        poses: (N, 6) array
+    
+    Returns:
+        frames: (N, 4, 4) array
+    """
+    
+    poses = np.asarray(poses, dtype=float)
+    frames = np.zeros(poses.shape[:-1] + (4, 4))
+    frames[..., :3, :3] = axis_angle_to_matrix(poses[..., 3:])
+    frames[..., :3, 3] = poses[..., :3] * 1000.0
+    frames[..., 3, 3] = 1.0
+    return frames
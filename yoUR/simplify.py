@@ -0,0 +1,147 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module removes redundant waypoints from dense toolpaths with a Douglas-Peucker algorithm extended to
+positions and orientations. A waypoint is dropped when the linear move that skips it passes within the
+position tolerance (mm) and orientation tolerance (deg) of it. Orientation along a move is interpolated with
+slerp at the same fraction as the position, as the controller does for movel.
+Instead of recursing segment by segment, every pass splits all open segments at once, so each pass is a
+handful of array operations over the whole path.
+"""
+
+
+import numpy as np
+
+from . import batch_kinematics
+from . import rotations
+
+# ----- Deviation -----
+
+def _slerp(q0, q1, t):
+    """ Internal function that interpolates unit quaternions (N, 4) at fractions t (N,) """
+    
+    dot = np.einsum("ij,ij->i", q0, q1)
+    # Shortest way round
+    q1 = np.where(dot[:, None] < 0, -q1, q1)
+    dot = np.abs(dot)
+    angle = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin = np.sin(angle)
+    small = sin < 1e-9
+    sin = np.where(small, 1.0, sin)
+    w0 = np.where(small, 1.0 - t, np.sin((1.0 - t) * angle) / sin)
+    w1 = np.where(small, t, np.sin(t * angle) / sin)
+    return w0[:, None] * q0 + w1[:, None] * q1
+
+def deviations_between(positions, quaternions, index, start, end):
+    """
+    Function that measures how far waypoints are from the linear moves that skip them
+    
+    Args:
+        positions: (N, 3) array. Waypoint positions in mm
+        quaternions: (N, 4) array. Waypoint orientations
+        index: (M,) int array. Waypoints to measure
+        start: (M,) int array. For every measured waypoint, the index where its move starts
+        end: (M,) int array. For every measured waypoint, the index where its move ends
+    
+    Returns:
+        (distance, angle): (M,) arrays. Position deviation in mm and orientation deviation in degrees
+    """
+    
+    p0 = positions[start]
+    chord = positions[end] - p0
+    offset = positions[index] - p0
+    length2 = np.einsum("ij,ij->i", chord, chord)
+    # Fraction of the move where the waypoint is closest. Pure rotations use the index instead
+    by_index = (index - start) / np.maximum(end - start, 1).astype(float)
+    t = np.where(length2 > 1e-12, np.einsum("ij,ij->i", offset, chord) / np.where(length2 > 1e-12, length2, 1.0), by_index)
+    t = np.clip(t, 0.0, 1.0)
+    distance = np.linalg.norm(offset - t[:, None] * chord, axis = 1)
+    q = _slerp(quaternions[start], quaternions[end], t)
+    dot = np.abs(np.einsum("ij,ij->i", q, quaternions[index])) / np.linalg.norm(q, axis = 1)
+    angle = np.degrees(2.0 * np.arccos(np.clip(dot, -1.0, 1.0)))
+    return distance, angle
+
+# ----- Simplification -----
+
+def _as_path(targets):
+    """ Internal function that returns positions (mm) and quaternions for planes, frames or UR poses """
+    
+    if len(targets) and hasattr(targets[0], "XAxis"):
+        frames = batch_kinematics.as_matrices(targets)
+    else:
+        frames = np.asarray(targets, dtype = float)
+        if frames.shape[-2:] != (4, 4):
+            frames = rotations.poses_to_frames(frames.reshape(-1, 6))
+    return np.ascontiguousarray(frames[:, :3, 3]), rotations.matrix_to_quaternion(frames)
+
+def simplify_indices(targets, position_tolerance = 0.1, angle_tolerance = 0.5):
+    """
+    Function that finds the waypoints to keep so that the path stays within the tolerances
+    
+    Args:
+        targets: List of planes, (N, 4, 4) frames in mm or (N, 6) UR poses [x, y, z, rx, ry, rz] in m
+        position_tolerance: float. Allowed position deviation in mm
+        angle_tolerance: float. Allowed orientation deviation in degrees
+    
+    Returns:
+        keep: Sorted int array of waypoint indices. Always contains the first and last waypoint
+    """
+    
+    positions, quaternions = _as_path(targets)
+    n = len(positions)
+    if n < 3:
+        return np.arange(n)
+    position_tolerance = max(position_tolerance, 1e-12)
+    angle_tolerance = max(angle_tolerance, 1e-12)
+    
+    keep = np.zeros(n, dtype = bool)
+    keep[[0, -1]] = True
+    # Waypoints whose move still has to be checked
+    points = np.arange(1, n - 1)
+    while len(points):
+        kept = np.flatnonzero(keep)
+        # Move each waypoint belongs to. Points are sorted, so every move is one run
+        segment = np.searchsorted(kept, points, side = "right") - 1
+        distance, angle = deviations_between(positions, quaternions, points, kept[segment], kept[segment + 1])
+        error = np.maximum(distance / position_tolerance, angle / angle_tolerance)
+        runs = np.flatnonzero(np.r_[True, segment[1:] != segment[:-1]])
+        worst = np.maximum.reduceat(error, runs)
+        split = worst > 1.0
+        if not split.any():
+            break
+        # First waypoint reaching the worst error of its move
+        run_of_point = np.cumsum(np.r_[False, segment[1:] != segment[:-1]])
+        candidates = np.flatnonzero((error == worst[run_of_point]) & split[run_of_point])
+        first = np.unique(run_of_point[candidates], return_index = True)[1]
+        keep[points[candidates[first]]] = True
+        # Moves within tolerance are final
+        points = points[split[run_of_point]]
+        points = points[~keep[points]]
+    return np.flatnonzero(keep)
+
+def simplify(targets, position_tolerance = 0.1, angle_tolerance = 0.5):
+    """
+    Function that removes redundant waypoints from a path
+    
+    Args:
+        targets: List of planes, (N, 4, 4) frames in mm or (N, 6) UR poses [x, y, z, rx, ry, rz] in m
+        position_tolerance: float. Allowed position deviation in mm
+        angle_tolerance: float. Allowed orientation deviation in degrees
+    
+    Returns:
+        targets: The kept waypoints, as a list for lists and as an array for arrays
+    """
+    
+    keep = simplify_indices(targets, position_tolerance, angle_tolerance)
+    if isinstance(targets, np.ndarray):
+        return targets[keep]
+    return [targets[i] for i in keep]
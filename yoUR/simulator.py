@@ -0,0 +1,401 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module is a local stand-in for a UR controller, to test and benchmark the comm code without a robot:
+    1) Script port (30002): records every program received. Optionally runs its movej / movel / sleep lines
+       as a linear interpolation in time, like a new program replacing the running one
+    2) Real time port (30003): sends frames of the chosen controller version (realtime.Layout) to every client
+       at the chosen rate. Clients that fall behind are buffered, then dropped
+    3) Faults: dropped connections, frames sent in pieces, truncated frames, a slow network
+movej moves the joints and movel the tool vector. There is no kinematics, the other one stays where it is.
+"""
+
+
+from . import realtime
+import math
+import random
+import re
+import select
+import socket
+import threading
+import time
+import timeit
+
+_PROGRAM_END = re.compile(r"^end\s*\n\s*(\w+)\(\)\s*\n", re.M)
+_MOVE = re.compile(r"^\s*(movej|movel)\(p?\[([^\]]*)\](.*)\)\s*$")
+_SLEEP = re.compile(r"^\s*sleep\(([-+0-9.eE]+)\)\s*$")
+_ARGUMENT = re.compile(r"\b([av])\s*=\s*([-+0-9.eE]+)")
+# Robot mode running, safety mode normal, program state stopped / playing
+_RUNNING = 7.0
+_NORMAL = 1.0
+_STOPPED = 1.0
+_PLAYING = 2.0
+
+def _duration(distance, vel, accel):
+    """ Internal function that returns the time of a trapezoidal profile """
+    
+    vel = max(vel, 1e-9)
+    accel = max(accel, 1e-9)
+    if distance * accel >= vel * vel:
+        return distance / vel + vel / accel
+    return 2.0 * math.sqrt(distance / accel)
+
+def plan_program(program, joints, pose):
+    """
+    Function that turns the movej / movel / sleep lines of a program into timed segments
+    
+    Args:
+        program: String. UR script
+        joints: List of 6 joint angles at the start
+        pose: List of 6 tool vector values at the start
+    
+    Returns:
+        segments: List of (start time, duration, field, start values, end values). field is "q" or "pose",
+            None for sleep
+    """
+    
+    segments = []
+    t = 0.0
+    joints = list(joints)
+    pose = list(pose)
+    for line in program.split("\n"):
+        match = _MOVE.match(line)
+        if match is not None:
+            name, values, rest = match.groups()
+            target = [float(v) for v in values.split(",")]
+            arguments = dict((k, float(v)) for k, v in _ARGUMENT.findall(rest))
+            accel = arguments.get("a", 1.4 if name == "movej" else 1.2)
+            vel = arguments.get("v", 1.05 if name == "movej" else 0.25)
+            if name == "movej":
+                distance = max(abs(a - b) for a, b in zip(target, joints))
+                start, field, joints = joints, "q", target
+            else:
+                distance = math.sqrt(sum((a - b) ** 2 for a, b in zip(target[:3], pose[:3])))
+                start, field, pose = pose, "pose", target
+            duration = _duration(distance, vel, accel)
+            segments.append((t, duration, field, start, target))
+            t += duration
+            continue
+        match = _SLEEP.match(line)
+        if match is not None:
+            duration = float(match.group(1))
+            segments.append((t, duration, None, None, None))
+            t += duration
+    return segments
+
+class Simulator(object):
+    """
+    Class for a local UR controller stand-in
+    
+    Args:
+        host: String. Address to listen at
+        script_port: int. Port that accepts programs (30002 on a robot). 0 picks a free port, set on start
+        realtime_port: int. Port that sends real time frames (30003 on a robot). 0 picks a free port, set on start
+        rate: float. Frames per second
+        version: String. Controller version of the frames, see realtime.get_layout
+        interpolate: Boolean. Run the moves of received programs
+        max_pending: int. Bytes buffered for a slow real time client before it is dropped
+    
+    Faults, attributes that can be changed while running:
+        drop_every: int. Close every real time connection after this many frames. 0 never
+        fragment: Boolean. Send frames in random pieces
+        truncate_probability: float. Chance of sending part of a frame and closing the connection
+        send_delay: float. Seconds added before every frame is sent
+        script_read_delay: float. Seconds the script port waits before reading each chunk
+    """
+    
+    def __init__(self, host = "127.0.0.1", script_port = 30002, realtime_port = 30003, rate = 125.0, version = "3.5",
+            interpolate = True, max_pending = 1<<20):
+        self.host = host
+        self.script_port = script_port
+        self.realtime_port = realtime_port
+        self.rate = rate
+        self.layout = realtime.get_layout(version = version)
+        self.interpolate = interpolate
+        self.max_pending = max_pending
+        self.drop_every = 0
+        self.fragment = False
+        self.truncate_probability = 0.0
+        self.send_delay = 0.0
+        self.script_read_delay = 0.0
+        
+        self.programs = []
+        self.frames_sent = 0
+        self.clients_dropped = 0
+        self.joints = [0.0, -math.pi / 2, 0.0, -math.pi / 2, 0.0, 0.0]
+        self.pose = [0.0] * 6
+        self._segments = []
+        self._program_start = 0.0
+        self._clients = []
+        self._lock = threading.Lock()
+        self._running = False
+        self._threads = []
+        self._servers = []
+        self._start = timeit.default_timer()
+        self._random = random.Random(0)
+    
+    # ----- Servers -----
+    
+    def start(self):
+        """ Function that opens both ports and starts serving """
+        
+        self._running = True
+        self._start = timeit.default_timer()
+        for port, target in ((self.script_port, self._serve_script), (self.realtime_port, self._serve_realtime)):
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind((self.host, port))
+            server.listen(16)
+            server.settimeout(0.1)
+            self._servers.append(server)
+            self._spawn(target, server)
+        # Ports the servers got, for port 0
+        self.script_port = self._servers[0].getsockname()[1]
+        self.realtime_port = self._servers[1].getsockname()[1]
+        self._spawn(self._broadcast)
+    
+    def _spawn(self, target, *args):
+        """ Internal function that starts a daemon thread """
+        
+        thread = threading.Thread(target = target, args = args)
+        thread.daemon = True
+        thread.start()
+        self._threads.append(thread)
+    
+    def _accept(self, server):
+        """ Internal generator of accepted connections until stopped """
+        
+        while self._running:
+            try:
+                connection, _ = server.accept()
+            except socket.timeout:
+                continue
+            except socket.error:
+                return
+            yield connection
+    
+    def _serve_script(self, server):
+        """ Internal function that accepts script connections """
+        
+        for connection in self._accept(server):
+            self._spawn(self._read_scripts, connection)
+    
+    def _read_scripts(self, connection):
+        """ Internal function that records the programs of one connection """
+        
+        connection.settimeout(0.1)
+        text = ""
+        while self._running:
+            if self.script_read_delay:
+                time.sleep(self.script_read_delay)
+            try:
+                data = connection.recv(1<<16)
+            except socket.timeout:
+                continue
+            except socket.error:
+                break
+            if not data:
+                break
+            text += data.decode("utf-8", "replace")
+            # Split off every complete wrapped program: def name(): ... end, then name()
+            while True:
+                match = _PROGRAM_END.search(text)
+                if match is None:
+                    break
+                self._program(text[:match.end()])
+                text = text[match.end():]
+        if text.strip():
+            self._program(text)
+        connection.close()
+    
+    def _program(self, program):
+        """ Internal function that records a program and, if interpolating, starts it """
+        
+        now = self.time()
+        with self._lock:
+            self.programs.append(program)
+            if self.interpolate:
+                self._update(now)
+                self._segments = plan_program(program, self.joints, self.pose)
+                self._program_start = now
+    
+    def _serve_realtime(self, server):
+        """ Internal function that accepts real time clients """
+        
+        for connection in self._accept(server):
+            connection.setblocking(False)
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with self._lock:
+                self._clients.append({"socket": connection, "pending": b"", "frames": 0})
+    
+    # ----- State -----
+    
+    def time(self):
+        """ Function that returns the controller time in s """
+        
+        return timeit.default_timer() - self._start
+    
+    def _update(self, now):
+        """ Internal function that moves joints and pose to where the running program is at a time """
+        
+        t = now - self._program_start
+        for start, duration, field, first, last in self._segments:
+            if field is None or t < start:
+                continue
+            s = 1.0 if duration <= 0 else min((t - start) / duration, 1.0)
+            values = [a + (b - a) * s for a, b in zip(first, last)]
+            if field == "q":
+                self.joints = values
+            else:
+                self.pose = values
+        if self._segments and t >= self._segments[-1][0] + self._segments[-1][1]:
+            self._segments = []
+    
+    def is_running(self):
+        """ Function that tells if a program is being run """
+        
+        now = self.time()
+        with self._lock:
+            self._update(now)
+            return bool(self._segments)
+    
+    def state(self):
+        """
+        Function that returns where the robot is now
+        
+        Returns:
+            (joints, pose): Lists of joint angles in rad and the tool pose [x, y, z, rx, ry, rz] in m
+        """
+        
+        now = self.time()
+        with self._lock:
+            self._update(now)
+            return list(self.joints), list(self.pose)
+    
+    def frame(self):
+        """
+        Function that packs the current state into a real time frame
+        
+        Returns:
+            frame: bytes
+        """
+        
+        now = self.time()
+        with self._lock:
+            self._update(now)
+            values = {"time": now, "q_target": self.joints, "q_actual": self.joints, "tool_vector": self.pose,
+                "tool_vector_target": self.pose, "controller_timer": now, "robot_mode": _RUNNING,
+                "safety_mode": _NORMAL, "speed_scaling": 1.0, "program_state": _PLAYING if self._segments else _STOPPED}
+        flat = [self.layout.size]
+        for name, count in self.layout.fields[1:]:
+            value = values.get(name)
+            if value is None:
+                flat.extend([0.0] * count)
+            else:
+                flat.extend(value if count > 1 else [value])
+        return self.layout.struct.pack(*flat)
+    
+    # ----- Real time -----
+    
+    def _broadcast(self):
+        """ Internal function that sends a frame to every client at the rate """
+        
+        period = 1.0 / self.rate
+        tick = timeit.default_timer()
+        while self._running:
+            tick += period
+            delay = tick - timeit.default_timer()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Fell behind, do not try to catch up
+                tick = timeit.default_timer()
+            if self.send_delay:
+                time.sleep(self.send_delay)
+            with self._lock:
+                clients = list(self._clients)
+                if not clients:
+                    # Keep running programs moving, joints and pose are read directly too
+                    self._update(self.time())
+                    continue
+            frame = self.frame()
+            for client in clients:
+                self._send(client, frame)
+            self.frames_sent += 1
+    
+    def _send(self, client, frame):
+        """ Internal function that queues a frame for a client and sends what the socket takes """
+        
+        client["frames"] += 1
+        if self.drop_every and client["frames"] > self.drop_every:
+            return self._drop(client)
+        if self.truncate_probability and self._random.random() < self.truncate_probability:
+            client["pending"] += frame[:self._random.randint(1, len(frame) - 1)]
+            self._flush(client)
+            return self._drop(client)
+        client["pending"] += frame
+        if len(client["pending"]) > self.max_pending:
+            return self._drop(client)
+        self._flush(client)
+    
+    def _flush(self, client):
+        """ Internal function that sends pending bytes without blocking, in random pieces when fragmenting """
+        
+        s = client["socket"]
+        try:
+            while client["pending"]:
+                if not select.select([], [s], [], 0)[1]:
+                    return
+                piece = client["pending"]
+                if self.fragment:
+                    piece = piece[:self._random.randint(1, len(piece))]
+                sent = s.send(piece)
+                client["pending"] = client["pending"][sent:]
+        except socket.error:
+            self._drop(client)
+    
+    def _drop(self, client):
+        """ Internal function that closes a client connection """
+        
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+                self.clients_dropped += 1
+        client["socket"].close()
+    
+    def clients(self):
+        """ Function that returns the number of connected real time clients """
+        
+        with self._lock:
+            return len(self._clients)
+    
+    def stop(self):
+        """ Function that closes all ports and connections """
+        
+        self._running = False
+        for server in self._servers:
+            server.close()
+        for thread in self._threads:
+            thread.join(1.0)
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            client["socket"].close()
+        self._servers = []
+        self._threads = []
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, *args):
+        self.stop()
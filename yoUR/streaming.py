@@ -0,0 +1,314 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module streams motion commands to a small resident program on the robot, so long or live-generated
+jobs run without re-uploading programs.
+The resident program connects back to this computer and reads fixed size messages of 17 numbers:
+    (code, sequence number, 6 pose or joint values, 6 more pose values, accel, vel, blend)
+and acknowledges every executed command by sending its sequence number as an int.
+MotionStreamer keeps at most a window of commands unacknowledged, so the robot always has the next move
+queued (for blends) while the socket never fills up.
+"""
+
+
+from . import comm
+from . import ur_standard
+from . import utils
+from . import geometry as rg
+import collections
+import socket
+import struct
+import threading
+import timeit
+
+# Message codes
+STOP = 0
+MOVE_L = 1
+MOVE_J = 2
+MOVE_C = 3
+SLEEP = 4
+DIGITAL_OUT = 5
+# Numbers in every message
+MESSAGE_LENGTH = 17
+
+def resident_script(pc_ip, port):
+    """
+    Function that returns the UR script of the resident program. It runs until it receives a STOP message
+    
+    Args:
+        pc_ip: String. IP of this computer as seen from the robot
+        port: int. Port MotionStreamer listens at
+    
+    Returns:
+        ur_script: UR script commands, to be wrapped by comm.concatenate_script
+    """
+    
+    script = 'while not %s' % ur_standard.socket_open('"%s"' % pc_ip, port).strip() + ':\n'
+    script += '  sleep(0.5)\n'
+    script += 'end\n'
+    script += 'running = True\n'
+    script += 'while running:\n'
+    script += '  m = socket_read_ascii_float(%d)\n' % MESSAGE_LENGTH
+    # m[0] is the count of numbers read, 0 when nothing arrived in time
+    script += '  if m[0] == %d:\n' % MESSAGE_LENGTH
+    script += '    code = m[1]\n'
+    script += '    if code == %d:\n' % MOVE_L
+    script += '      movel(p[m[3], m[4], m[5], m[6], m[7], m[8]], a = m[15], v = m[16], r = m[17])\n'
+    script += '    elif code == %d:\n' % MOVE_J
+    script += '      movej([m[3], m[4], m[5], m[6], m[7], m[8]], a = m[15], v = m[16], r = m[17])\n'
+    script += '    elif code == %d:\n' % MOVE_C
+    script += '      movec(p[m[3], m[4], m[5], m[6], m[7], m[8]], p[m[9], m[10], m[11], m[12], m[13], m[14]], a = m[15], v = m[16], r = m[17])\n'
+    script += '    elif code == %d:\n' % SLEEP
+    script += '      sleep(m[3])\n'
+    script += '    elif code == %d:\n' % DIGITAL_OUT
+    script += '      set_digital_out(floor(m[3]), m[4] > 0)\n'
+    script += '    else:\n'
+    script += '      running = False\n'
+    script += '    end\n'
+    script += '    socket_send_int(floor(m[2]))\n'
+    script += '  end\n'
+    script += 'end\n'
+    script += 'socket_close()\n'
+    return script
+
+def _pose(plane_to):
+    """ Internal function that returns the UR pose [x, y, z, rx, ry, rz] in m of a plane, or passes a pose through """
+    
+    if not hasattr(plane_to, "Origin"):
+        return [float(v) for v in plane_to]
+    _matrix = rg.Transform.PlaneToPlane(rg.Plane.WorldXY, plane_to)
+    _axis_angle = utils.matrix_to_axis_angle(_matrix)
+    return [plane_to.OriginX/1000, plane_to.OriginY/1000, plane_to.OriginZ/1000, _axis_angle[0], _axis_angle[1], _axis_angle[2]]
+
+class MotionStreamer(object):
+    """
+    Class that uploads the resident program once and streams motion commands to it
+    
+    Args:
+        robot_ip: String. IP of robot
+        pc_ip: String. IP of this computer as seen from the robot
+        port: int. Port to listen at for the resident program
+        window: int. Commands sent ahead of the last acknowledged one
+        robot: RobotModel. Optional, limits accel and vel to the model
+    """
+    
+    def __init__(self, robot_ip, pc_ip, port = 30011, window = 4, robot = None):
+        self.robot_ip = robot_ip
+        self.pc_ip = pc_ip
+        self.port = port
+        self.window = window
+        self.robot = robot
+        self.sent = 0
+        self.acknowledged = 0
+        self.error = None
+        self.latencies = collections.deque(maxlen = 1000)
+        self._sent_at = {}
+        self._connection = None
+        self._condition = threading.Condition()
+        self._reader = None
+    
+    def start(self, timeout = 10.0):
+        """
+        Function that uploads the resident program and waits for it to connect
+        
+        Args:
+            timeout: float. Seconds to wait for the robot
+        """
+        
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.settimeout(timeout)
+        try:
+            server.bind(("", self.port))
+            server.listen(1)
+            program = comm.concatenate_script([resident_script(self.pc_ip, self.port)])
+            comm.get_sender(self.robot_ip).send(program)
+            self._connection, _ = server.accept()
+        finally:
+            server.close()
+        self._connection.settimeout(None)
+        self._connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = threading.Thread(target = self._read_acknowledgements)
+        self._reader.daemon = True
+        self._reader.start()
+    
+    def _read_acknowledgements(self):
+        """ Internal function that counts acknowledgements until the connection closes """
+        
+        data = b""
+        try:
+            while True:
+                chunk = self._connection.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+                count = len(data) // 4
+                numbers = struct.unpack("!%di" % count, data[:4 * count])
+                data = data[4 * count:]
+                now = timeit.default_timer()
+                with self._condition:
+                    for n in numbers:
+                        self.acknowledged = max(self.acknowledged, n)
+                        sent_at = self._sent_at.pop(n, None)
+                        if sent_at is not None:
+                            self.latencies.append(now - sent_at)
+                    self._condition.notify_all()
+        except socket.error as e:
+            self.error = e
+        with self._condition:
+            if self.error is None:
+                self.error = Exception("Robot closed the connection")
+            self._condition.notify_all()
+    
+    def _send(self, code, first = (), second = (), accel = 0, vel = 0, blend = 0, timeout = None):
+        """ Internal function that waits for room in the window and sends one message. Returns its sequence number """
+        
+        values = list(first) + [0.0] * (6 - len(first)) + list(second) + [0.0] * (6 - len(second))
+        with self._condition:
+            deadline = None if timeout is None else timeit.default_timer() + timeout
+            while self.sent - self.acknowledged >= self.window and self.error is None:
+                remaining = None if deadline is None else deadline - timeit.default_timer()
+                if remaining is not None and remaining <= 0:
+                    raise Exception("Timed out waiting for the robot")
+                self._condition.wait(remaining)
+            if self.error is not None:
+                raise self.error
+            self.sent += 1
+            sequence = self.sent
+            self._sent_at[sequence] = timeit.default_timer()
+        message = "(%d,%d," % (code, sequence) + ",".join("%.6f" % v for v in values + [accel, vel, blend]) + ")\n"
+        self._connection.sendall(message.encode("utf-8"))
+        return sequence
+    
+    def move_l(self, plane_to, accel, vel, blend = 0, timeout = None):
+        """
+        Function that streams a linear movement in tool-space
+        
+        Args:
+            plane_to: Plane, or UR pose [x, y, z, rx, ry, rz] in m (in UR base coordinate system)
+            accel: tool accel in m/s^2
+            vel: tool speed in m/s
+            blend: blend radius in m
+            timeout: float. Seconds to wait for room in the window
+        
+        Returns:
+            sequence: int. Number acknowledged once the move is done
+        """
+        
+        accel, vel = ur_standard.clamp_tool(accel, vel, self.robot)
+        return self._send(MOVE_L, _pose(plane_to), (), accel, vel, blend, timeout)
+    
+    def move_j(self, joints, accel, vel, blend = 0, timeout = None):
+        """
+        Function that streams a movement in joint space
+        
+        Args:
+            joints: A list of 6 joint angles in radians
+            accel: joint accel in rad/s^2
+            vel: joint speed in rad/s
+            blend: blend radius in m
+            timeout: float. Seconds to wait for room in the window
+        
+        Returns:
+            sequence: int
+        """
+        
+        if self.robot is not None:
+            accel, vel = self.robot.clamp_joint(accel, vel)
+        return self._send(MOVE_J, joints, (), accel, vel, blend, timeout)
+    
+    def move_c(self, plane_to, point_via, accel, vel, blend = 0, timeout = None):
+        """
+        Function that streams a circular movement in tool-space, with the orientation of plane_to
+        
+        Args:
+            plane_to: Plane. Target (in UR base coordinate system)
+            point_via: Point. A waypoint that movement passes through
+            accel: tool accel in m/s^2
+            vel: tool speed in m/s
+            blend: blend radius in m
+            timeout: float. Seconds to wait for room in the window
+        
+        Returns:
+            sequence: int
+        """
+        
+        accel, vel = ur_standard.clamp_tool(accel, vel, self.robot)
+        pose_to = _pose(plane_to)
+        pose_via = [point_via.X/1000, point_via.Y/1000, point_via.Z/1000] + pose_to[3:]
+        return self._send(MOVE_C, pose_via, pose_to, accel, vel, blend, timeout)
+    
+    def sleep(self, time, timeout = None):
+        """ Function that streams a pause of time seconds. Returns the sequence number """
+        
+        return self._send(SLEEP, [time], timeout = timeout)
+    
+    def set_digital_out(self, id, signal, timeout = None):
+        """ Function that streams setting a digital out. Returns the sequence number """
+        
+        return self._send(DIGITAL_OUT, [id, 1 if signal else 0], timeout = timeout)
+    
+    def wait(self, sequence = None, timeout = None):
+        """
+        Function that waits until a command is done
+        
+        Args:
+            sequence: int. Command to wait for. If none specified, all commands sent so far
+            timeout: float. Seconds to wait
+        
+        Returns:
+            done: Boolean. False when the timeout passed first
+        """
+        
+        if sequence is None:
+            sequence = self.sent
+        deadline = None if timeout is None else timeit.default_timer() + timeout
+        with self._condition:
+            while self.acknowledged < sequence:
+                if self.error is not None:
+                    raise self.error
+                remaining = None if deadline is None else deadline - timeit.default_timer()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+    
+    def stats(self):
+        """
+        Function that returns streaming statistics
+        
+        Returns:
+            stats: Dictionary with sent, acknowledged, in_flight and the mean and max acknowledgement latency in seconds
+        """
+        
+        with self._condition:
+            latencies = list(self.latencies)
+            return {"sent": self.sent, "acknowledged": self.acknowledged, "in_flight": self.sent - self.acknowledged,
+                "mean_latency": sum(latencies) / len(latencies) if latencies else 0.0,
+                "max_latency": max(latencies) if latencies else 0.0}
+    
+    def stop(self, timeout = 10.0):
+        """ Function that ends the resident program after the commands sent so far, and closes the connection """
+        
+        try:
+            if self._connection is not None and self.error is None:
+                self.wait(self._send(STOP, timeout = timeout), timeout)
+        finally:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.stop()
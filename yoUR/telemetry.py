@@ -0,0 +1,153 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module keeps the last seconds of real time frames in a fixed amount of memory.
+The ring buffer is a NumPy structured array with the fields of realtime.Layout. Every frame is written twice,
+at its slot and at the slot plus the capacity, so any window of frames is one contiguous slice and can be
+returned as a view.
+One thread appends (e.g. a comm.RealtimeClient callback) without locks. The frame count is only increased after
+a frame is written, so readers never see a half-written frame. Views stay valid until the writer laps them,
+pass copy = True to keep a window longer.
+"""
+
+
+import numpy as np
+
+from . import realtime
+
+class TelemetryBuffer(object):
+    """
+    Class for a ring buffer of decoded real time frames
+    
+    Args:
+        seconds: float. Length of history kept
+        rate: int. Frames per second sent by the controller (125 for CB3, 500 for e-series)
+        version: String. Controller version of the frames, see realtime.get_layout
+    """
+    
+    def __init__(self, seconds = 60, rate = 125, version = "3.5"):
+        self.layout = realtime.get_layout(version = version)
+        self.capacity = int(round(seconds * rate))
+        self._wire = self.layout.dtype()
+        self.dtype = self._wire.newbyteorder("=")
+        self.data = np.zeros(2 * self.capacity, dtype = self.dtype)
+        self.received = np.zeros(2 * self.capacity)
+        self.count = 0
+    
+    # ----- Writer -----
+    
+    def append(self, frame, received = 0.0):
+        """
+        Function that adds one raw frame. Matches the comm.RealtimeClient.subscribe callback
+        
+        Args:
+            frame: bytes, bytearray or memoryview of one frame
+            received: float. Receive time
+        """
+        
+        record = np.frombuffer(frame, dtype = self._wire, count = 1)[0]
+        i = self.count % self.capacity
+        self.data[i] = record
+        self.data[i + self.capacity] = record
+        self.received[i] = self.received[i + self.capacity] = received
+        self.count += 1
+    
+    def extend(self, frames, received = None):
+        """
+        Function that adds many decoded frames at once
+        
+        Args:
+            frames: (N,) structured array as returned by realtime.decode_many
+            received: (N,) array. Receive times. Optional
+        """
+        
+        frames = frames[-self.capacity:]
+        n = len(frames)
+        if received is None:
+            received = np.zeros(n)
+        received = np.asarray(received, dtype = float)[-n:]
+        slots = (self.count + np.arange(n)) % self.capacity
+        for offset in (0, self.capacity):
+            self.data[slots + offset] = frames
+            self.received[slots + offset] = received
+        self.count += n
+    
+    # ----- Readers -----
+    
+    def __len__(self):
+        return min(self.count, self.capacity)
+    
+    def _span(self, count):
+        """ Internal function that returns the slice of the mirrored array holding all kept frames, oldest first """
+        
+        n = min(count, self.capacity)
+        start = (count - n) % self.capacity
+        return slice(start, start + n)
+    
+    def latest(self, n = 1, copy = False):
+        """
+        Function that returns the newest frames
+        
+        Args:
+            n: int. Number of frames
+            copy: Boolean. Return a copy instead of a view
+        
+        Returns:
+            frames: (n,) structured array, oldest first
+        """
+        
+        span = self._span(self.count)
+        start = max(span.start, span.stop - n)
+        frames = self.data[start:span.stop]
+        return frames.copy() if copy else frames
+    
+    def window(self, start_time = None, end_time = None, copy = False, field = "time"):
+        """
+        Function that returns the frames with start_time <= time < end_time
+        
+        Args:
+            start_time: float. Controller time in s. If none specified, from the oldest frame
+            end_time: float. Controller time in s. If none specified, up to the newest frame
+            copy: Boolean. Return a copy instead of a view
+            field: String. Time field to search, e.g. "time" or "controller_timer"
+        
+        Returns:
+            frames: structured array, oldest first
+        """
+        
+        frames, _ = self._window(start_time, end_time, field)
+        return frames.copy() if copy else frames
+    
+    def _window(self, start_time, end_time, field):
+        """ Internal function that returns the frames and slice of a time window """
+        
+        span = self._span(self.count)
+        times = self.data[field][span]
+        first = 0 if start_time is None else int(np.searchsorted(times, start_time, side = "left"))
+        last = len(times) if end_time is None else int(np.searchsorted(times, end_time, side = "left"))
+        window = slice(span.start + first, span.start + max(first, last))
+        return self.data[window], window
+    
+    def received_times(self, start_time = None, end_time = None, field = "time"):
+        """
+        Function that returns the receive times of the frames of window
+        
+        Returns:
+            received: array view
+        """
+        
+        return self.received[self._window(start_time, end_time, field)[1]]
+    
+    def clear(self):
+        """ Function that drops all frames """
+        
+        self.count = 0
@@ -0,0 +1,262 @@
+"""
+yoUR - Python library for UR robots
+
+This library was initialy developed at ETH Zurich in 2011 at Gramazio Kohler Research.
+Since then it was used by students in bachelor, master and MAS levels.
+Initial framework was given by Ralph Baertschi, Michael Knauss and Silvan Oesterle.
+Considerable contribution was made by Dr. Jason Lim as part of his PhD dissertation 
+'YOUR: Robot Programming Tools for Architectural Education' at ETH Zurich in 2016.
+This version is used since 2018 at Aalto University in Helsinki and is maintained by Luka Piskorec.
+
+DESCRIPTION
+
+This module turns curves into toolpaths:
+    1) Sampling of points on a curve by chord tolerance and arc length
+    2) Fitting of circular arcs and straight lines through the samples
+    3) UR script with movec for the arcs and movel for the rest
+Curves can be Rhino curves (anything with Domain and PointAt), functions of a parameter, or lists of points.
+Plain Python, so it also runs inside Rhino.
+"""
+
+
+from . import geometry as rg
+from . import ur_standard
+import math
+
+# ----- Vector helpers -----
+
+def _xyz(point):
+    """ Internal function that returns a point as an (x, y, z) tuple """
+    
+    if hasattr(point, "X"):
+        return (point.X, point.Y, point.Z)
+    return (point[0], point[1], point[2])
+
+def _sub(a, b):
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+def _dot(a, b):
+    return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+def _cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0])
+
+def _distance_to_segment(p, a, b):
+    """ Internal function that returns the distance of point p from segment ab """
+    
+    ab = _sub(b, a)
+    ap = _sub(p, a)
+    length2 = _dot(ab, ab)
+    t = 0.0 if length2 == 0 else max(0.0, min(1.0, _dot(ap, ab) / length2))
+    d = (ap[0] - t * ab[0], ap[1] - t * ab[1], ap[2] - t * ab[2])
+    return math.sqrt(_dot(d, d))
+
+def circle_through(p0, p1, p2):
+    """
+    Function that finds the circle through three points
+    
+    Args:
+        p0, p1, p2: (x, y, z) tuples
+    
+    Returns:
+        (center, radius, normal): Center tuple, radius and unit normal oriented so that p0, p1, p2 run counterclockwise.
+        None if the points are collinear
+    """
+    
+    a = _sub(p1, p0)
+    b = _sub(p2, p0)
+    n = _cross(a, b)
+    n2 = _dot(n, n)
+    if n2 <= 1e-12 * _dot(a, a) * _dot(b, b) or n2 == 0:
+        return None
+    aa = _dot(a, a)
+    bb = _dot(b, b)
+    bn = _cross(b, n)
+    na = _cross(n, a)
+    offset = tuple((aa * bn[i] + bb * na[i]) / (2.0 * n2) for i in range(3))
+    center = (p0[0] + offset[0], p0[1] + offset[1], p0[2] + offset[2])
+    length = math.sqrt(n2)
+    return center, math.sqrt(_dot(offset, offset)), (n[0] / length, n[1] / length, n[2] / length)
+
+# ----- Sampling -----
+
+def _evaluator(curve, domain):
+    """ Internal function that returns (function of parameter returning a tuple, domain) for a curve """
+    
+    if hasattr(curve, "PointAt"):
+        if domain is None:
+            domain = (curve.Domain.T0, curve.Domain.T1)
+        return (lambda t: _xyz(curve.PointAt(t))), domain
+    if domain is None:
+        domain = (0.0, 1.0)
+    return (lambda t: _xyz(curve(t))), domain
+
+def sample_curve(curve, chord_tolerance = 0.1, max_length = None, domain = None, min_segments = 16):
+    """
+    Function that samples points on a curve so that the polyline through them stays within the chord tolerance
+    
+    Args:
+        curve: Rhino curve, or function of a parameter returning a point
+        chord_tolerance: float. Largest distance between the curve and the polyline in mm
+        max_length: float. Longest polyline segment in mm. If none specified, only the tolerance is used
+        domain: (t0, t1). Parameter range. Defaults to the curve domain, or (0, 1) for functions
+        min_segments: int. Uniform segments checked first, so that small features are not skipped
+    
+    Returns:
+        points: List of (x, y, z) tuples
+    """
+    
+    point_at, (t0, t1) = _evaluator(curve, domain)
+    params = [t0 + (t1 - t0) * i / float(min_segments) for i in range(min_segments + 1)]
+    points = [point_at(t) for t in params]
+    for _ in range(32):
+        new_params = [params[0]]
+        new_points = [points[0]]
+        split = False
+        for i in range(len(params) - 1):
+            t = 0.5 * (params[i] + params[i + 1])
+            mid = point_at(t)
+            chord = _sub(points[i + 1], points[i])
+            if (_distance_to_segment(mid, points[i], points[i + 1]) > chord_tolerance
+                    or (max_length is not None and math.sqrt(_dot(chord, chord)) > max_length)):
+                new_params.append(t)
+                new_points.append(mid)
+                split = True
+            new_params.append(params[i + 1])
+            new_points.append(points[i + 1])
+        params, points = new_params, new_points
+        if not split:
+            break
+    return points
+
+# ----- Fitting -----
+
+def _line_fits(points, i, j, tolerance):
+    """ Internal function that checks if points i..j lie within tolerance of the line from i to j """
+    
+    a, b = points[i], points[j]
+    return all(_distance_to_segment(points[k], a, b) <= tolerance for k in range(i + 1, j))
+
+def _arc_fits(points, i, j, tolerance, max_angle):
+    """ Internal function that checks if points i..j lie in order within tolerance of the arc through i, the middle and j """
+    
+    circle = circle_through(points[i], points[(i + j) // 2], points[j])
+    if circle is None:
+        return False
+    center, radius, normal = circle
+    u = _sub(points[i], center)
+    u = (u[0] / radius, u[1] / radius, u[2] / radius)
+    v = _cross(normal, u)
+    previous = 0.0
+    for k in range(i + 1, j + 1):
+        d = _sub(points[k], center)
+        h = _dot(d, normal)
+        radial = math.sqrt(max(_dot(d, d) - h * h, 0.0)) - radius
+        if h * h + radial * radial > tolerance * tolerance:
+            return False
+        angle = math.atan2(_dot(d, v), _dot(d, u)) % (2 * math.pi)
+        if angle < previous or angle > max_angle:
+            return False
+        previous = angle
+    return True
+
+def _longest(fits, i, last, first):
+    """ Internal function that finds the furthest end index for which fits(i, j) holds, growing then bisecting """
+    
+    good = i + first - 1
+    step = first
+    bad = None
+    while True:
+        j = min(i + step, last)
+        if not fits(i, j):
+            bad = j
+            break
+        good = j
+        if j == last:
+            return good
+        step *= 2
+    while bad - good > 1:
+        j = (good + bad) // 2
+        if fits(i, j):
+            good = j
+        else:
+            bad = j
+    return good
+
+def fit_segments(points, tolerance = 0.1, min_arc_points = 4, max_angle = math.pi):
+    """
+    Function that covers sampled points with as few lines and circular arcs as it can
+    
+    Args:
+        points: List of points
+        tolerance: float. Largest distance between a point and its line or arc in mm
+        min_arc_points: int. Fewest points an arc has to pass through
+        max_angle: float. Largest angle of one arc in radians
+    
+    Returns:
+        segments: List of ("line", end) and ("arc", via, end) tuples, starting from the first point
+    """
+    
+    points = [_xyz(p) for p in points]
+    last = len(points) - 1
+    segments = []
+    i = 0
+    while i < last:
+        line_end = _longest(lambda a, b: _line_fits(points, a, b, tolerance), i, last, 1)
+        arc_end = i
+        if last - i >= min_arc_points - 1:
+            fits = lambda a, b: _arc_fits(points, a, b, tolerance, max_angle)
+            if fits(i, i + min_arc_points - 1):
+                arc_end = _longest(fits, i, last, min_arc_points - 1)
+        if arc_end > line_end:
+            segments.append(("arc", points[(i + arc_end) // 2], points[arc_end]))
+            i = arc_end
+        else:
+            segments.append(("line", points[line_end]))
+            i = line_end
+    return segments
+
+# ----- UR script -----
+
+def _plane_at(point, orientation):
+    """ Internal function that returns a plane at the point with the axes of the orientation plane """
+    
+    return rg.Plane(rg.Point3d(*point), orientation.XAxis, orientation.YAxis)
+
+def curve_script(curve, accel, vel, orientation = None, blend = 0, chord_tolerance = 0.1, fit_tolerance = None, max_length = None, robot = None):
+    """
+    Function that returns UR script tracing a curve with a fixed tool orientation. Arcs become movec, the rest movel
+    
+    Args:
+        curve: Rhino curve, function of a parameter returning a point, or list of points (in UR base coordinate system)
+        accel: tool accel in m/s^2
+        vel: tool speed in m/s
+        orientation: Plane giving the tool orientation. If none specified, world XY plane used as default
+        blend: blend radius in m between moves. The last move stops
+        chord_tolerance: float. Sampling tolerance in mm
+        fit_tolerance: float. Line and arc fitting tolerance in mm. Defaults to chord_tolerance
+        max_length: float. Longest sampling step in mm
+        robot: RobotModel. Optional, limits accel and vel to the model
+    
+    Returns:
+        scripts: List of UR script commands, starting with a movel to the start of the curve
+    """
+    
+    if orientation is None:
+        orientation = rg.Plane.WorldXY
+    if fit_tolerance is None:
+        fit_tolerance = chord_tolerance
+    if isinstance(curve, (list, tuple)):
+        points = [_xyz(p) for p in curve]
+    else:
+        points = sample_curve(curve, chord_tolerance, max_length)
+    segments = fit_segments(points, fit_tolerance)
+    
+    scripts = [ur_standard.move_l(_plane_at(points[0], orientation), accel, vel, 0, robot)]
+    for k, segment in enumerate(segments):
+        r = blend if k < len(segments) - 1 else 0
+        if segment[0] == "arc":
+            scripts.append(ur_standard.move_c(_plane_at(segment[2], orientation), rg.Point3d(*segment[1]), accel, vel, robot, r))
+        else:
+            scripts.append(ur_standard.move_l(_plane_at(segment[1], orientation), accel, vel, r, robot))
+    return scripts
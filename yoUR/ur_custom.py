@@ -14,13 +14,14 @@ This module manages custom UR script functions
 """
 
 
-import ur_standard
-import Rhino.Geometry as rg
-import utils
+from . import ur_standard
+# Rhino-free stand-in for Rhino.Geometry. Rhino objects that are passed in are read through the same attributes
+from . import geometry as rg
+from . import utils
 
 # ----- Custom motions -----
 
-def move_local(target_vector, accel, vel):
+def move_local(target_vector, accel, vel, robot = None):
     """
     Function that returns UR script for a custom local motion. Movement is local in tool coordinate system
     
@@ -28,14 +29,14 @@ def move_local(target_vector, accel, vel):
         target_vector:  Rhino.Geometry Vector3d.A vector that describes intended direction of motion (relative to current tool pose)
         accel: tool accel in m/s^2
         vel: tool speed in m/s
+        robot: RobotModel. Optional, limits accel and vel to the model
     
     Returns:
     script: UR script
     """
     
     # Check acceleration and velocity are non-negative and below a set limit
-    accel = ur_standard.MAX_ACCEL if (abs(accel) >ur_standard.MAX_ACCEL) else abs(accel)
-    vel = ur_standard.MAX_VELOCITY if (abs(vel) > ur_standard.MAX_VELOCITY) else abs(vel)
+    accel, vel = ur_standard.clamp_tool(accel, vel, robot)
     # Format target pose
     _pose_target = [target_vector.X/1000, target_vector.Y/1000,target_vector.Z/1000,0.0,0.0,0.0]
     _pose_fmt = "p[" + ("%.4f,"*6)[:-1]+"]"
@@ -47,7 +48,7 @@ def move_local(target_vector, accel, vel):
     
     return script
 
-def orient_local(target_plane,accel,vel):
+def orient_local(target_plane,accel,vel, robot = None):
     """
     Function that returns UR script for orienting the robot tip. Movement is local in tool coordinate system
     
@@ -55,14 +56,14 @@ def orient_local(target_plane,accel,vel):
         target_plane:  Rhino.Geometry Plane. Target orientation plane (relative to current tool pose).
         accel: tool accel in m/s^2
         vel: tool speed in m/s
+        robot: RobotModel. Optional, limits accel and vel to the model
     
     Returns:
     script: UR script
     """
     
     # Check acceleration and velocity are non-negative and below a set limit
-    accel = ur_standard.MAX_ACCEL if (abs(accel) >ur_standard.MAX_ACCEL) else abs(accel)
-    vel = ur_standard.MAX_VELOCITY if (abs(vel) > ur_standard.MAX_VELOCITY) else abs(vel)
+    accel, vel = ur_standard.clamp_tool(accel, vel, robot)
     # Format target pose
     _matrix = rg.Transform.PlaneToPlane(rg.Plane.WorldXY,target_plane)
     _axis_angle= utils.matrix_to_axis_angle(_matrix)
@@ -161,17 +162,17 @@ def pick_l(plane_tos, accel, vel, io):
     Returns:
         script: UR script
     """
-    script =""
+    script = []
     num_planes = len(plane_tos)
     
     # Move to all the waypoints
     for i in range(num_planes):
-        script += ur_standard.move_l(plane_tos[i],accel,vel)
+        script.append(ur_standard.move_l(plane_tos[i],accel,vel))
         if i == (num_planes - 1):
-            script += ur_standard.set_digital_out(io, True)
-            script += ur_standard.sleep(2)
+            script.append(ur_standard.set_digital_out(io, True))
+            script.append(ur_standard.sleep(2))
     
-    return script
+    return "".join(script)
 
 def place_l(plane_tos, accel, vel, io, retract = 10):
     """
@@ -189,22 +190,22 @@ def place_l(plane_tos, accel, vel, io, retract = 10):
     Returns:
         script: UR script
     """
-    script =""
+    script = []
     num_planes = len(plane_tos)
     
     # Move to all the waypoints
     for i in range(num_planes):
         if i == (num_planes - 1):
-            script += ur_standard.move_l(plane_tos[i],accel/3,vel/3)
-            script += ur_standard.set_digital_out(io, False)
-            script += ur_standard.sleep(2)
+            script.append(ur_standard.move_l(plane_tos[i],accel/3,vel/3))
+            script.append(ur_standard.set_digital_out(io, False))
+            script.append(ur_standard.sleep(2))
         else:
-            script += ur_standard.move_l(plane_tos[i],accel,vel)
+            script.append(ur_standard.move_l(plane_tos[i],accel,vel))
     
     # Retract after placing
-    script += move_local(rg.Vector3d(0,0,-retract),accel/2,vel/2) 
+    script.append(move_local(rg.Vector3d(0,0,-retract),accel/2,vel/2))
     
-    return script
+    return "".join(script)
 
 # ----- Utility -----
 def check_joints(plane_to):
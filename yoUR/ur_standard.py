@@ -14,8 +14,9 @@ This module wraps standard UR Script functions.
 Main change is that plane information substitute for pose data
 """
 
-import utils 
-import Rhino.Geometry as rg
+from . import utils
+# Rhino-free stand-in for Rhino.Geometry. Rhino objects that are passed in are read through the same attributes
+from . import geometry as rg
 
 # ----- UR Interfaces module -----
 
@@ -83,11 +84,30 @@ def socket_send_string(ref_string):
 
 # ----- UR Motion module -----
 
-# Some Constants
+# Some Constants. Default limits when no robot model is given
 MAX_ACCEL = 1.5
 MAX_VELOCITY = 2
 
-def move_l(plane_to, accel, vel, blend = 0):
+def clamp_tool(accel, vel, robot = None):
+    """
+    Function that makes tool accel and speed non-negative and below a set limit
+    
+    Args:
+        accel: tool accel in m/s^2
+        vel: tool speed in m/s
+        robot: RobotModel. Limits to use. If none specified, MAX_ACCEL and MAX_VELOCITY are used
+        
+    Returns:
+        (accel, vel): Clamped values
+    """
+    
+    if robot is not None:
+        return robot.clamp_tool(accel, vel)
+    accel = MAX_ACCEL if (abs(accel) >MAX_ACCEL) else abs(accel)
+    vel = MAX_VELOCITY if (abs(vel) > MAX_VELOCITY) else abs(vel)
+    return accel, vel
+
+def move_l(plane_to, accel, vel, blend = 0, robot = None):
     """
     Function that returns UR script for linear movement in tool-space.
     
@@ -95,14 +115,14 @@ def move_l(plane_to, accel, vel, blend = 0):
         plane_to: Rhino.Geometry Plane. A target plane for calculating pose (in UR base coordinate system)
         accel: tool accel in m/s^2
         vel: tool speed in m/s
+        robot: RobotModel. Optional, limits accel and vel to the model
         
     Returns:
         script: UR script
     """
     
     # Check acceleration and velocity are non-negative and below a set limit
-    accel = MAX_ACCEL if (abs(accel) >MAX_ACCEL) else abs(accel)
-    vel = MAX_VELOCITY if (abs(vel) > MAX_VELOCITY) else abs(vel)
+    accel, vel = clamp_tool(accel, vel, robot)
     
     _matrix = rg.Transform.PlaneToPlane(rg.Plane.WorldXY,plane_to)
     _axis_angle= utils.matrix_to_axis_angle(_matrix)
@@ -114,7 +134,7 @@ def move_l(plane_to, accel, vel, blend = 0):
     script = "movel(%s, a = %.2f, v = %.2f, r = %.4f)\n"%(_pose_fmt,accel,vel,blend)
     return script
 
-def move_j(joints, accel, vel):
+def move_j(joints, accel, vel, robot = None):
     """
     Function that returns UR script for linear movement in joint space.
     
@@ -123,11 +143,14 @@ def move_j(joints, accel, vel):
         accel: tool accel in m/s^2
         accel: tool accel in m/s^2
         vel: tool speed in m/s
+        robot: RobotModel. Optional, limits accel and vel to the joint limits of the model
         
     Returns:
         script: UR script
     """
     # Check acceleration and velocity are non-negative and below a set limit
+    if robot is not None:
+        accel, vel = robot.clamp_joint(accel, vel)
 
     _j_fmt = "[" + ("%.2f,"*6)[:-1]+"]"
     _j_fmt = _j_fmt%tuple(joints)
@@ -135,7 +158,7 @@ def move_j(joints, accel, vel):
     return script
 
 
-def move_c(plane_to, point_via, accel, vel):
+def move_c(plane_to, point_via, accel, vel, robot = None, blend = 0):
     """
     Function that returns UR script for circular movement in tool-space. Only via planes, joint angles not wrapped
     
@@ -144,16 +167,17 @@ def move_c(plane_to, point_via, accel, vel):
         point_via: Rhino.Geometry Point. A waypoint that movement passes through
         accel: tool accel in m/s^2
         vel: tool speed in m/s
+        robot: RobotModel. Optional, limits accel and vel to the model
+        blend: blend radius in m
     
     Returns:
         script: UR script
     """
         
     # Check acceleration and velocity are non-negative and below a set limit
-    accel = MAX_ACCEL if (abs(accel) >MAX_ACCEL) else abs(accel)
-    vel = MAX_VELOCITY if (abs(vel) > MAX_VELOCITY) else abs(vel)
+    accel, vel = clamp_tool(accel, vel, robot)
 
-    _matrix = rg.Transform.PlaneToPlane(plane_to, rg.Plane.WorldXY)
+    _matrix = rg.Transform.PlaneToPlane(rg.Plane.WorldXY, plane_to)
     _axis_angle= utils.matrix_to_axis_angle(_matrix)
     # Create pose data
     _pose_to = [plane_to.OriginX/1000, plane_to.OriginY/1000, plane_to.OriginZ/1000,_axis_angle[0], _axis_angle[1], _axis_angle[2]]
@@ -163,7 +187,7 @@ def move_c(plane_to, point_via, accel, vel):
     _pose_to_fmt = _pose_fmt%tuple(_pose_to)
     _pose_via_fmt = _pose_fmt%tuple(_pose_via)
     # Format UR script
-    script = "movec(%s, %s, a = %.2f, v = %.2f)\n"%(_pose_via_fmt, _pose_to_fmt,accel,vel)
+    script = "movec(%s, %s, a = %.2f, v = %.2f, r = %.4f)\n"%(_pose_via_fmt, _pose_to_fmt,accel,vel,blend)
     return script
 
 
@@ -183,7 +207,7 @@ def set_tcp_by_plane(x_offset, y_offset, z_offset, ref_plane=rg.Plane.WorldXY):
         script: UR script
     """
     
-    if (ref_plane != rg.Plane.WorldXY):
+    if (rg.Plane.WorldXY != ref_plane):
         _matrix = rg.Transform.PlaneToPlane(rg.Plane.WorldXY,ref_plane)
         _axis_angle= utils.matrix_to_axis_angle(_matrix)
     else:
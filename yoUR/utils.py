@@ -16,7 +16,8 @@ This module contains utility functions:
 """
 
 
-import Rhino.Geometry as rg
+# Rhino-free stand-in for Rhino.Geometry. Rhino objects that are passed in are read through the same attributes
+from . import geometry as rg
 import math
 
 # ----- Coordinate System conversions -----
@@ -36,13 +37,14 @@ def rhino_to_robotbase(ref_plane, model_base):
     # Transform the orientation plane based on model_base coordinate system
     _matrix = rg.Transform.PlaneToPlane(rg.Plane.WorldXY,model_base)
     #_matrix = rg.Transform.PlaneToPlane(model_base,rg.Plane.WorldXY,)
-    ref_plane.Transform(_matrix)
+    ref_plane.Transform(rg.match(_matrix, ref_plane))
     return ref_plane
 
 def matrix_to_axis_angle(m):
     """
     Function that transforms a 4x4 matrix to axis-angle format
-    referenced from Martin Baker's www.euclideanspace.com
+    Goes through a unit quaternion picked by its largest component (Shepperd's method), so it is accurate
+    to machine precision, also for 0 and 180 degree rotations. See rotations.matrix_to_axis_angle for many matrices
     
     Args:
         m: Rhino.Geometry Transform structure  - 4x4 matrix
@@ -51,68 +53,33 @@ def matrix_to_axis_angle(m):
         axis: Rhino.Geometry Vector3d object - axis-angle notation
     """
     
-    epsilon = 0.01
-    epsilon2 = 0.01
-    
-    if (math.fabs(m.M01 - m.M10) < epsilon) & (math.fabs(m.M02 - m.M20) < epsilon) & (math.fabs(m.M12 - m.M21) < epsilon):
-    #singularity found
-    #first check for identity matrix which must have +1 for all terms
-    #in leading diagonal and zero in other terms
-        if (math.fabs(m.M01 + m.M10) < epsilon2) & (math.fabs(m.M02 + m.M20) < epsilon2) & (math.fabs(m.M12 + m.M21) < epsilon2) & (math.fabs(m.M00 + m.M11 + m.M22 - 3) < epsilon2):
-            #this singularity is identity matrix so angle = 0   make zero angle, arbitrary axis
-            angle = 0
-            x = 1
-            y = z = 0
-        else:
-            # otherwise this singularity is angle = 180
-            angle = math.pi;
-            xx = (m.M00 + 1) / 2
-            yy = (m.M11 + 1) / 2
-            zz = (m.M22 + 1) / 2
-            xy = (m.M01 + m.M10) / 4
-            xz = (m.M02 + m.M20) / 4
-            yz = (m.M12 + m.M21) / 4
-            if ((xx > yy) & (xx > zz)):
-                # m.M00 is the largest diagonal term
-                if (xx < epsilon):
-                    x = 0
-                    y = z = 0.7071
-                else:
-                    x = math.sqrt(xx)
-                    y = xy / x
-                    z = xz / x
-            elif (yy > zz): 
-                # m.M11 is the largest diagonal term
-                if (yy < epsilon):
-                    x = z = 0.7071
-                    y = 0
-                else: 
-                    y = math.sqrt(yy)
-                    x = xy / y
-                    z = yz / y
-            else: 
-                # m.M22 is the largest diagonal term so base result on this
-                if (zz < epsilon):
-                    x = y = 0.7071
-                    z = 0
-                else:
-                    z = math.sqrt(zz)
-                    x = xz / z
-                    y = yz / z
+    # 4 * w^2, 4 * x^2, 4 * y^2 and 4 * z^2 of the quaternion
+    trace = m.M00 + m.M11 + m.M22
+    diagonal = [1 + trace, 1 + m.M00 - m.M11 - m.M22, 1 - m.M00 + m.M11 - m.M22, 1 - m.M00 - m.M11 + m.M22]
+    largest = diagonal.index(max(diagonal))
+    
+    # Quaternion (w, x, y, z) scaled by 4 * largest component
+    if largest == 0:
+        q = [diagonal[0], m.M21 - m.M12, m.M02 - m.M20, m.M10 - m.M01]
+    elif largest == 1:
+        q = [m.M21 - m.M12, diagonal[1], m.M01 + m.M10, m.M02 + m.M20]
+    elif largest == 2:
+        q = [m.M02 - m.M20, m.M01 + m.M10, diagonal[2], m.M12 + m.M21]
     else:
-        s = math.sqrt((m.M21 - m.M12) * (m.M21 - m.M12)+ (m.M02 - m.M20) * (m.M02 - m.M20)+ (m.M10 - m.M01) * (m.M10 - m.M01)); # used to normalise
-        if (math.fabs(s) < 0.001):
-            #prevent divide by zero, should not happen if matrix is orthogonal and should be
-            s = 1
-        angle = math.acos((m.M00 + m.M11 + m.M22 - 1) / 2)
-        x = (m.M21 - m.M12) / s
-        y = (m.M02 - m.M20) / s
-        z = (m.M10 - m.M01) / s
-    angleRad = angle
-    axis = rg.Vector3d(x,y,z)
-    axis = axis*angleRad
-    
-    return axis
+        q = [m.M10 - m.M01, m.M02 + m.M20, m.M12 + m.M21, diagonal[3]]
+    if q[0] < 0:
+        q = [-c for c in q]
+    
+    w, x, y, z = q
+    s = math.sqrt(x * x + y * y + z * z)
+    if s == 0:
+        #identity matrix so angle = 0
+        return rg.match(rg.Vector3d(0, 0, 0), m)
+    angle = 2 * math.atan2(s, w)
+    axis = rg.Vector3d(x / s, y / s, z / s)
+    axis = axis*angle
+    
+    return rg.match(axis, m)
 
 def matrix_to_euler(m):
     """
@@ -132,20 +99,22 @@ def matrix_to_euler(m):
 
 # ----- Matrix related helper functions
 
-def dh_matrix((d, theta, a, alpha)):
+def dh_matrix(dh):
     """
     This function creates the Denavit Hartenberg transformation matrix between adjacent frames
     
     Arguments:
-        d: Joint distance. in mm
-        theta: joint angle. in radians
-        a: link length. in mm
-        alpha: twist angle. in radians
+        dh: Tuple of (d, theta, a, alpha)
+            d: Joint distance. in mm
+            theta: joint angle. in radians
+            a: link length. in mm
+            alpha: twist angle. in radians
     
     Returns:
         m: Denavit Hartenberg transformation matrix
     """
     
+    d, theta, a, alpha = dh
     _matrix = [
     (math.cos(theta), -math.sin(theta) * math.cos(alpha),math.sin(theta) * math.sin(alpha),a * math.cos(theta)),
     (math.sin(theta), math.cos(theta) * math.cos(alpha), -math.cos(theta) * math.sin(alpha), a * math.sin(theta)),